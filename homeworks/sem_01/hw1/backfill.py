@@ -0,0 +1,87 @@
+from typing import Iterable, Optional
+
+import numpy as np
+
+from ids import IdBatch, as_id_array
+from metrics import _validate_period
+
+
+def active_users_history(
+    ids: IdBatch,
+    days: np.ndarray,
+    accumulation_periods: Iterable[int],
+    days_amount: Optional[int] = None,
+) -> dict[int, np.ndarray]:
+    """
+    Вычисляет число уникальных пользователей для каждого дня истории за один проход.
+
+    Пары (пользователь, день) упорядочиваются по пользователю и дню. Визит
+    пользователя в день day, следующий визит которого приходится на день
+    next_day, учитывается окном длины p в дни [day, min(next_day, day + p) - 1].
+    Поэтому ряд для периода p - кумулятивная сумма разностного массива
+    с +1 в day и -1 в min(next_day, day + p) для каждой пары. Сложность -
+    O(E log E) на сортировку событий и O(E + D) на каждый период.
+
+    Args:
+        ids: идентификаторы пользователей событий в любом виде, поддерживаемом
+            ids.as_id_array.
+        days: номера дней событий, неотрицательные целые числа.
+        accumulation_periods: периоды, для которых строятся ряды.
+        days_amount: длина рядов. По умолчанию - последний день событий плюс один.
+
+    Returns:
+        Словарь {период: массив длины days_amount}, в котором элемент d - число
+        уникальных пользователей за дни [d - период + 1, d].
+
+    Raises:
+        ValueError, если число идентификаторов и дней различается, есть
+            отрицательные дни или периоды некорректны.
+    """
+    ids = as_id_array(ids)
+    days = np.asarray(days, dtype=np.int64)
+    if len(ids) != len(days):
+        raise ValueError(f"got {len(ids)} ids and {len(days)} days")
+    if len(days) and days.min() < 0:
+        raise ValueError("days must be non-negative")
+    periods = sorted({_validate_period(period) for period in accumulation_periods})
+    if days_amount is None:
+        days_amount = int(days.max()) + 1 if len(days) else 0
+
+    order = np.lexsort((days, ids[:, 1], ids[:, 0]))
+    ids, days = ids[order], days[order]
+    same_user = np.all(ids[1:] == ids[:-1], axis=1)
+    distinct = np.ones(len(days), dtype=bool)
+    distinct[1:] = ~same_user | (days[1:] != days[:-1])
+    ids, days = ids[distinct], days[distinct]
+
+    no_visit = np.iinfo(np.int64).max
+    next_days = np.full(len(days), no_visit, dtype=np.int64)
+    same_user = np.all(ids[1:] == ids[:-1], axis=1)
+    next_days[:-1][same_user] = days[1:][same_user]
+
+    starts = np.bincount(days, minlength=days_amount + 1)[:days_amount + 1]
+    history = {}
+    for period in periods:
+        ends = np.minimum(next_days, days + period)
+        stops = np.bincount(np.minimum(ends, days_amount), minlength=days_amount + 1)
+        history[period] = np.cumsum(starts - stops)[:days_amount]
+    return history
+
+
+def active_users_history_from_batches(
+    batches: Iterable[IdBatch], accumulation_periods: Iterable[int]
+) -> dict[int, np.ndarray]:
+    """
+    Вычисляет ряды active_users_history по последовательности дневных пакетов.
+
+    Args:
+        batches: пакеты идентификаторов, i-й пакет - пользователи i-го дня.
+        accumulation_periods: периоды, для которых строятся ряды.
+
+    Returns:
+        Словарь {период: массив длины len(batches)}, как в active_users_history.
+    """
+    batches = [as_id_array(batch) for batch in batches]
+    days = np.repeat(np.arange(len(batches)), [len(batch) for batch in batches])
+    ids = np.concatenate(batches) if batches else np.empty((0, 2), dtype=np.uint64)
+    return active_users_history(ids, days, accumulation_periods, len(batches))
@@ -0,0 +1,247 @@
+"""
+Бенчмарк реализаций счетчика уникальных пользователей.
+
+Запуск из каталога homeworks/sem_01/hw1:
+
+    python -m benchmarks.active_users --output results.json
+    python -m benchmarks.active_users --baseline results.json
+
+Для каждой комбинации параметров нагрузки и каждой реализации измеряются
+пропускная способность загрузки (событий в секунду), средняя задержка чтения
+unique_users_amount и пиковый объем памяти, выделенной во время загрузки
+(по tracemalloc). Результаты записываются в JSON, а при указании --baseline
+сравниваются с результатами предыдущего запуска.
+"""
+import argparse
+import itertools
+import json
+import platform
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+import numpy as np
+
+import metricskirill
+from metrics import (
+    ApproximatePeriodActiveUsers,
+    BatchPeriodActiveUsers,
+    PeriodActiveUsers,
+)
+
+
+READS_AMOUNT = 100
+
+
+@dataclass
+class Engine:
+    """
+    Тестируемая реализация счетчика.
+
+    Attrs:
+        create: фабрика счетчика по периоду.
+        batched: принимает ли счетчик пакеты NumPy (add_active_users_batch)
+            вместо последовательностей UUID.
+    """
+    create: Callable[[int], Any]
+    batched: bool = False
+
+
+ENGINES: dict[str, Engine] = {
+    "metrics": Engine(PeriodActiveUsers),
+    "metricskirill": Engine(metricskirill.PeriodActiveUsers),
+    "array": Engine(partial(PeriodActiveUsers, backend="array"), batched=True),
+    "batch": Engine(BatchPeriodActiveUsers, batched=True),
+    "approximate": Engine(ApproximatePeriodActiveUsers, batched=True),
+}
+
+
+@dataclass
+class Workload:
+    """
+    Параметры нагрузки.
+
+    Attrs:
+        daily_users: число активных пользователей в день.
+        accumulation_period: период расчета метрики.
+        churn: доля новых пользователей среди активных за день.
+        days: число дней.
+    """
+    daily_users: int
+    accumulation_period: int
+    churn: float
+    days: int
+
+    def generate(self, seed: int = 0) -> list[np.ndarray]:
+        """
+        Генерирует пакеты идентификаторов по дням.
+
+        Каждый день доля churn активных пользователей - новые, остальные
+        выбираются из уже появлявшихся пользователей.
+
+        Args:
+            seed: зерно генератора случайных чисел.
+
+        Returns:
+            Список из days массивов формы (daily_users, 2) типа uint64.
+        """
+        rng = np.random.default_rng(seed)
+        new_amount = max(1, round(self.daily_users * self.churn))
+        population = np.empty((0, 2), dtype=np.uint64)
+        batches = []
+        for _ in range(self.days):
+            new_users = rng.integers(0, 2 ** 64, size=(new_amount, 2), dtype=np.uint64)
+            returning_amount = min(self.daily_users - new_amount, len(population))
+            returning = population[rng.choice(len(population), returning_amount, replace=False)]
+            population = np.concatenate([population, new_users])
+            batches.append(np.concatenate([new_users, returning]))
+        return batches
+
+
+@dataclass
+class Result:
+    """Результат измерения одной реализации на одной нагрузке."""
+    engine: str
+    daily_users: int
+    accumulation_period: int
+    churn: float
+    days: int
+    events_per_second: float
+    read_latency_seconds: float
+    peak_memory_bytes: int
+    unique_users_amount: int
+
+
+def to_uuids(batch: np.ndarray) -> list[UUID]:
+    """Преобразует пакет идентификаторов в список UUID."""
+    return [UUID(int=high << 64 | low) for high, low in batch.tolist()]
+
+
+def ingest(counter: Any, days: list, batched: bool) -> None:
+    """Загружает в счетчик все дни нагрузки."""
+    add = counter.add_active_users_batch if batched else counter.add_active_users_for_curr_day
+    for day in days:
+        add(day)
+
+
+def measure(name: str, engine: Engine, workload: Workload, batches: list[np.ndarray]) -> Result:
+    """
+    Измеряет реализацию на нагрузке.
+
+    Загрузка выполняется дважды: без tracemalloc для измерения времени и
+    с tracemalloc для измерения пиковой памяти.
+
+    Args:
+        name: имя реализации.
+        engine: реализация.
+        workload: параметры нагрузки.
+        batches: сгенерированные пакеты нагрузки.
+
+    Returns:
+        Результат измерения.
+    """
+    days = batches if engine.batched else [to_uuids(batch) for batch in batches]
+
+    counter = engine.create(workload.accumulation_period)
+    start = time.perf_counter()
+    ingest(counter, days, engine.batched)
+    ingest_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(READS_AMOUNT):
+        unique_users_amount = counter.unique_users_amount
+    read_latency = (time.perf_counter() - start) / READS_AMOUNT
+
+    tracemalloc.start()
+    ingest(engine.create(workload.accumulation_period), days, engine.batched)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Result(
+        engine=name,
+        daily_users=workload.daily_users,
+        accumulation_period=workload.accumulation_period,
+        churn=workload.churn,
+        days=workload.days,
+        events_per_second=sum(map(len, batches)) / ingest_time,
+        read_latency_seconds=read_latency,
+        peak_memory_bytes=peak_memory,
+        unique_users_amount=unique_users_amount,
+    )
+
+
+def run(
+    engines: list[str],
+    daily_users: list[int],
+    periods: list[int],
+    churns: list[float],
+    days: int,
+) -> list[Result]:
+    """Измеряет все реализации на всех комбинациях параметров нагрузки."""
+    results = []
+    for users, period, churn in itertools.product(daily_users, periods, churns):
+        workload = Workload(users, period, churn, days)
+        batches = workload.generate()
+        for name in engines:
+            result = measure(name, ENGINES[name], workload, batches)
+            print(
+                f"{name:>14} users={users} period={period} churn={churn}: "
+                f"{result.events_per_second:,.0f} events/s, "
+                f"read {result.read_latency_seconds * 1e6:,.1f} us, "
+                f"peak {result.peak_memory_bytes / 2 ** 20:,.1f} MiB"
+            )
+            results.append(result)
+    return results
+
+
+def compare(results: list[Result], baseline: list[dict]) -> None:
+    """Печатает отношение результатов к результатам предыдущего запуска."""
+    key_fields = ("engine", "daily_users", "accumulation_period", "churn", "days")
+    previous = {tuple(record[field] for field in key_fields): record for record in baseline}
+    for result in results:
+        record = previous.get(tuple(getattr(result, field) for field in key_fields))
+        if record is None:
+            continue
+        print(
+            f"{result.engine:>14} users={result.daily_users} "
+            f"period={result.accumulation_period} churn={result.churn}: "
+            f"throughput x{result.events_per_second / record['events_per_second']:.2f}, "
+            f"read x{result.read_latency_seconds / record['read_latency_seconds']:.2f}, "
+            f"memory x{result.peak_memory_bytes / max(record['peak_memory_bytes'], 1):.2f}"
+        )
+
+
+def main(arguments: Optional[list[str]] = None) -> None:
+    """Разбирает аргументы командной строки и запускает бенчмарк."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), default=list(ENGINES))
+    parser.add_argument("--daily-users", nargs="+", type=int, default=[10_000, 100_000])
+    parser.add_argument("--periods", nargs="+", type=int, default=[1, 7, 30])
+    parser.add_argument("--churns", nargs="+", type=float, default=[0.1, 0.5])
+    parser.add_argument("--days", type=int, default=40)
+    parser.add_argument("--output", default="active_users_benchmark.json")
+    parser.add_argument("--baseline", help="JSON с результатами предыдущего запуска")
+    args = parser.parse_args(arguments)
+
+    results = run(args.engines, args.daily_users, args.periods, args.churns, args.days)
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "timestamp": time.time(),
+                "results": [asdict(result) for result in results],
+            },
+            file,
+            indent=2,
+        )
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            compare(results, json.load(file)["results"])
+
+
+if __name__ == "__main__":
+    main()
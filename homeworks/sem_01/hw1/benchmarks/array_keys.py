@@ -0,0 +1,96 @@
+"""
+Стоимость построения ключа кеша по массиву NumPy.
+
+Запуск из каталога homeworks/sem_01/hw1:
+
+    python -m benchmarks.array_keys --output results.json
+
+Для массивов разного размера измеряется время cache.array_fingerprint для
+C-непрерывного массива (хеширование через memoryview без копирования) и
+для транспонированного (с копированием в непрерывный буфер), а также время
+попадания в lru_cache(hash_arrays=True). Результаты печатаются в
+микросекундах на мегабайт входа.
+"""
+import argparse
+import json
+import platform
+import time
+import timeit
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+from cache import array_fingerprint, lru_cache
+
+
+MEGABYTE = 2 ** 20
+
+
+@dataclass
+class Result:
+    """Время построения ключа для массива одного размера."""
+    megabytes: float
+    contiguous_us_per_mb: float
+    transposed_us_per_mb: float
+    cache_hit_us_per_mb: float
+
+
+def seconds_per_call(call: Callable[[], object], budget: float = 0.2) -> float:
+    """Измеряет среднее время вызова, подбирая число повторов под бюджет в секундах."""
+    timer = timeit.Timer(call)
+    number, _ = timer.autorange()
+    repeats = max(1, int(budget / max(timer.timeit(number) / number, 1e-9) / number))
+    return min(timer.repeat(repeat=3, number=number * repeats)) / (number * repeats)
+
+
+def measure(megabytes: float) -> Result:
+    """Измеряет построение ключа для квадратного массива float64 объема megabytes."""
+    side = max(1, int((megabytes * MEGABYTE / 8) ** 0.5))
+    array = np.random.default_rng(0).standard_normal((side, side))
+    transposed = array.T
+    size = array.nbytes / MEGABYTE
+
+    cached = lru_cache(capacity=1, hash_arrays=True)(np.sum)
+    cached(array)
+    return Result(
+        megabytes=size,
+        contiguous_us_per_mb=seconds_per_call(lambda: array_fingerprint(array)) * 1e6 / size,
+        transposed_us_per_mb=seconds_per_call(lambda: array_fingerprint(transposed)) * 1e6 / size,
+        cache_hit_us_per_mb=seconds_per_call(lambda: cached(array)) * 1e6 / size,
+    )
+
+
+def main(arguments: Optional[list[str]] = None) -> None:
+    """Разбирает аргументы командной строки и запускает бенчмарк."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--megabytes", nargs="+", type=float, default=[0.001, 0.01, 0.1, 1, 10, 100]
+    )
+    parser.add_argument("--output", default="array_keys_benchmark.json")
+    args = parser.parse_args(arguments)
+
+    results = []
+    for megabytes in args.megabytes:
+        result = measure(megabytes)
+        print(
+            f"{result.megabytes:>10.4f} MB: contiguous {result.contiguous_us_per_mb:,.0f} us/MB, "
+            f"transposed {result.transposed_us_per_mb:,.0f} us/MB, "
+            f"cache hit {result.cache_hit_us_per_mb:,.0f} us/MB"
+        )
+        results.append(result)
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "timestamp": time.time(),
+                "results": [asdict(result) for result in results],
+            },
+            file,
+            indent=2,
+        )
+
+
+if __name__ == "__main__":
+    main()
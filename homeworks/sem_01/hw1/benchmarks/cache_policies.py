@@ -0,0 +1,169 @@
+"""
+Сравнение политик вытеснения кеша на воспроизведении синтетических трасс.
+
+Запуск из каталога homeworks/sem_01/hw1:
+
+    python -m benchmarks.cache_policies --output results.json
+
+Трассы - последовательности ключей: zipf - обращения с распределением Ципфа,
+scan - те же обращения, которые периодически прерываются полным проходом по
+множеству новых ключей. Каждая трасса воспроизводится на хранилище каждой
+политики из cache_stores.POLICIES: при промахе ключ добавляется в кеш. Для
+каждой пары измеряются доля попаданий и время обработки одного обращения.
+"""
+import argparse
+import itertools
+import json
+import platform
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+from cache_stores import MISSING, POLICIES
+
+
+def zipf_trace(length: int, universe: int, skew: float, seed: int = 0) -> list[int]:
+    """
+    Генерирует трассу обращений с распределением Ципфа.
+
+    Args:
+        length: длина трассы.
+        universe: число различных ключей.
+        skew: показатель распределения, больше нуля.
+        seed: зерно генератора случайных чисел.
+
+    Returns:
+        Список ключей из [0, universe).
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, universe + 1) ** skew
+    keys = rng.choice(universe, size=length, p=weights / weights.sum())
+    return rng.permutation(universe)[keys].tolist()
+
+
+def scan_trace(
+    length: int, universe: int, skew: float, scan_length: int, scan_every: int, seed: int = 0
+) -> list[int]:
+    """
+    Генерирует трассу Ципфа, прерываемую сканированиями.
+
+    Args:
+        length: длина трассы без сканирований.
+        universe: число различных ключей распределения Ципфа.
+        skew: показатель распределения, больше нуля.
+        scan_length: число ключей в одном сканировании. Ключи сканирований
+            не повторяются и не пересекаются с ключами распределения.
+        scan_every: число обращений между сканированиями.
+        seed: зерно генератора случайных чисел.
+
+    Returns:
+        Список ключей.
+    """
+    hot = zipf_trace(length, universe, skew, seed)
+    trace = []
+    next_scan_key = universe
+    for start in range(0, length, scan_every):
+        trace.extend(hot[start:start + scan_every])
+        trace.extend(range(next_scan_key, next_scan_key + scan_length))
+        next_scan_key += scan_length
+    return trace
+
+
+@dataclass
+class Result:
+    """Результат воспроизведения одной трассы на одной политике."""
+    policy: str
+    trace: str
+    capacity: int
+    requests: int
+    hit_ratio: float
+    seconds_per_request: float
+
+
+def replay(policy: str, capacity: int, trace: list[int]) -> tuple[int, float]:
+    """
+    Воспроизводит трассу на хранилище политики.
+
+    Args:
+        policy: имя политики из cache_stores.POLICIES.
+        capacity: емкость кеша.
+        trace: трасса ключей.
+
+    Returns:
+        Пару: число попаданий и время воспроизведения в секундах.
+    """
+    store = POLICIES[policy](capacity)
+    get, put = store.get, store.put
+    hits = 0
+    start = time.perf_counter()
+    for key in trace:
+        if get(key) is MISSING:
+            put(key, key)
+        else:
+            hits += 1
+    return hits, time.perf_counter() - start
+
+
+def run(
+    policies: list[str], capacities: list[int], traces: dict[str, Callable[[], list[int]]]
+) -> list[Result]:
+    """Воспроизводит все трассы на всех политиках и емкостях."""
+    results = []
+    for (trace_name, make_trace), capacity in itertools.product(traces.items(), capacities):
+        trace = make_trace()
+        for policy in policies:
+            hits, seconds = replay(policy, capacity, trace)
+            result = Result(
+                policy=policy,
+                trace=trace_name,
+                capacity=capacity,
+                requests=len(trace),
+                hit_ratio=hits / len(trace),
+                seconds_per_request=seconds / len(trace),
+            )
+            print(
+                f"{trace_name:>5} capacity={capacity:<6} {policy:>8}: "
+                f"hit ratio {result.hit_ratio:.3f}, "
+                f"{result.seconds_per_request * 1e6:.2f} us/request"
+            )
+            results.append(result)
+    return results
+
+
+def main(arguments: Optional[list[str]] = None) -> None:
+    """Разбирает аргументы командной строки и запускает бенчмарк."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--policies", nargs="+", choices=sorted(POLICIES), default=list(POLICIES))
+    parser.add_argument("--capacities", nargs="+", type=int, default=[100, 1000])
+    parser.add_argument("--length", type=int, default=200_000)
+    parser.add_argument("--universe", type=int, default=100_000)
+    parser.add_argument("--skew", type=float, default=0.9)
+    parser.add_argument("--scan-length", type=int, default=5_000)
+    parser.add_argument("--scan-every", type=int, default=20_000)
+    parser.add_argument("--output", default="cache_policies_benchmark.json")
+    args = parser.parse_args(arguments)
+
+    traces = {
+        "zipf": lambda: zipf_trace(args.length, args.universe, args.skew),
+        "scan": lambda: scan_trace(
+            args.length, args.universe, args.skew, args.scan_length, args.scan_every
+        ),
+    }
+    results = run(args.policies, args.capacities, traces)
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "timestamp": time.time(),
+                "results": [asdict(result) for result in results],
+            },
+            file,
+            indent=2,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Сравнение кеша в каждом процессе пула с общим кешем в разделяемой памяти.
+
+Запуск из каталога homeworks/sem_01/hw1:
+
+    python -m benchmarks.shared_cache --workers 8 --output results.json
+
+Пул из workers процессов обрабатывает поток ключей с распределением Ципфа,
+вызывая дорогую функцию (собственные значения случайной симметричной
+матрицы, результат - массив NumPy) через lru_cache. В режиме local у каждого
+процесса свой кеш, в режиме shared все процессы пользуются одним кешем
+SharedCache. Для каждого режима измеряются время обработки потока и число
+вычислений функции.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Optional
+from uuid import uuid4
+
+import numpy as np
+
+from benchmarks.cache_policies import zipf_trace
+from cache import lru_cache
+from shared_cache import SharedCache
+
+
+MATRIX_SIZE = 200
+
+_cached: Optional[Callable[[int], np.ndarray]] = None
+_computations = None
+
+
+def expensive(key: int) -> np.ndarray:
+    """Вычисляет собственные значения случайной симметричной матрицы по зерну key."""
+    with _computations.get_lock():
+        _computations.value += 1
+    matrix = np.random.default_rng(key).standard_normal((MATRIX_SIZE, MATRIX_SIZE))
+    return np.linalg.eigvalsh(matrix + matrix.T)
+
+
+def _init_worker(capacity: int, shared_name: Optional[str], computations) -> None:
+    global _cached, _computations
+    _computations = computations
+    if shared_name is None:
+        _cached = lru_cache(capacity)(expensive)
+    else:
+        _cached = lru_cache(capacity, shared_name=shared_name, shared_slot_bytes=8 * MATRIX_SIZE)(
+            expensive
+        )
+
+
+def _call(key: int) -> float:
+    return float(_cached(key)[-1])
+
+
+@dataclass
+class Result:
+    """Результат обработки потока в одном режиме."""
+    mode: str
+    workers: int
+    capacity: int
+    requests: int
+    computations: int
+    seconds: float
+
+
+def run_mode(mode: str, workers: int, capacity: int, trace: list[int]) -> Result:
+    """
+    Обрабатывает поток ключей пулом процессов.
+
+    Args:
+        mode: "local" - кеш в каждом процессе, "shared" - общий кеш.
+        workers: число процессов.
+        capacity: емкость кеша.
+        trace: поток ключей.
+
+    Returns:
+        Результат измерения.
+    """
+    context = multiprocessing.get_context("fork")
+    computations = context.Value("q", 0)
+    shared_name = f"hw1_bench_{uuid4().hex[:12]}" if mode == "shared" else None
+    shared = None
+    if shared_name is not None:
+        shared = SharedCache(shared_name, capacity, 8 * MATRIX_SIZE)
+    try:
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(capacity, shared_name, computations),
+        ) as executor:
+            start = time.perf_counter()
+            list(executor.map(_call, trace, chunksize=16))
+            seconds = time.perf_counter() - start
+    finally:
+        if shared is not None:
+            shared.close()
+            shared.unlink()
+    return Result(mode, workers, capacity, len(trace), computations.value, seconds)
+
+
+def main(arguments: Optional[list[str]] = None) -> None:
+    """Разбирает аргументы командной строки и запускает бенчмарк."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--capacity", type=int, default=256)
+    parser.add_argument("--requests", type=int, default=4_000)
+    parser.add_argument("--universe", type=int, default=1_000)
+    parser.add_argument("--skew", type=float, default=1.0)
+    parser.add_argument("--output", default="shared_cache_benchmark.json")
+    args = parser.parse_args(arguments)
+
+    trace = zipf_trace(args.requests, args.universe, args.skew)
+    results = []
+    for mode in ("local", "shared"):
+        result = run_mode(mode, args.workers, args.capacity, trace)
+        print(
+            f"{mode:>6}: {result.seconds:.2f} s, {result.computations} computations "
+            f"for {result.requests} requests"
+        )
+        results.append(result)
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "timestamp": time.time(),
+                "results": [asdict(result) for result in results],
+            },
+            file,
+            indent=2,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,562 @@
+import asyncio
+import hashlib
+import inspect
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass
+from functools import partial, wraps
 from typing import (
+    Any,
+    Awaitable,
     Callable,
+    ContextManager,
+    Hashable,
+    Optional,
     TypeVar,
 )
 
+import numpy as np
+
+from cache_stores import MISSING, POLICIES, BudgetedLruStore, LruStore, estimate_size
+from disk_cache import DiskCache
+from shared_cache import SharedCache, SharedStore
+from snapshot import PathType
+
 T = TypeVar("T")
 
+_KWARGS_MARK = object()
+_FAST_TYPES = frozenset({int, float, bool, str, bytes, type(None)})
+
+
+def _make_key(args: tuple, kwargs: dict[str, Any], typed: bool) -> Hashable:
+    """
+    Строит ключ кеша по аргументам вызова.
+
+    Ключ состоит из самих значений аргументов, поэтому разные вызовы с
+    совпавшими хешами не путаются. Именованные аргументы отделяются от
+    позиционных уникальным маркером и не сортируются.
+
+    Args:
+        args: позиционные аргументы.
+        kwargs: именованные аргументы.
+        typed: различать ли аргументы разных типов, например 1 и 1.0.
+
+    Returns:
+        Единственный позиционный аргумент встроенного скалярного типа как есть
+        (его хеш дешев или кешируется самим объектом), иначе кортеж.
+
+    Raises:
+        TypeError, если среди аргументов есть нехешируемые объекты.
+    """
+    key = args
+    if kwargs:
+        key += (_KWARGS_MARK, *kwargs.items())
+    if typed:
+        key += tuple(type(value) for value in args)
+        if kwargs:
+            key += tuple(type(value) for value in kwargs.values())
+    elif len(key) == 1 and type(key[0]) in _FAST_TYPES:
+        return key[0]
+    return key
+
+
+def array_fingerprint(array: np.ndarray) -> tuple:
+    """
+    Строит хешируемый отпечаток массива NumPy по его содержимому.
+
+    Байты C-непрерывного массива хешируются blake2b через представление
+    uint8 без копирования; остальные массивы сначала копируются в
+    непрерывный буфер. Представление uint8 годится для любого dtype без
+    объектов, включая datetime64 и структурные, и для пустых массивов.
+
+    Args:
+        array: массив без объектов.
+
+    Returns:
+        Кортеж из dtype (сам объект np.dtype: у структурных dtype с разными
+        полями одинаковая строка dtype.str), формы и 16-байтового дайджеста
+        содержимого.
+
+    Raises:
+        TypeError, если массив содержит объекты Python.
+    """
+    if array.dtype.hasobject:
+        raise TypeError("arrays of Python objects cannot be hashed by content")
+    data = np.ascontiguousarray(array).reshape(-1).view(np.uint8)
+    digest = hashlib.blake2b(data, digest_size=16)
+    return (np.ndarray, array.dtype, array.shape, digest.digest())
+
+
+def _make_array_key(args: tuple, kwargs: dict[str, Any], typed: bool) -> Hashable:
+    """Строит ключ как _make_key, заменяя массивы NumPy их отпечатками."""
+    args = tuple(
+        array_fingerprint(value) if isinstance(value, np.ndarray) else value for value in args
+    )
+    if kwargs:
+        kwargs = {
+            name: array_fingerprint(value) if isinstance(value, np.ndarray) else value
+            for name, value in kwargs.items()
+        }
+    return _make_key(args, kwargs, typed)
+
+
+def _read_only(value: Any) -> Any:
+    """
+    Возвращает для массива NumPy представление его закрытой копии только для чтения.
+
+    Копия отвязывает кеш от буфера, которым владеет вызывающий код, а
+    поскольку сама копия тоже только для чтения, флаг writeable у
+    представления нельзя снова включить.
+    """
+    if isinstance(value, np.ndarray):
+        frozen = value.copy()
+        frozen.flags.writeable = False
+        value = frozen.view()
+    return value
+
+
+async def _read_only_result(coroutine: Awaitable) -> Any:
+    """Дожидается корутины и возвращает ее результат через _read_only."""
+    return _read_only(await coroutine)
+
+
+@dataclass
+class CacheInfo:
+    """
+    Статистика кеша функции.
+
+    Attrs:
+        hits: число вызовов, результат которых найден в кеше. Этот и два
+            следующих счетчика ведутся, только если кеш создан с stats=True,
+            иначе они равны None.
+        misses: число вызовов, для которых функция была вычислена.
+        evictions: число вытесненных записей.
+        size: текущее число записей (для методов - суммарно по экземплярам).
+        capacity: максимальное число записей (для методов - на экземпляр).
+        miss_seconds: суммарное время вычислений при промахах. Измеряется,
+            только если задан on_miss, иначе 0.
+        disk_hits: число промахов в памяти, значение для которых найдено на
+            диске. Ведется, только если кеш создан с stats=True, иначе None.
+    """
+    hits: Optional[int]
+    misses: Optional[int]
+    evictions: Optional[int]
+    size: int
+    capacity: int
+    miss_seconds: float
+    disk_hits: Optional[int]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Возвращает статистику в виде словаря."""
+        return asdict(self)
+
+
+class _SingleFlight:
+    """
+    Дедупликация одновременных промахов по одному ключу.
+
+    Первый промахнувшийся поток (ведущий) вычисляет значение, остальные ждут
+    его результат на Future. Таблица текущих вычислений разбита на полосы,
+    каждая со своей блокировкой, поэтому промахи по разным ключам почти не
+    мешают друг другу, а сами вычисления выполняются без блокировок.
+    """
+
+    _locks: list[threading.Lock]
+    _calls: list[dict[Hashable, Future]]
+
+    def __init__(self, stripes_amount: int = 64) -> None:
+        self._locks = [threading.Lock() for _ in range(stripes_amount)]
+        self._calls = [{} for _ in range(stripes_amount)]
+
+    def run(self, store: LruStore, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Возвращает значение по ключу из кеша или вычисляет его один раз на все потоки.
+
+        Args:
+            store: хранилище кеша, в которое compute кладет результат.
+            key: ключ.
+            compute: вычисление значения, сохраняющее его в кеш.
+
+        Returns:
+            Значение по ключу.
 
-def lru_cache(capacity: int) -> Callable[[T], T]:
+        Raises:
+            Исключение compute - и ведущему, и ожидающим потокам.
+        """
+        stripe = hash(key) % len(self._locks)
+        lock, calls = self._locks[stripe], self._calls[stripe]
+        with lock:
+            result = store.get(key)
+            if result is not MISSING:
+                return result
+            future = calls.get(key)
+            leader = future is None
+            if leader:
+                future = calls[key] = Future()
+        if not leader:
+            return future.result()
+
+        try:
+            result = compute()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with lock:
+                del calls[key]
+        return result
+
+
+class _CacheState:
+    """Общие для обертки параметры и счетчики кеша."""
+
+    __slots__ = (
+        "capacity", "typed", "stats", "on_miss", "coroutine", "policy", "ttl", "max_bytes",
+        "sizeof", "disk", "shared", "hash_arrays", "flights", "lock",
+        "hits", "misses", "evictions", "miss_seconds", "disk_hits",
+    )
+
+    capacity: int
+    typed: bool
+    stats: bool
+    on_miss: Optional[Callable[[float], None]]
+    coroutine: bool
+    policy: str
+    ttl: Optional[float]
+    max_bytes: Optional[int]
+    sizeof: Callable[[Any], int]
+    disk: Optional[DiskCache]
+    shared: Optional[SharedStore]
+    hash_arrays: bool
+    flights: Optional[_SingleFlight]
+    lock: ContextManager
+    hits: int
+    misses: int
+    evictions: int
+    miss_seconds: float
+    disk_hits: int
+
+    def __init__(
+        self,
+        capacity: int,
+        typed: bool,
+        stats: bool,
+        on_miss: Optional[Callable[[float], None]],
+        thread_safe: bool,
+        coroutine: bool,
+        policy: str,
+        ttl: Optional[float],
+        max_bytes: Optional[int],
+        sizeof: Callable[[Any], int],
+        disk: Optional[DiskCache],
+        shared: Optional[SharedStore],
+        hash_arrays: bool,
+    ) -> None:
+        self.capacity = capacity
+        self.typed = typed
+        self.stats = stats
+        self.on_miss = on_miss
+        self.coroutine = coroutine
+        self.policy = policy
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.disk = disk
+        self.shared = shared
+        self.hash_arrays = hash_arrays
+        self.flights = _SingleFlight() if thread_safe else None
+        self.lock = threading.Lock() if thread_safe else nullcontext()
+        self.clear()
+
+    def clear(self) -> None:
+        """Обнуляет счетчики."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.miss_seconds = 0.0
+        self.disk_hits = 0
+
+    @property
+    def plain(self) -> bool:
+        """Используется ли простое LRU-хранилище без ограничений времени и объема."""
+        return (
+            self.policy == "lru"
+            and self.ttl is None
+            and self.max_bytes is None
+            and self.shared is None
+        )
+
+    def new_store(self) -> LruStore:
+        """Создает хранилище для одного кеша."""
+        if self.shared is not None:
+            return self.shared
+        if self.ttl is None and self.max_bytes is None:
+            return POLICIES[self.policy](self.capacity, self.lock)
+        return BudgetedLruStore(
+            self.capacity, self.lock, self.ttl, self.max_bytes, self.sizeof
+        )
+
+    def compute(self, store: LruStore, key: Hashable, func: Callable, args, kwargs) -> Any:
+        """
+        Обрабатывает промах: вычисляет функцию и кладет результат в кеш,
+        вытесняя самую давно использованную запись. В потокобезопасном режиме
+        одновременные промахи по одному ключу вычисляются один раз.
+
+        Для корутинной функции в кеш сразу кладется задача asyncio, которую
+        ждут все обратившиеся к ключу до ее завершения. Неуспешная задача
+        удаляется из кеша по завершении.
+
+        Если есть дисковый уровень, значение сначала ищется в нем, а
+        вычисленное значение откладывается для записи в него.
+        """
+        if self.flights is None:
+            return self._compute(store, key, func, args, kwargs)
+        return self.flights.run(store, key, lambda: self._compute(store, key, func, args, kwargs))
+
+    def _compute(self, store: LruStore, key: Hashable, func: Callable, args, kwargs) -> Any:
+        digest = None if self.disk is None else self.disk.digest(key)
+        if digest is not None:
+            result = self.disk.get(digest)
+            if result is not MISSING:
+                return self._remember(store, key, result, disk_hit=True)
+
+        start = None if self.on_miss is None else time.perf_counter()
+        result = func(*args, **kwargs)
+        if self.coroutine:
+            if self.hash_arrays:
+                result = _read_only_result(result)
+            result = asyncio.ensure_future(result)
+            result.add_done_callback(partial(self._settle, store, key, start))
+        elif start is not None:
+            self._record_latency(start)
+        if digest is not None:
+            self.disk.put(digest, result)
+
+        return self._remember(store, key, result, disk_hit=False)
+
+    def _remember(self, store: LruStore, key: Hashable, result: Any, disk_hit: bool) -> Any:
+        if self.hash_arrays:
+            result = _read_only(result)
+        evicted = store.put(key, result)
+        if self.stats:
+            with self.lock:
+                self.disk_hits += disk_hit
+                self.misses += not disk_hit
+                self.evictions += evicted
+        return result
+
+    def _settle(
+        self, store: LruStore, key: Hashable, start: Optional[float], task: asyncio.Future
+    ) -> None:
+        if task.cancelled() or task.exception() is not None:
+            store.discard(key, task)
+            return
+        evicted = store.resize(key, task)
+        if self.stats:
+            with self.lock:
+                self.evictions += evicted
+        if start is not None:
+            self._record_latency(start)
+
+    def _record_latency(self, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        self.miss_seconds += elapsed
+        self.on_miss(elapsed)
+
+    def info(self, size: int) -> CacheInfo:
+        """Собирает статистику при текущем размере кеша size."""
+        if not self.stats:
+            return CacheInfo(None, None, None, size, self.capacity, self.miss_seconds, None)
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.evictions,
+            size,
+            self.capacity,
+            self.miss_seconds,
+            self.disk_hits,
+        )
+
+
+def _cached_function(func: Callable, state: _CacheState) -> Callable:
+    """Оборачивает функцию собственным кешем."""
+    store = state.new_store()
+    typed = state.typed
+    make_key = _make_array_key if state.hash_arrays else _make_key
+    stats = state.stats
+    plain = state.plain
+    data = store.data if plain else None
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = make_key(args, kwargs, typed)
+        if plain:  # LruStore.get, встроенный ради скорости попаданий
+            result = data.get(key, MISSING)
+            if result is not MISSING:
+                try:
+                    data.move_to_end(key)
+                except KeyError:
+                    pass  # запись вытеснена другим потоком после чтения
+        else:
+            result = store.get(key)
+        if result is not MISSING:
+            if stats:
+                state.hits += 1
+            return result
+        return state.compute(store, key, func, args, kwargs)
+
+    def cache_clear() -> None:
+        store.clear()
+        state.clear()
+        if state.disk is not None:
+            state.disk.clear()
+
+    wrapper.cache_info = lambda: state.info(len(store))
+    wrapper.cache_clear = cache_clear
+    wrapper.disk_cache = state.disk
+    wrapper.shared_cache = None if state.shared is None else state.shared.cache
+    return wrapper
+
+
+def _cached_method(func: Callable, state: _CacheState) -> Callable:
+    """
+    Оборачивает метод отдельным кешем для каждого экземпляра.
+
+    Экземпляры хранятся по слабым ссылкам: кеш экземпляра удаляется вместе
+    с ним и не продлевает ему жизнь. Экземпляры различаются по id, а не по
+    равенству, поэтому равные, но разные объекты не делят кеш.
+    """
+    stores: dict[int, tuple[weakref.ref, LruStore]] = {}
+    typed = state.typed
+    make_key = _make_array_key if state.hash_arrays else _make_key
+    stats = state.stats
+
+    def forget(instance_id: int) -> Callable[[weakref.ref], None]:
+        return lambda _: stores.pop(instance_id, None)
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        entry = stores.get(id(self))
+        if entry is None:
+            entry = (weakref.ref(self, forget(id(self))), state.new_store())
+            entry = stores.setdefault(id(self), entry)
+        store = entry[1]
+
+        key = make_key(args, kwargs, typed)
+        result = store.get(key)
+        if result is not MISSING:
+            if stats:
+                state.hits += 1
+            return result
+        return state.compute(store, key, func, (self, *args), kwargs)
+
+    def cache_clear() -> None:
+        for _, store in list(stores.values()):
+            store.clear()
+        state.clear()
+
+    wrapper.cache_info = lambda: state.info(sum(len(store) for _, store in list(stores.values())))
+    wrapper.cache_clear = cache_clear
+    return wrapper
+
+
+def _awaiting(wrapper: Callable) -> Callable:
+    """
+    Делает из обертки, возвращающей задачи asyncio, корутинную функцию.
+
+    Ожидание задачи защищено от отмены: отмена одного из ожидающих не
+    отменяет вычисление для остальных.
+    """
+    @wraps(wrapper)
+    async def awaiting(*args, **kwargs):
+        return await asyncio.shield(wrapper(*args, **kwargs))
+    return awaiting
+
+
+def lru_cache(
+    capacity: int,
+    typed: bool = False,
+    method: bool = False,
+    stats: bool = False,
+    on_miss: Optional[Callable[[float], None]] = None,
+    thread_safe: bool = False,
+    ttl: Optional[float] = None,
+    max_bytes: Optional[int] = None,
+    sizeof: Callable[[Any], int] = estimate_size,
+    policy: str = "lru",
+    disk_path: Optional[PathType] = None,
+    disk_max_bytes: int = 2 ** 30,
+    shared_name: Optional[str] = None,
+    shared_slot_bytes: int = 2 ** 20,
+    hash_arrays: bool = False,
+) -> Callable[[T], T]:
     """
     Параметризованный декоратор для реализации LRU-кеширования.
 
+    Каждая функция, обернутая декоратором, получает собственный кеш емкости
+    capacity, даже если один и тот же декоратор применен к нескольким функциям.
+    Обертка корутинной функции тоже корутинная: в кеше хранится задача
+    asyncio, поэтому одновременные вызовы с одним ключом ждут одно вычисление,
+    а завершившиеся исключением задачи из кеша удаляются. Емкость и порядок
+    вытеснения те же.
+    У обертки есть методы cache_info(), возвращающий CacheInfo, и cache_clear(),
+    очищающий кеш и статистику.
+
     Args:
         capacity: целое число, максимальный возможный размер кеша.
+        typed: если True, аргументы разных типов кешируются отдельно,
+            например f(1) и f(1.0).
+        method: если True, декоратор применяется к методу, и у каждого
+            экземпляра свой кеш емкости capacity. Экземпляры хранятся по
+            слабым ссылкам и должны их поддерживать.
+        stats: вести ли счетчики попаданий, промахов и вытеснений. Без них
+            попадание в кеш обходится дешевле, а cache_info() возвращает
+            вместо счетчиков None.
+        on_miss: функция, которой после каждого промаха передается время
+            вычисления в секундах. Без нее время не измеряется.
+        thread_safe: если True, кешем можно пользоваться из нескольких потоков.
+            Попадания не берут блокировок, а одновременные промахи по одному
+            ключу вычисляют функцию один раз: остальные вызовы ждут результат
+            первого и получают его исключение, если оно возникло. Счетчик
+            попаданий при этом приблизителен.
+        ttl: время жизни записи в секундах. Истекшие записи не возвращаются
+            и удаляются при чтении и при каждом добавлении записи.
+        max_bytes: максимальный суммарный объем значений в байтах. При его
+            превышении вытесняются самые давно использованные записи, а
+            значения больше бюджета не кешируются.
+        sizeof: оценка объема значения в байтах для max_bytes. По умолчанию
+            nbytes для массивов NumPy и sys.getsizeof для остальных значений.
+        policy: политика вытеснения: "lru", "slru" (сегментированный LRU) или
+            "tinylfu" (W-TinyLFU). Две последние устойчивы к сканированию
+            и сочетаются только с ограничением capacity.
+        disk_path: путь к файлу SQLite второго уровня кеша (DiskCache). Промахи
+            в памяти сначала ищутся в нем, а вычисленные значения
+            записываются в него пакетами, поэтому кеш переживает перезапуск
+            процесса. Ключи и значения должны сериализоваться pickle, иначе
+            они на диск не попадают. Обертка получает атрибут disk_cache.
+            Не поддерживается для методов и корутинных функций.
+        disk_max_bytes: максимальный объем сериализованных значений функции
+            в файле disk_path.
+        shared_name: имя сегмента разделяемой памяти (SharedCache). Если
+            задано, кеш из capacity записей общий для всех процессов машины,
+            подключенных к сегменту, например для процессов пула. Значения
+            копируются в сегмент и из него, массивы NumPy - без pickle.
+            Ключи и остальные значения должны сериализоваться pickle.
+            Поддерживается только для функций с политикой "lru" без ttl,
+            max_bytes и disk_path. Обертка получает атрибут shared_cache.
+        shared_slot_bytes: размер ячейки сегмента; значения больше не
+            кешируются.
+        hash_arrays: если True, аргументы - массивы NumPy входят в ключ своим
+            отпечатком array_fingerprint (dtype, форма и blake2b содержимого),
+            а массивы-результаты копируются и хранятся и возвращаются только
+            для чтения (для корутинной функции - результат задачи), чтобы
+            вызывающий код не мог испортить кеш ни через возвращенный
+            массив, ни через исходный.
 
     Returns:
         Декоратор для непосредственного использования.
@@ -19,29 +564,39 @@ def lru_cache(capacity: int) -> Callable[[T], T]:
     Raises:
         TypeError, если capacity не может быть округлено и использовано
             для получения целого числа.
-        ValueError, если после округления capacity - число, меньшее 1.
+        ValueError, если после округления capacity - число, меньшее 1,
+            ttl либо max_bytes не положительны, policy неизвестна или задана
+            вместе с ttl или max_bytes, или disk_path либо shared_name заданы
+            для неподдерживаемых вариантов.
     """
     capacity = round(capacity)
     if capacity < 1:
         raise ValueError("Bad capacity < 1")
-
-    lru_cache = {}
+    if ttl is not None and ttl <= 0:
+        raise ValueError(f"bad ttl: {ttl}")
+    if max_bytes is not None and max_bytes <= 0:
+        raise ValueError(f"bad max_bytes: {max_bytes}")
+    if policy not in POLICIES:
+        raise ValueError(f"unknown policy: {policy}")
+    bounded = ttl is not None or max_bytes is not None
+    if policy != "lru" and bounded:
+        raise ValueError(f"policy {policy} does not support ttl and max_bytes")
+    if shared_name is not None and (policy != "lru" or bounded or disk_path is not None):
+        raise ValueError("shared_name does not support policy, ttl, max_bytes and disk_path")
 
     def decorator(func):
-        def wrapper(*args, **kwargs):
-            hash_key = hash(args) + hash(tuple(sorted(kwargs.items())))
-            if hash_key in lru_cache:
-                result = lru_cache.pop(hash_key)
-                lru_cache[hash_key] = result
-            else:
-                result = func(*args, **kwargs)
-
-                lru_cache[hash_key] = result
-
-                if len(lru_cache) > capacity:
-                    first_key = next(iter(lru_cache))
-                    del (lru_cache[first_key])
-
-            return result
-        return wrapper
+        coroutine = inspect.iscoroutinefunction(func)
+        if (disk_path is not None or shared_name is not None) and (method or coroutine):
+            raise ValueError("disk_path and shared_name do not support methods and coroutines")
+        namespace = f"{func.__module__}.{func.__qualname__}"
+        disk = None if disk_path is None else DiskCache(disk_path, namespace, disk_max_bytes)
+        shared = None
+        if shared_name is not None:
+            shared = SharedStore(SharedCache(shared_name, capacity, shared_slot_bytes), namespace)
+        state = _CacheState(
+            capacity, typed, stats, on_miss, thread_safe, coroutine, policy, ttl, max_bytes,
+            sizeof, disk, shared, hash_arrays,
+        )
+        wrapper = _cached_method(func, state) if method else _cached_function(func, state)
+        return _awaiting(wrapper) if coroutine else wrapper
     return decorator
@@ -0,0 +1,498 @@
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import (
+    Any,
+    Callable,
+    ContextManager,
+    Hashable,
+    Optional,
+)
+
+MISSING = object()
+_MASK64 = (1 << 64) - 1
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Оценивает объем памяти, занимаемый значением.
+
+    Args:
+        value: значение.
+
+    Returns:
+        Атрибут nbytes, если он есть и целый (массивы NumPy), иначе
+        sys.getsizeof(value).
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    return sys.getsizeof(value)
+
+
+class LruStore:
+    """
+    Хранилище записей кеша с вытеснением давно использованных (LRU).
+
+    Записи хранятся в OrderedDict в порядке от самой давно использованной
+    к самой недавней. Чтение не берет блокировок, изменения выполняются
+    под блокировкой lock.
+    """
+
+    __slots__ = ("data", "capacity", "lock")
+
+    data: OrderedDict
+    capacity: int
+    lock: ContextManager
+
+    def __init__(self, capacity: int, lock: Optional[ContextManager] = None) -> None:
+        """
+        Инициализирует хранилище.
+
+        Args:
+            capacity: максимальное число записей.
+            lock: блокировка изменений. По умолчанию изменения не блокируются.
+        """
+        self.data = OrderedDict()
+        self.capacity = capacity
+        self.lock = nullcontext() if lock is None else lock
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Возвращает значение по ключу и отмечает его использование.
+
+        Args:
+            key: ключ.
+
+        Returns:
+            Значение или MISSING, если записи нет.
+        """
+        value = self.data.get(key, MISSING)
+        if value is not MISSING:
+            try:
+                self.data.move_to_end(key)
+            except KeyError:
+                pass  # запись вытеснена другим потоком после чтения
+        return value
+
+    def put(self, key: Hashable, value: Any) -> int:
+        """
+        Добавляет запись и вытесняет лишние.
+
+        Args:
+            key: ключ.
+            value: значение.
+
+        Returns:
+            Число вытесненных записей.
+        """
+        with self.lock:
+            self.data[key] = value
+            if len(self.data) > self.capacity:
+                self.data.popitem(last=False)
+                return 1
+            return 0
+
+    def discard(self, key: Hashable, value: Any) -> None:
+        """Удаляет запись, если по ключу все еще хранится value."""
+        with self.lock:
+            if self.data.get(key, MISSING) is value:
+                del self.data[key]
+
+    def resize(self, key: Hashable, value: Any) -> int:
+        """
+        Пересчитывает объем записи после завершения задачи asyncio value.
+
+        Returns:
+            Число вытесненных записей.
+        """
+        return 0
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        with self.lock:
+            self.data.clear()
+
+
+class BudgetedLruStore(LruStore):
+    """
+    LRU-хранилище с ограничением времени жизни и объема записей.
+
+    Время жизни проверяется при чтении записи, а при каждом чтении и каждой
+    записи удаляются все истекшие записи, поэтому кеш, из которого только
+    читают, тоже освобождает память и бюджет. Так как время жизни одинаково
+    для всех записей, сроки истечения упорядочены по времени записи: чтение
+    сравнивает с текущим временем только самый ранний срок и берет
+    блокировку, лишь если есть что удалять, так что удаление истекших стоит
+    O(1) амортизированно. Объем записей оценивается функцией sizeof;
+    при превышении бюджета вытесняются самые давно использованные записи.
+    """
+
+    __slots__ = ("ttl", "max_bytes", "sizeof", "clock", "total_bytes", "_deadlines", "_sizes")
+
+    ttl: Optional[float]
+    max_bytes: Optional[int]
+    sizeof: Callable[[Any], int]
+    clock: Callable[[], float]
+    total_bytes: int
+    _deadlines: OrderedDict
+    _sizes: dict[Hashable, int]
+
+    def __init__(
+        self,
+        capacity: int,
+        lock: Optional[ContextManager] = None,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = estimate_size,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Инициализирует хранилище.
+
+        Args:
+            capacity: максимальное число записей.
+            lock: блокировка изменений. По умолчанию изменения не блокируются.
+            ttl: время жизни записи в секундах. По умолчанию не ограничено.
+            max_bytes: максимальный суммарный объем записей в байтах.
+                По умолчанию не ограничен.
+            sizeof: оценка объема значения в байтах.
+            clock: монотонные часы в секундах.
+        """
+        super().__init__(capacity, lock)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.clock = clock
+        self.total_bytes = 0
+        self._deadlines = OrderedDict()
+        self._sizes = {}
+
+    def get(self, key: Hashable) -> Any:
+        if self.ttl is not None:
+            now = self.clock()
+            self._sweep(now)
+        value = self.data.get(key, MISSING)
+        if value is MISSING:
+            return MISSING
+        if self.ttl is not None:
+            deadline = self._deadlines.get(key)
+            if deadline is None or deadline <= now:
+                self.discard(key, value)
+                return MISSING
+        try:
+            self.data.move_to_end(key)
+        except KeyError:
+            pass  # запись вытеснена другим потоком после чтения
+        return value
+
+    def put(self, key: Hashable, value: Any) -> int:
+        with self.lock:
+            self._remove(key)
+            if self.ttl is not None:
+                self._expire(self.clock())
+            size = self._measure(value)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return 0
+
+            self.data[key] = value
+            self._sizes[key] = size
+            self.total_bytes += size
+            if self.ttl is not None:
+                self._deadlines[key] = self.clock() + self.ttl
+            return self._evict()
+
+    def discard(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            if self.data.get(key, MISSING) is value:
+                self._remove(key)
+
+    def resize(self, key: Hashable, value: Any) -> int:
+        with self.lock:
+            if self.data.get(key, MISSING) is not value:
+                return 0
+            size = self._measure(value)
+            self.total_bytes += size - self._sizes[key]
+            self._sizes[key] = size
+            if self.max_bytes is not None and size > self.max_bytes:
+                self._remove(key)
+            return self._evict()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
+            self._deadlines.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+
+    def _measure(self, value: Any) -> int:
+        if isinstance(value, asyncio.Future):
+            if not value.done() or value.cancelled() or value.exception() is not None:
+                return 0
+            value = value.result()
+        return self.sizeof(value)
+
+    def _remove(self, key: Hashable) -> None:
+        if self.data.pop(key, MISSING) is not MISSING:
+            self.total_bytes -= self._sizes.pop(key)
+            self._deadlines.pop(key, None)
+
+    def _sweep(self, now: float) -> None:
+        """Удаляет истекшие записи, если истек самый ранний срок."""
+        try:
+            oldest = next(iter(self._deadlines.values()))
+        except (StopIteration, RuntimeError):
+            return  # записей нет, или другой поток меняет их прямо сейчас
+        if oldest <= now:
+            with self.lock:
+                self._expire(now)
+
+    def _expire(self, now: float) -> None:
+        while self._deadlines:
+            key, deadline = next(iter(self._deadlines.items()))
+            if deadline > now:
+                return
+            self._remove(key)
+
+    def _evict(self) -> int:
+        evicted = 0
+        while len(self.data) > self.capacity or (
+            self.max_bytes is not None and self.total_bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self.data)))
+            evicted += 1
+        return evicted
+
+
+class SlruStore(LruStore):
+    """
+    Хранилище с сегментированным вытеснением (SLRU).
+
+    Новые записи попадают в испытательный сегмент, а при повторном обращении
+    переходят в защищенный, вытесняя из него давно использованную запись
+    обратно в испытательный. Вытесняются записи испытательного сегмента,
+    поэтому однократное чтение множества ключей (сканирование) не вымывает
+    часто используемые записи.
+    """
+
+    __slots__ = ("protected", "protected_capacity")
+
+    protected: OrderedDict
+    protected_capacity: int
+
+    def __init__(
+        self,
+        capacity: int,
+        lock: Optional[ContextManager] = None,
+        protected_ratio: float = 0.8,
+    ) -> None:
+        """
+        Инициализирует хранилище.
+
+        Args:
+            capacity: максимальное число записей.
+            lock: блокировка. По умолчанию операции не блокируются.
+            protected_ratio: доля емкости защищенного сегмента.
+        """
+        super().__init__(capacity, lock)
+        self.protected = OrderedDict()
+        self.protected_capacity = int(capacity * protected_ratio)
+
+    def __len__(self) -> int:
+        return len(self.data) + len(self.protected)
+
+    def get(self, key: Hashable) -> Any:
+        with self.lock:
+            value = self.protected.get(key, MISSING)
+            if value is not MISSING:
+                self.protected.move_to_end(key)
+                return value
+            value = self.data.pop(key, MISSING)
+            if value is not MISSING:
+                self.protected[key] = value
+                if len(self.protected) > self.protected_capacity:
+                    demoted, demoted_value = self.protected.popitem(last=False)
+                    self.data[demoted] = demoted_value
+            return value
+
+    def put(self, key: Hashable, value: Any) -> int:
+        with self.lock:
+            if key in self.protected:
+                self.protected[key] = value
+                return 0
+            self.data[key] = value
+            if len(self) > self.capacity:
+                self.pop_victim()
+                return 1
+            return 0
+
+    def victim(self) -> Hashable:
+        """Возвращает ключ записи, которая будет вытеснена следующей."""
+        return next(iter(self.data or self.protected))
+
+    def pop_victim(self) -> None:
+        """Вытесняет запись victim()."""
+        (self.data or self.protected).popitem(last=False)
+
+    def discard(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            for segment in (self.data, self.protected):
+                if segment.get(key, MISSING) is value:
+                    del segment[key]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
+            self.protected.clear()
+
+
+class CountMinSketch:
+    """
+    Приближенный счетчик частот ключей с периодическим старением.
+
+    Частота хранится в depth строках 4-битных по смыслу счетчиков (не больше
+    15) ширины не меньше 4 * capacity: ключ увеличивает по счетчику в каждой
+    строке, а оценка - минимум по строкам. После sample_size увеличений все
+    счетчики делятся пополам, чтобы старая популярность забывалась. Строки -
+    bytearray, и деление выполняется одним вызовом bytes.translate.
+    """
+
+    MAX_COUNT = 15
+    _SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+    _HALVE = bytes(count >> 1 for count in range(256))
+
+    _rows: list[bytearray]
+    _shift: int
+    _additions: int
+    sample_size: int
+
+    def __init__(self, capacity: int, depth: int = 4) -> None:
+        """
+        Инициализирует счетчик.
+
+        Args:
+            capacity: число ключей, частоты которых важно различать, например
+                емкость кеша.
+            depth: число строк, не больше 4.
+        """
+        width = 1 << max(4, (4 * capacity - 1).bit_length())
+        self._rows = [bytearray(width) for _ in range(depth)]
+        self._shift = 64 - width.bit_length() + 1
+        self._additions = 0
+        self.sample_size = 10 * capacity
+
+    def add(self, key: Hashable) -> None:
+        """Учитывает обращение к ключу."""
+        h = hash(key) & _MASK64
+        shift = self._shift
+        for row, seed in zip(self._rows, self._SEEDS):
+            index = (h * seed & _MASK64) >> shift
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._additions //= 2
+            for row in self._rows:
+                row[:] = row.translate(self._HALVE)
+
+    def estimate(self, key: Hashable) -> int:
+        """Оценивает частоту обращений к ключу сверху."""
+        h = hash(key) & _MASK64
+        shift = self._shift
+        count = self.MAX_COUNT
+        for row, seed in zip(self._rows, self._SEEDS):
+            count = min(count, row[(h * seed & _MASK64) >> shift])
+        return count
+
+
+class TinyLfuStore(LruStore):
+    """
+    Хранилище с вытеснением W-TinyLFU.
+
+    Новые записи попадают в небольшое LRU-окно (data). Вытесненный из окна
+    кандидат допускается в основной SLRU-сегмент, только если по оценке
+    CountMinSketch к нему обращались чаще, чем к записи, которую пришлось бы
+    вытеснить из основного сегмента. Частоты учитываются при каждом чтении,
+    в том числе неудачном. Так редкие ключи сканирования не вытесняют
+    популярные, а окно позволяет новым популярным ключам набрать частоту.
+    """
+
+    __slots__ = ("main", "window_capacity", "sketch")
+
+    main: SlruStore
+    window_capacity: int
+    sketch: CountMinSketch
+
+    def __init__(
+        self,
+        capacity: int,
+        lock: Optional[ContextManager] = None,
+        window_ratio: float = 0.01,
+    ) -> None:
+        """
+        Инициализирует хранилище.
+
+        Args:
+            capacity: максимальное число записей.
+            lock: блокировка. По умолчанию операции не блокируются.
+            window_ratio: доля емкости LRU-окна.
+        """
+        super().__init__(capacity, lock)
+        self.window_capacity = max(1, round(capacity * window_ratio))
+        self.main = SlruStore(capacity - self.window_capacity)
+        self.sketch = CountMinSketch(capacity)
+
+    def __len__(self) -> int:
+        return len(self.data) + len(self.main)
+
+    def get(self, key: Hashable) -> Any:
+        with self.lock:
+            self.sketch.add(key)
+            value = self.data.get(key, MISSING)
+            if value is not MISSING:
+                self.data.move_to_end(key)
+                return value
+            return self.main.get(key)
+
+    def put(self, key: Hashable, value: Any) -> int:
+        with self.lock:
+            if key in self.main.data or key in self.main.protected:
+                self.main.put(key, value)
+                return 0
+            self.data[key] = value
+            if len(self.data) <= self.window_capacity:
+                return 0
+
+            candidate, candidate_value = self.data.popitem(last=False)
+            if len(self.main) < self.main.capacity:
+                self.main.data[candidate] = candidate_value
+                return 0
+            if self.main.capacity and (
+                self.sketch.estimate(candidate) > self.sketch.estimate(self.main.victim())
+            ):
+                self.main.pop_victim()
+                self.main.data[candidate] = candidate_value
+            return 1
+
+    def discard(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            if self.data.get(key, MISSING) is value:
+                del self.data[key]
+            self.main.discard(key, value)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.data.clear()
+            self.main.clear()
+
+
+POLICIES: dict[str, type[LruStore]] = {
+    "lru": LruStore,
+    "slru": SlruStore,
+    "tinylfu": TinyLfuStore,
+}
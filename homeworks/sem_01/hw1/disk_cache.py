@@ -0,0 +1,230 @@
+import atexit
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Any, Hashable, Optional
+
+from cache_stores import MISSING
+from snapshot import PathType
+
+
+def stable_digest(namespace: str, key: Hashable) -> Optional[bytes]:
+    """
+    Вычисляет дайджест ключа, одинаковый во всех процессах и запусках.
+
+    Args:
+        namespace: пространство имен ключа, например полное имя функции.
+        key: ключ кеша в памяти.
+
+    Returns:
+        16-байтовый blake2b от pickle пары (namespace, key) или None, если
+        ключ не сериализуется pickle.
+    """
+    try:
+        data = pickle.dumps((namespace, key), protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class DiskCache:
+    """
+    Второй уровень кеша в таблице SQLite.
+
+    Записи адресуются стабильным дайджестом (blake2b) от пространства имен,
+    обычно имени функции, и сериализованного pickle ключа, поэтому переживают
+    перезапуск процесса, а несколько функций могут делить один файл. Записи
+    и отметки об использовании накапливаются в памяти и сбрасываются в файл
+    одной транзакцией каждые batch_size операций, при закрытии и при выходе
+    из интерпретатора. Когда суммарный объем значений пространства имен
+    превышает max_bytes, удаляются его давно использованные записи.
+    """
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS entries ("
+        " digest BLOB PRIMARY KEY, namespace TEXT NOT NULL, value BLOB NOT NULL,"
+        " size INTEGER NOT NULL, used REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS entries_used ON entries (namespace, used)",
+    )
+
+    namespace: str
+    max_bytes: int
+    batch_size: int
+    total_bytes: int
+    _connection: Optional[sqlite3.Connection]
+    _lock: threading.Lock
+    _pending: dict[bytes, bytes]
+    _touched: dict[bytes, float]
+
+    def __init__(
+        self, path: PathType, namespace: str, max_bytes: int = 2 ** 30, batch_size: int = 64
+    ) -> None:
+        """
+        Открывает или создает файл кеша.
+
+        Args:
+            path: путь к файлу SQLite.
+            namespace: пространство имен ключей, например полное имя функции.
+            max_bytes: максимальный суммарный объем сериализованных значений
+                пространства имен в файле.
+            batch_size: число отложенных операций, после которого они
+                сбрасываются в файл.
+
+        Raises:
+            ValueError, если max_bytes или batch_size не положительны.
+        """
+        if max_bytes <= 0:
+            raise ValueError(f"bad max_bytes: {max_bytes}")
+        if batch_size <= 0:
+            raise ValueError(f"bad batch_size: {batch_size}")
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._touched = {}
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            for statement in self._SCHEMA:
+                self._connection.execute(statement)
+        (self.total_bytes,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE namespace = ?", (namespace,)
+        ).fetchone()
+
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    def digest(self, key: Hashable) -> Optional[bytes]:
+        """
+        Вычисляет стабильный дайджест ключа.
+
+        Args:
+            key: ключ кеша в памяти.
+
+        Returns:
+            16-байтовый дайджест или None, если ключ не сериализуется pickle.
+        """
+        return stable_digest(self.namespace, key)
+
+    def get(self, digest: bytes) -> Any:
+        """
+        Читает значение по дайджесту.
+
+        Args:
+            digest: дайджест ключа.
+
+        Returns:
+            Значение или MISSING, если записи нет.
+        """
+        with self._lock:
+            data = self._pending.get(digest)
+            if data is None:
+                row = self._connection.execute(
+                    "SELECT value FROM entries WHERE digest = ?", (digest,)
+                ).fetchone()
+                if row is None:
+                    return MISSING
+                data = row[0]
+                self._touched[digest] = time.time()
+                self._flush_if_full()
+        return pickle.loads(data)
+
+    def put(self, digest: bytes, value: Any) -> None:
+        """
+        Откладывает запись значения. Несериализуемые значения пропускаются.
+
+        Args:
+            digest: дайджест ключа.
+            value: значение.
+        """
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._pending[digest] = data
+            self._flush_if_full()
+
+    def flush(self) -> None:
+        """Сбрасывает отложенные операции в файл и вытесняет лишние записи."""
+        with self._lock:
+            self._flush()
+
+    def clear(self) -> None:
+        """Удаляет все записи пространства имен."""
+        with self._lock:
+            self._pending.clear()
+            self._touched.clear()
+            with self._connection:
+                self._connection.execute(
+                    "DELETE FROM entries WHERE namespace = ?", (self.namespace,)
+                )
+            self.total_bytes = 0
+
+    def close(self) -> None:
+        """Сбрасывает отложенные операции и закрывает файл."""
+        with self._lock:
+            if self._connection is None:
+                return
+            self._flush()
+            self._connection.close()
+            self._connection = None
+
+    def _flush_if_full(self) -> None:
+        if len(self._pending) + len(self._touched) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._connection is None or not (self._pending or self._touched):
+            return
+        now = time.time()
+        with self._connection:
+            (replaced_bytes,) = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries WHERE digest IN "
+                f"({', '.join('?' * len(self._pending))})",
+                list(self._pending),
+            ).fetchone()
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO entries (digest, namespace, value, size, used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (digest, self.namespace, data, len(data), now)
+                    for digest, data in self._pending.items()
+                ],
+            )
+            self._connection.executemany(
+                "UPDATE entries SET used = ? WHERE digest = ?",
+                [(used, digest) for digest, used in self._touched.items()],
+            )
+            self.total_bytes += sum(map(len, self._pending.values())) - replaced_bytes
+            self._evict()
+        self._pending.clear()
+        self._touched.clear()
+
+    def _evict(self) -> None:
+        excess = self.total_bytes - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        rows = self._connection.execute(
+            "SELECT digest, size FROM entries WHERE namespace = ? ORDER BY used",
+            (self.namespace,),
+        )
+        for digest, size in rows:
+            victims.append((digest,))
+            excess -= size
+            self.total_bytes -= size
+            if excess <= 0:
+                break
+        self._connection.executemany("DELETE FROM entries WHERE digest = ?", victims)
+
+
+def _flush_at_exit(reference: weakref.ref) -> None:
+    """Сбрасывает отложенные операции кеша при выходе, если он еще существует."""
+    cache = reference()
+    if cache is not None:
+        cache.close()
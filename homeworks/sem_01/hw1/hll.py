@@ -0,0 +1,197 @@
+from typing import Iterable, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from ids import uuids_to_ids
+
+
+MIN_PRECISION = 4
+MAX_PRECISION = 16
+
+_HASH_BITS = 64
+
+
+def hash_ids(ids: np.ndarray) -> np.ndarray:
+    """
+    Вычисляет 64-битные хеши 128-битных идентификаторов.
+
+    Используется финализатор splitmix64, поэтому хеши равномерно распределены
+    даже для неслучайных идентификаторов.
+
+    Args:
+        ids: массив формы (n, 2) типа uint64 - старшие и младшие 64 бита
+            идентификаторов.
+
+    Returns:
+        Массив формы (n,) типа uint64 с хешами идентификаторов.
+    """
+    with np.errstate(over="ignore"):
+        return _mix(ids[:, 0] ^ _mix(ids[:, 1]))
+
+
+def hash_uuids(users: Sequence[UUID]) -> np.ndarray:
+    """
+    Вычисляет 64-битные хеши последовательности UUID.
+
+    Args:
+        users: последовательность UUID.
+
+    Returns:
+        Массив формы (len(users),) типа uint64 с хешами UUID.
+    """
+    return hash_ids(uuids_to_ids(users))
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """Финализатор splitmix64, примененный поэлементно к массиву uint64."""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Поэлементная битовая длина массива uint64."""
+    result = np.zeros(values.shape, dtype=np.uint8)
+    values = values.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        shifted = values >> np.uint64(shift)
+        mask = shifted != 0
+        values[mask] = shifted[mask]
+        result[mask] += shift
+    result[values != 0] += 1
+    return result
+
+
+class HyperLogLog:
+    """
+    Вероятностная оценка числа уникальных элементов (HyperLogLog).
+
+    Скетч занимает 2 ** precision байт независимо от числа добавленных элементов,
+    стандартная относительная ошибка оценки - 1.04 / sqrt(2 ** precision).
+    Скетчи с одинаковой точностью можно объединять: объединение оценивает число
+    уникальных элементов во всех исходных множествах.
+    """
+
+    _precision: int
+    _registers: np.ndarray
+
+    def __init__(self, precision: int = 12) -> None:
+        """
+        Инициализирует пустой скетч.
+
+        Args:
+            precision: число бит хеша, задающих номер регистра.
+
+        Raises:
+            ValueError, если precision не лежит в диапазоне
+                [MIN_PRECISION, MAX_PRECISION].
+        """
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(
+                f"precision must be in [{MIN_PRECISION}, {MAX_PRECISION}], got {precision}"
+            )
+        self._precision = precision
+        self._registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def precision(self) -> int:
+        """Число бит хеша, задающих номер регистра."""
+        return self._precision
+
+    @property
+    def relative_error(self) -> float:
+        """Стандартная относительная ошибка оценки."""
+        return 1.04 / np.sqrt(self._registers.size)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        """
+        Добавляет в скетч элементы, заданные 64-битными хешами.
+
+        Args:
+            hashes: массив uint64 с хешами элементов.
+        """
+        value_bits = _HASH_BITS - self._precision
+        indices = (hashes >> np.uint64(value_bits)).astype(np.intp)
+        values = hashes & np.uint64((1 << value_bits) - 1)
+        ranks = np.uint8(value_bits + 1) - _bit_length(values)
+        np.maximum.at(self._registers, indices, ranks)
+
+    def add_uuids(self, users: Sequence[UUID]) -> None:
+        """
+        Добавляет в скетч последовательность UUID.
+
+        Args:
+            users: последовательность UUID.
+        """
+        self.add_hashes(hash_uuids(users))
+
+    def clear(self) -> None:
+        """Очищает скетч."""
+        self._registers.fill(0)
+
+    def update(self, other: "HyperLogLog") -> None:
+        """
+        Объединяет скетч с другим скетчем на месте.
+
+        Args:
+            other: скетч с той же точностью.
+
+        Raises:
+            ValueError, если точности скетчей различаются.
+        """
+        self._check_compatible(other)
+        np.maximum(self._registers, other._registers, out=self._registers)
+
+    @classmethod
+    def union(cls, sketches: Iterable["HyperLogLog"]) -> "HyperLogLog":
+        """
+        Строит объединение скетчей.
+
+        Args:
+            sketches: непустой набор скетчей с одинаковой точностью.
+
+        Returns:
+            Новый скетч - объединение переданных.
+
+        Raises:
+            ValueError, если набор пуст или точности скетчей различаются.
+        """
+        sketches = list(sketches)
+        if not sketches:
+            raise ValueError("nothing to union")
+        result = cls(sketches[0].precision)
+        for sketch in sketches:
+            result._check_compatible(sketch)
+        np.maximum.reduce(
+            [sketch._registers for sketch in sketches], out=result._registers
+        )
+        return result
+
+    def cardinality(self) -> int:
+        """Оценка числа уникальных элементов, добавленных в скетч."""
+        registers_amount = self._registers.size
+        estimate = _alpha(registers_amount) * registers_amount ** 2 / np.sum(
+            np.ldexp(1.0, -self._registers.astype(np.int32))
+        )
+        zeros = registers_amount - np.count_nonzero(self._registers)
+        if estimate <= 2.5 * registers_amount and zeros:
+            estimate = registers_amount * np.log(registers_amount / zeros)
+        return round(estimate)
+
+    def _check_compatible(self, other: "HyperLogLog") -> None:
+        if other.precision != self._precision:
+            raise ValueError(
+                f"precision mismatch: {self._precision} != {other.precision}"
+            )
+
+
+def _alpha(registers_amount: int) -> float:
+    """Поправочный коэффициент оценки HyperLogLog."""
+    if registers_amount == 16:
+        return 0.673
+    if registers_amount == 32:
+        return 0.697
+    if registers_amount == 64:
+        return 0.709
+    return 0.7213 / (1 + 1.079 / registers_amount)
@@ -0,0 +1,132 @@
+from typing import Sequence, Union
+from uuid import UUID
+
+import numpy as np
+
+
+IdBatch = Union[np.ndarray, bytes, bytearray, memoryview]
+
+ID_SIZE = 16
+
+_MASK64 = (1 << 64) - 1
+_BIG_ENDIAN_ID = np.dtype(">u8")
+_PACKED_ID = np.dtype((np.void, ID_SIZE))
+
+
+def as_id_array(ids: IdBatch) -> np.ndarray:
+    """
+    Приводит пакет 128-битных идентификаторов к массиву формы (n, 2) типа uint64.
+
+    Args:
+        ids: массив формы (n, 2) типа uint64 со старшими и младшими 64 битами
+            идентификаторов, массив n байтовых строк длины 16 или буфер
+            из n подряд идущих 16-байтовых идентификаторов (как в UUID.bytes).
+
+    Returns:
+        C-непрерывный массив формы (n, 2) типа uint64. Если ids уже имеет
+        нужный вид, копия не создается.
+
+    Raises:
+        TypeError, если тип ids не поддерживается.
+        ValueError, если форма массива или длина буфера не соответствуют
+            16-байтовым идентификаторам.
+    """
+    if isinstance(ids, np.ndarray):
+        if ids.dtype == np.uint64:
+            if ids.ndim != 2 or ids.shape[1] != 2:
+                raise ValueError(f"expected ids of shape (n, 2), got {ids.shape}")
+            return np.ascontiguousarray(ids)
+        if ids.dtype.kind not in "SV" or ids.dtype.itemsize != ID_SIZE:
+            raise TypeError(f"unsupported id dtype: {ids.dtype}")
+        ids = np.ascontiguousarray(ids).data
+    elif not isinstance(ids, (bytes, bytearray, memoryview)):
+        raise TypeError(f"unsupported ids type: {type(ids).__name__}")
+
+    if memoryview(ids).nbytes % ID_SIZE:
+        raise ValueError(f"buffer size is not a multiple of {ID_SIZE} bytes")
+    return np.frombuffer(ids, dtype=_BIG_ENDIAN_ID).astype(np.uint64).reshape(-1, 2)
+
+
+def uuids_to_ids(users: Sequence[UUID]) -> np.ndarray:
+    """
+    Преобразует последовательность UUID в массив идентификаторов.
+
+    Args:
+        users: последовательность UUID.
+
+    Returns:
+        Массив формы (len(users), 2) типа uint64.
+    """
+    values = [uuid.int for uuid in users]
+    ids = np.empty((len(values), 2), dtype=np.uint64)
+    ids[:, 0] = np.fromiter((value >> 64 for value in values), np.uint64, len(values))
+    ids[:, 1] = np.fromiter((value & _MASK64 for value in values), np.uint64, len(values))
+    return ids
+
+
+def unique_ids(ids: np.ndarray) -> np.ndarray:
+    """
+    Удаляет повторы из массива идентификаторов.
+
+    Результат упорядочен лексикографически по (старшие 64 бита, младшие 64 бита),
+    т.е. так же, как соответствующие UUID.int. Массив сортируется по старшей
+    половине, и только группы с совпадающими старшими половинами досортировываются
+    по младшей, что для случайных идентификаторов почти ничего не стоит.
+
+    Args:
+        ids: массив формы (n, 2) типа uint64.
+
+    Returns:
+        Упорядоченный массив уникальных идентификаторов формы (m, 2) типа uint64.
+    """
+    ids = ids[np.argsort(ids[:, 0])]
+    ties = ids[1:, 0] == ids[:-1, 0]
+    if ties.any():
+        grouped = np.zeros(len(ids), dtype=bool)
+        grouped[1:] |= ties
+        grouped[:-1] |= ties
+        group_ids = ids[grouped]
+        ids[grouped] = group_ids[np.lexsort((group_ids[:, 1], group_ids[:, 0]))]
+
+    distinct = np.ones(len(ids), dtype=bool)
+    distinct[1:] = np.any(ids[1:] != ids[:-1], axis=1)
+    return ids[distinct]
+
+
+def _pack(ids: np.ndarray) -> np.ndarray:
+    """Представляет идентификаторы в виде 16-байтовых big-endian записей."""
+    return ids.astype(_BIG_ENDIAN_ID).view(_PACKED_ID).ravel()
+
+
+def locate_ids(sorted_ids: np.ndarray, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Ищет идентификаторы в упорядоченном массиве уникальных идентификаторов.
+
+    Поиск ведется по старшим 64 битам, и только если в sorted_ids несколько
+    идентификаторов с той же старшей половиной, используется сравнение полных
+    16-байтовых записей.
+
+    Args:
+        sorted_ids: результат unique_ids.
+        ids: массив формы (n, 2) типа uint64 с искомыми идентификаторами.
+
+    Returns:
+        Пару массивов длины n: позиции идентификаторов в sorted_ids и маску
+        найденных идентификаторов.
+    """
+    if not len(sorted_ids):
+        return np.zeros(len(ids), dtype=np.intp), np.zeros(len(ids), dtype=bool)
+
+    high = np.ascontiguousarray(sorted_ids[:, 0])
+    positions = np.searchsorted(high, ids[:, 0])
+    next_positions = np.minimum(positions + 1, len(high) - 1)
+    ambiguous = (next_positions > positions) & (high[next_positions] == ids[:, 0])
+    if ambiguous.any():
+        positions[ambiguous] = np.searchsorted(
+            _pack(sorted_ids), _pack(ids[ambiguous])
+        )
+
+    inside = positions < len(sorted_ids)
+    found = np.zeros(len(ids), dtype=bool)
+    found[inside] = np.all(sorted_ids[positions[inside]] == ids[inside], axis=1)
+    return positions, found
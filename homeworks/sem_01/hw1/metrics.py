@@ -1,10 +1,257 @@
-from uuid import UUID, uuid4
-from typing import Sequence
-import time
+from collections import Counter
+from uuid import UUID
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from hll import HyperLogLog, hash_ids
+from ids import IdBatch, as_id_array, locate_ids, unique_ids, uuids_to_ids
+from snapshot import PathType, SnapshotReader, save_snapshot
+from user_table import ArrayUserTable, DictUserTable, UserTable
+
+
+USER_TABLES: dict[str, type] = {
+    "dict": DictUserTable,
+    "array": ArrayUserTable,
+}
+
+
+def _create_table(backend: str, accumulation_period: int) -> UserTable:
+    """
+    Создает хранилище пользователей окна.
+
+    Args:
+        backend: имя хранилища, один из ключей USER_TABLES.
+        accumulation_period: длина окна в днях.
+
+    Raises:
+        ValueError, если хранилище backend неизвестно.
+    """
+    if backend not in USER_TABLES:
+        raise ValueError(f"unknown backend {backend!r}, expected one of {sorted(USER_TABLES)}")
+    return USER_TABLES[backend](accumulation_period)
+
+
+def _validate_period(accumulation_period: int) -> int:
+    """
+    Округляет и проверяет период расчета метрики.
+
+    Args:
+        accumulation_period: период времени, для которого необходимо подсчитать
+            число уникальных пользователей.
+
+    Returns:
+        Округленный период.
+
+    Raises:
+        TypeError, если accumulation_period не может быть округлено и использовано
+            для получения целого числа.
+        ValueError, если после округления accumulation_period - число, меньшее 1.
+    """
+    period = round(accumulation_period)
+    if period < 1:
+        raise ValueError(f"bad accumulation_period: {accumulation_period}")
+    return period
 
 
 class PeriodActiveUsers:
-    _uniq_users: dict[UUID, int]
+    """
+    Счетчик уникальных пользователей за скользящее окно из accumulation_period дней.
+
+    Дни последних визитов пользователей окна хранятся в подключаемом хранилище
+    (см. user_table.py): backend="dict" - словарь UUID с кольцевым буфером
+    корзин по дням, backend="array" - компактная хеш-таблица на массивах NumPy.
+    В обоих случаях число пользователей в окне поддерживается счетчиком и
+    читается за O(1), а смена дня стоит O(число выбывающих пользователей).
+    """
+
+    _table: UserTable
+    _accumulation_period: int
+
+    def __init__(self, accumulation_period: int, backend: str = "dict") -> None:
+        """
+        Инициализирует объект для подсчета числа уникальных пользователей.
+
+        Args:
+            accumulation_period: период времени, для которого необходимо подсчитать
+                число уникальных пользователей.
+            backend: хранилище, один из ключей USER_TABLES.
+
+        Raises:
+            TypeError, если accumulation_period не может быть округлено и использовано
+                для получения целого числа.
+            ValueError, если после округления accumulation_period - число, меньшее 1,
+                или хранилище backend неизвестно.
+        """
+        self._accumulation_period = _validate_period(accumulation_period)
+        self._table = _create_table(backend, self._accumulation_period)
+
+    def add_active_users_for_curr_day(self, users: Sequence[UUID]) -> None:
+        """
+        Обновляет метрику на основании данных о посещении ресурса для текущего дня.
+
+        Args:
+            users: последовательность UUID пользователей, посетивших ресурс
+                в данный день.
+        """
+        self._table.add_day(users)
+
+    def add_active_users_batch(self, ids: IdBatch) -> None:
+        """
+        Обновляет метрику по пакету 128-битных идентификаторов за текущий день.
+
+        Args:
+            ids: идентификаторы пользователей в любом виде, поддерживаемом
+                ids.as_id_array.
+        """
+        self._table.add_day_batch(as_id_array(ids))
+
+    def save(self, path: PathType) -> None:
+        """
+        Сохраняет состояние счетчика в бинарный снимок (см. snapshot.py).
+
+        Args:
+            path: путь к файлу снимка.
+
+        Raises:
+            AttributeError, если среди пользователей есть объекты, не являющиеся UUID.
+        """
+        ids, last_seen = self._table.export()
+        save_snapshot(
+            path, self._accumulation_period, self._table.current_day, ids, last_seen
+        )
+
+    @classmethod
+    def load(cls, path: PathType, backend: str = "dict") -> "PeriodActiveUsers":
+        """
+        Восстанавливает счетчик из бинарного снимка.
+
+        Args:
+            path: путь к файлу снимка.
+            backend: хранилище восстановленного счетчика, один из ключей USER_TABLES.
+
+        Returns:
+            Счетчик в состоянии на момент сохранения снимка.
+
+        Raises:
+            FileNotFoundError, если файла не существует.
+            ValueError, если файл не является снимком поддерживаемой версии
+                или хранилище backend неизвестно.
+        """
+        snapshot = SnapshotReader(path)
+        counter = cls(snapshot.accumulation_period, backend)
+        counter._table = USER_TABLES[backend].restore(
+            snapshot.accumulation_period,
+            snapshot.current_day,
+            snapshot.ids(),
+            snapshot.last_seen_days(),
+        )
+        return counter
+
+    @property
+    def unique_users_amount(self) -> int:
+        """Число уникальных пользователей за последние accumulation_period дней."""
+        return self._table.users_amount
+
+    @property
+    def accumulation_period(self) -> int:
+        """Период расчета метрики: accumulation_period."""
+        return self._accumulation_period
+
+
+class ApproximatePeriodActiveUsers:
+    """
+    Приближенный счетчик уникальных пользователей за accumulation_period дней.
+
+    Для каждого дня окна хранится отдельный скетч HyperLogLog, число уникальных
+    пользователей в окне оценивается по объединению скетчей. Память не зависит
+    от числа пользователей и составляет 2 ** precision байт на день окна.
+    """
+
+    _sketches: list[HyperLogLog]
+    _cached_amount: Optional[int]
+    _accumulation_period: int
+    _current_day: int
+
+    def __init__(self, accumulation_period: int, precision: int = 12) -> None:
+        """
+        Инициализирует объект для приближенного подсчета уникальных пользователей.
+
+        Args:
+            accumulation_period: период времени, для которого необходимо подсчитать
+                число уникальных пользователей.
+            precision: точность скетчей HyperLogLog, относительная ошибка оценки
+                составляет примерно 1.04 / sqrt(2 ** precision).
+
+        Raises:
+            TypeError, если accumulation_period не может быть округлено и использовано
+                для получения целого числа.
+            ValueError, если после округления accumulation_period - число, меньшее 1,
+                или precision вне допустимого диапазона.
+        """
+        self._accumulation_period = _validate_period(accumulation_period)
+        self._sketches = [
+            HyperLogLog(precision) for _ in range(self._accumulation_period)
+        ]
+        self._cached_amount = 0
+        self._current_day = 0
+
+    def add_active_users_for_curr_day(self, users: Sequence[UUID]) -> None:
+        """
+        Обновляет метрику на основании данных о посещении ресурса для текущего дня.
+
+        Args:
+            users: последовательность UUID пользователей, посетивших ресурс
+                в данный день.
+        """
+        self.add_active_users_batch(uuids_to_ids(users))
+
+    def add_active_users_batch(self, ids: IdBatch) -> None:
+        """
+        Обновляет метрику по пакету 128-битных идентификаторов за текущий день.
+
+        Повторы в пакете не мешают оценке, поэтому пакет не дедуплицируется.
+
+        Args:
+            ids: идентификаторы пользователей в любом виде, поддерживаемом
+                ids.as_id_array.
+        """
+        sketch = self._sketches[self._current_day % self._accumulation_period]
+        sketch.clear()
+        sketch.add_hashes(hash_ids(as_id_array(ids)))
+        self._cached_amount = None
+        self._current_day += 1
+
+    @property
+    def unique_users_amount(self) -> int:
+        """Оценка числа уникальных пользователей за последние accumulation_period дней."""
+        if self._cached_amount is None:
+            self._cached_amount = HyperLogLog.union(self._sketches).cardinality()
+        return self._cached_amount
+
+    @property
+    def accumulation_period(self) -> int:
+        """Период расчета метрики: accumulation_period."""
+        return self._accumulation_period
+
+    @property
+    def relative_error(self) -> float:
+        """Стандартная относительная ошибка оценки."""
+        return self._sketches[0].relative_error
+
+
+class BatchPeriodActiveUsers:
+    """
+    Точный счетчик уникальных пользователей, принимающий пакеты идентификаторов.
+
+    Устроен так же, как PeriodActiveUsers, но корзины кольцевого буфера хранят
+    упорядоченные массивы 128-битных идентификаторов формы (n, 2) типа uint64.
+    Пакет дня дедуплицируется и сопоставляется с корзинами средствами NumPy,
+    поэтому при обработке не создаются Python-объекты для отдельных пользователей.
+    """
+
+    _day_buckets: list[np.ndarray]
+    _users_amount: int
     _accumulation_period: int
     _current_day: int
 
@@ -21,12 +268,12 @@ class PeriodActiveUsers:
                 для получения целого числа.
             ValueError, если после округления accumulation_period - число, меньшее 1.
         """
-        self._accumulation_period = round(accumulation_period)
-        if self._accumulation_period < 1:
-            raise ValueError
-        self._uniq_users = {}
+        self._accumulation_period = _validate_period(accumulation_period)
+        self._day_buckets = [
+            np.empty((0, 2), dtype=np.uint64) for _ in range(self._accumulation_period)
+        ]
+        self._users_amount = 0
         self._current_day = 0
-        pass
 
     def add_active_users_for_curr_day(self, users: Sequence[UUID]) -> None:
         """
@@ -36,49 +283,227 @@ class PeriodActiveUsers:
             users: последовательность UUID пользователей, посетивших ресурс
                 в данный день.
         """
-        for uuid in users:
-            self._uniq_users[uuid] = self._current_day
+        self.add_active_users_batch(uuids_to_ids(users))
+
+    def add_active_users_batch(self, ids: IdBatch) -> None:
+        """
+        Обновляет метрику по пакету 128-битных идентификаторов за текущий день.
+
+        Пользователи пакета, уже попавшие в окно, удаляются из корзин предыдущих
+        дней, после чего весь пакет становится корзиной текущего дня.
+
+        Args:
+            ids: идентификаторы пользователей в любом виде, поддерживаемом
+                ids.as_id_array.
+        """
+        period = self._accumulation_period
+        slot = self._current_day % period
+        self._users_amount -= len(self._day_buckets[slot])
+
+        batch = unique_ids(as_id_array(ids))
+        remaining = batch
+        for shift in range(1, period):
+            if not len(remaining):
+                break
+            bucket_slot = (slot - shift) % period
+            bucket = self._day_buckets[bucket_slot]
+            positions, found = locate_ids(bucket, remaining)
+            if found.any():
+                self._day_buckets[bucket_slot] = np.delete(bucket, positions[found], axis=0)
+                remaining = remaining[~found]
+
+        self._day_buckets[slot] = batch
+        self._users_amount += len(remaining)
         self._current_day += 1
-        pass
 
+    @classmethod
+    def merge(
+        cls, states: Iterable["BatchPeriodActiveUsers"]
+    ) -> "BatchPeriodActiveUsers":
+        """
+        Объединяет состояния счетчиков, обработавших одни и те же дни.
+
+        Корзины обходятся от последнего дня к первому, и пользователь остается
+        только в корзине своего последнего визита, поэтому состояния могут
+        пересекаться. Для состояний с непересекающимися пользователями (шардов)
+        число уникальных пользователей объединения равно сумме их чисел.
+
+        Args:
+            states: непустой набор счетчиков с одинаковыми периодом и числом
+                обработанных дней.
+
+        Returns:
+            Новый счетчик - объединение переданных.
+
+        Raises:
+            ValueError, если набор пуст или счетчики несовместимы.
+        """
+        states = list(states)
+        if not states:
+            raise ValueError("nothing to merge")
+        period = states[0].accumulation_period
+        current_day = states[0]._current_day
+        for state in states:
+            if state.accumulation_period != period or state._current_day != current_day:
+                raise ValueError("states differ in accumulation_period or current day")
+
+        merged = cls(period)
+        merged._current_day = current_day
+        seen = np.empty((0, 2), dtype=np.uint64)
+        for shift in range(1, period + 1):
+            slot = (current_day - shift) % period
+            bucket = unique_ids(
+                np.concatenate([state._day_buckets[slot] for state in states])
+            )
+            _, found = locate_ids(seen, bucket)
+            bucket = bucket[~found]
+            merged._day_buckets[slot] = bucket
+            merged._users_amount += len(bucket)
+            seen = unique_ids(np.concatenate([seen, bucket]))
+        return merged
+
+    def save(self, path: PathType) -> None:
+        """
+        Сохраняет состояние счетчика в бинарный снимок (см. snapshot.py).
+
+        Args:
+            path: путь к файлу снимка.
+        """
+        period = self._accumulation_period
+        days = range(self._current_day - period, self._current_day)
+        buckets = [self._day_buckets[day % period] for day in days]
+        save_snapshot(
+            path,
+            period,
+            self._current_day,
+            np.concatenate(buckets),
+            np.repeat(np.arange(days.start, days.stop), [len(bucket) for bucket in buckets]),
+        )
+
+    @classmethod
+    def load(cls, path: PathType) -> "BatchPeriodActiveUsers":
+        """
+        Восстанавливает счетчик из бинарного снимка.
+
+        Args:
+            path: путь к файлу снимка.
+
+        Returns:
+            Счетчик в состоянии на момент сохранения снимка.
+
+        Raises:
+            FileNotFoundError, если файла не существует.
+            ValueError, если файл не является снимком поддерживаемой версии.
+        """
+        snapshot = SnapshotReader(path)
+        counter = cls(snapshot.accumulation_period)
+        counter._current_day = snapshot.current_day
+        period = counter._accumulation_period
+        days = np.arange(counter._current_day - period, counter._current_day)
+        last_seen = snapshot.last_seen_days()
+        order = np.argsort(last_seen, kind="stable")
+        bounds = np.searchsorted(last_seen[order], days[1:])
+        for day, bucket in zip(days, np.split(snapshot.ids()[order], bounds)):
+            counter._day_buckets[day % period] = bucket
+        counter._users_amount = len(last_seen)
+        return counter
 
     @property
     def unique_users_amount(self) -> int:
         """Число уникальных пользователей за последние accumulation_period дней."""
-        accumulation_period = self._current_day - self.accumulation_period
-        for uuid in list(self._uniq_users):
-            if self._uniq_users[uuid] < accumulation_period:
-                del (self._uniq_users[uuid])
-        return len(self._uniq_users)
-        pass
+        return self._users_amount
 
     @property
     def accumulation_period(self) -> int:
         """Период расчета метрики: accumulation_period."""
         return self._accumulation_period
-        pass
-metrica10000 = PeriodActiveUsers(50)
-uuid_list10000 = [[0]*10000 for i in range(100)]
-print(time.time())
-for i in range (100):
-    for j in range(10000):
-        uuid_list10000[i][j] = uuid4()
-print(time.time())
-time_start = time.time()
-for i in range (100):
-    metrica10000.add_active_users_for_curr_day(uuid_list10000[i]) 
-    print(time.time())
-time_end = time.time()
-print(time_end - time_start)
-time_s = time.time()
-print(metrica10000.unique_users_amount)
-time_e = time.time()
-print(time_e - time_s)
-
-time_s2 = time.time()
-
-
-time_e2 = time.time()
-
-print(time_e2 - time_s2)
-print(len(metrica10000._uniq_users))
+
+
+class MultiPeriodActiveUsers:
+    """
+    Счетчик уникальных пользователей сразу для нескольких периодов (DAU, WAU, MAU).
+
+    Все периоды разделяют одну таблицу последних визитов и один кольцевой буфер
+    корзин длины max(periods), а для каждого периода поддерживается свой счетчик.
+    При смене дня счетчик периода p уменьшается на размер корзины дня, вышедшего
+    из его окна, а вернувшийся пользователь увеличивает счетчики тех периодов,
+    из окна которых он уже выпал.
+    """
+
+    _last_seen: dict[UUID, int]
+    _day_buckets: list[set[UUID]]
+    _users_amounts: dict[int, int]
+    _max_period: int
+    _current_day: int
+
+    def __init__(self, accumulation_periods: Iterable[int]) -> None:
+        """
+        Инициализирует объект для подсчета числа уникальных пользователей.
+
+        Args:
+            accumulation_periods: непустой набор периодов, для которых необходимо
+                подсчитать число уникальных пользователей.
+
+        Raises:
+            TypeError, если какой-либо из периодов не может быть округлен и
+                использован для получения целого числа.
+            ValueError, если набор периодов пуст или после округления какой-либо
+                из периодов - число, меньшее 1.
+        """
+        periods = sorted({_validate_period(period) for period in accumulation_periods})
+        if not periods:
+            raise ValueError("no accumulation periods")
+        self._users_amounts = dict.fromkeys(periods, 0)
+        self._max_period = periods[-1]
+        self._last_seen = {}
+        self._day_buckets = [set() for _ in range(self._max_period)]
+        self._current_day = 0
+
+    def add_active_users_for_curr_day(self, users: Sequence[UUID]) -> None:
+        """
+        Обновляет метрики на основании данных о посещении ресурса для текущего дня.
+
+        Args:
+            users: последовательность UUID пользователей, посетивших ресурс
+                в данный день.
+        """
+        day = self._current_day
+        max_period = self._max_period
+        buckets = self._day_buckets
+        users_amounts = self._users_amounts
+
+        for period in users_amounts:
+            users_amounts[period] -= len(buckets[(day - period) % max_period])
+        current_bucket = buckets[day % max_period]
+        for uuid in current_bucket:
+            del self._last_seen[uuid]
+        current_bucket.clear()
+
+        last_seen = self._last_seen
+        returned_after = Counter()
+        for uuid in users:
+            previous_day = last_seen.get(uuid)
+            if previous_day is None:
+                returned_after[max_period] += 1
+            elif previous_day != day:
+                buckets[previous_day % max_period].discard(uuid)
+                returned_after[day - previous_day] += 1
+            last_seen[uuid] = day
+            current_bucket.add(uuid)
+
+        for absence, amount in returned_after.items():
+            for period in users_amounts:
+                if absence >= period:
+                    users_amounts[period] += amount
+
+        self._current_day += 1
+
+    @property
+    def unique_users_amount(self) -> dict[int, int]:
+        """Число уникальных пользователей за последние period дней для каждого периода."""
+        return dict(self._users_amounts)
+
+    @property
+    def accumulation_periods(self) -> tuple[int, ...]:
+        """Упорядоченные по возрастанию периоды расчета метрик."""
+        return tuple(self._users_amounts)
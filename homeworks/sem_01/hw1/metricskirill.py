@@ -52,30 +52,30 @@ class PeriodActiveUsers:
         return self._accumulation_period #Возвращаем заданный период сбора метрики
 
 
-#Тесты
-
-#Что если accumulation_period < 1 или вовсе не число
-try:
-    bad_arg = PeriodActiveUsers(-2)
-    bad_arg = PeriodActiveUsers('vehicale')
-except Exception:
-    print('First test passed')
-
-#Проверка округления accumulation_period
-round_test = PeriodActiveUsers(1.3)
-assert round_test.accumulation_period == round(1.3)
-round_test = PeriodActiveUsers(1.6)
-assert round_test.accumulation_period == round(1.6)
-print('Second test passed')
-
-#Нормальная работа алгоритма
-period = 3
-metrica = PeriodActiveUsers(period)
-uuid_list = [l for l in 'qwerty1367']
-
-for i in range(10 + period):
-    metrica.add_active_users_for_curr_day(uuid_list[i::])
-    if i >= period:
-        assert metrica.unique_users_amount == 9 + period - i
-print('Third test passed')
-
+if __name__ == "__main__":
+    #Тесты
+
+    #Что если accumulation_period < 1 или вовсе не число
+    try:
+        bad_arg = PeriodActiveUsers(-2)
+        bad_arg = PeriodActiveUsers('vehicale')
+    except Exception:
+        print('First test passed')
+
+    #Проверка округления accumulation_period
+    round_test = PeriodActiveUsers(1.3)
+    assert round_test.accumulation_period == round(1.3)
+    round_test = PeriodActiveUsers(1.6)
+    assert round_test.accumulation_period == round(1.6)
+    print('Second test passed')
+
+    #Нормальная работа алгоритма
+    period = 3
+    metrica = PeriodActiveUsers(period)
+    uuid_list = [l for l in 'qwerty1367']
+
+    for i in range(10 + period):
+        metrica.add_active_users_for_curr_day(uuid_list[i::])
+        if i >= period:
+            assert metrica.unique_users_amount == 9 + period - i
+    print('Third test passed')
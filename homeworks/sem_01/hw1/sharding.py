@@ -0,0 +1,155 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from hll import hash_ids
+from ids import IdBatch, as_id_array, uuids_to_ids
+from metrics import BatchPeriodActiveUsers, _validate_period
+
+
+_shard_state: Optional[BatchPeriodActiveUsers] = None
+
+
+def partition_ids(ids: np.ndarray, shards_amount: int) -> list[np.ndarray]:
+    """
+    Разбивает идентификаторы на шарды по их хешу.
+
+    Один и тот же идентификатор всегда попадает в один и тот же шард, поэтому
+    шарды содержат непересекающиеся множества пользователей.
+
+    Args:
+        ids: массив формы (n, 2) типа uint64.
+        shards_amount: число шардов.
+
+    Returns:
+        Список из shards_amount массивов формы (m, 2) типа uint64.
+    """
+    shards = hash_ids(ids) % np.uint64(shards_amount)
+    order = np.argsort(shards, kind="stable")
+    bounds = np.searchsorted(shards[order], np.arange(1, shards_amount, dtype=np.uint64))
+    return np.split(ids[order], bounds)
+
+
+def _init_shard(accumulation_period: int) -> None:
+    """Создает состояние шарда в процессе-обработчике."""
+    global _shard_state
+    _shard_state = BatchPeriodActiveUsers(accumulation_period)
+
+
+def _add_shard_batch(ids: np.ndarray) -> int:
+    """Добавляет пакет дня в состояние шарда и возвращает число его пользователей."""
+    _shard_state.add_active_users_batch(ids)
+    return _shard_state.unique_users_amount
+
+
+def _get_shard_state() -> BatchPeriodActiveUsers:
+    """Возвращает состояние шарда."""
+    return _shard_state
+
+
+class ShardedPeriodActiveUsers:
+    """
+    Точный счетчик уникальных пользователей, распределенный по процессам.
+
+    Пользователи разбиваются на shards_amount шардов по хешу идентификатора.
+    Каждый шард - BatchPeriodActiveUsers, живущий в собственном процессе
+    (ProcessPoolExecutor с одним обработчиком), так что пакет дня обрабатывается
+    шардами параллельно. Шарды не пересекаются, поэтому число уникальных
+    пользователей равно сумме чисел шардов.
+
+    Процессы освобождаются методом close или при выходе из блока with.
+    """
+
+    _executors: list[ProcessPoolExecutor]
+    _shard_amounts: list[int]
+    _accumulation_period: int
+
+    def __init__(self, accumulation_period: int, shards_amount: int) -> None:
+        """
+        Инициализирует шарды и запускает их процессы.
+
+        Args:
+            accumulation_period: период времени, для которого необходимо подсчитать
+                число уникальных пользователей.
+            shards_amount: число шардов (процессов).
+
+        Raises:
+            TypeError, если accumulation_period не может быть округлено и использовано
+                для получения целого числа.
+            ValueError, если после округления accumulation_period - число, меньшее 1,
+                или shards_amount меньше 1.
+        """
+        self._accumulation_period = _validate_period(accumulation_period)
+        if shards_amount < 1:
+            raise ValueError(f"bad shards_amount: {shards_amount}")
+        self._executors = [
+            ProcessPoolExecutor(
+                max_workers=1,
+                initializer=_init_shard,
+                initargs=(self._accumulation_period,),
+            )
+            for _ in range(shards_amount)
+        ]
+        self._shard_amounts = [0] * shards_amount
+
+    def __enter__(self) -> "ShardedPeriodActiveUsers":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Завершает процессы шардов."""
+        for executor in self._executors:
+            executor.shutdown()
+
+    def add_active_users_for_curr_day(self, users: Sequence[UUID]) -> None:
+        """
+        Обновляет метрику на основании данных о посещении ресурса для текущего дня.
+
+        Args:
+            users: последовательность UUID пользователей, посетивших ресурс
+                в данный день.
+        """
+        self.add_active_users_batch(uuids_to_ids(users))
+
+    def add_active_users_batch(self, ids: IdBatch) -> None:
+        """
+        Разбивает пакет дня по шардам и обрабатывает части параллельно.
+
+        Args:
+            ids: идентификаторы пользователей в любом виде, поддерживаемом
+                ids.as_id_array.
+        """
+        parts = partition_ids(as_id_array(ids), len(self._executors))
+        futures = [
+            executor.submit(_add_shard_batch, part)
+            for executor, part in zip(self._executors, parts)
+        ]
+        self._shard_amounts = [future.result() for future in futures]
+
+    @property
+    def shard_amounts(self) -> list[int]:
+        """Число уникальных пользователей каждого шарда."""
+        return list(self._shard_amounts)
+
+    @property
+    def unique_users_amount(self) -> int:
+        """Число уникальных пользователей за последние accumulation_period дней."""
+        return sum(self._shard_amounts)
+
+    @property
+    def accumulation_period(self) -> int:
+        """Период расчета метрики: accumulation_period."""
+        return self._accumulation_period
+
+    def shard_states(self) -> list[BatchPeriodActiveUsers]:
+        """Копии состояний шардов, полученные из их процессов."""
+        futures = [executor.submit(_get_shard_state) for executor in self._executors]
+        return [future.result() for future in futures]
+
+    def merged_state(self) -> BatchPeriodActiveUsers:
+        """Состояние всех шардов, объединенное в один счетчик."""
+        return BatchPeriodActiveUsers.merge(self.shard_states())
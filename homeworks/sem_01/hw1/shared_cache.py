@@ -0,0 +1,444 @@
+import fcntl
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from contextlib import contextmanager
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Hashable, Iterator, Optional
+
+import numpy as np
+
+from cache_stores import MISSING
+from disk_cache import stable_digest
+
+
+MAGIC = b"SLR2"
+MAX_NDIM = 8
+# Имя POSIX-сегмента получает ведущий "/" и ограничено NAME_MAX = 255 байтами.
+MAX_NAME_BYTES = 254
+NIL = -1
+
+HEADER = np.dtype(
+    [
+        ("magic", "S4"),
+        ("capacity", "<u4"),
+        ("slot_bytes", "<u8"),
+        ("table_size", "<u4"),
+        ("size", "<u4"),
+        ("head", "<i4"),
+        ("tail", "<i4"),
+        ("free", "<i4"),
+    ],
+    align=True,
+)
+ENTRY = np.dtype(
+    [
+        ("digest", "<u8", (2,)),
+        ("prev", "<i4"),
+        ("next", "<i4"),
+        ("length", "<u8"),
+        ("shape", "<i8", (MAX_NDIM,)),
+        ("dtype", "S16"),
+        ("kind", "u1"),
+        ("ndim", "u1"),
+    ],
+    align=True,
+)
+
+# Виды записей: свободная ячейка, сериализованное pickle значение и массив NumPy.
+FREE, PICKLED, ARRAY = 0, 1, 2
+
+
+def lock_path(name: str) -> str:
+    """
+    Возвращает путь файла блокировки сегмента name во временном каталоге.
+
+    Имя файла строится по хешу имени сегмента, поэтому не зависит от
+    символов в нем и его длины.
+    """
+    digest = hashlib.blake2b(name.encode(), digest_size=10).hexdigest()
+    return os.path.join(tempfile.gettempdir(), f"hw1_shared_cache_{digest}.lock")
+
+
+def _check_name(name: str) -> None:
+    encoded = name.encode() if isinstance(name, str) else b""
+    if not encoded or b"/" in encoded or b"\0" in encoded or len(encoded) > MAX_NAME_BYTES:
+        raise ValueError(f"bad shared memory name: {name!r}")
+
+
+class SharedCache:
+    """
+    LRU-кеш в разделяемой памяти, общий для процессов одной машины.
+
+    Сегмент multiprocessing.shared_memory с именем name состоит из заголовка,
+    хеш-таблицы, индекса из capacity записей и capacity ячеек по slot_bytes
+    байт для значений. Хеш-таблица с открытой адресацией (линейное
+    пробирование, удаление сдвигом назад) отображает дайджест ключа в номер
+    записи, а записи связаны в двусвязный список по времени использования и
+    в список свободных, поэтому чтение, запись и вытеснение стоят O(1), а не
+    O(capacity). Запись индекса хранит дайджест, длину и вид значения, а для
+    массивов NumPy - dtype и форму. Массивы пишутся в ячейку и читаются из
+    нее одним копированием буфера без pickle, остальные значения
+    сериализуются pickle. Значения больше slot_bytes не кешируются. Таблица
+    и списки защищены блокировкой flock файла рядом с временными файлами,
+    поэтому процессы не обязаны иметь общего родителя. Сегмент создается
+    первым подключившимся процессом, переживает все процессы и удаляется
+    явно методом unlink.
+    """
+
+    name: str
+    capacity: int
+    slot_bytes: int
+    _memory: SharedMemory
+    _header: np.ndarray
+    _table: np.ndarray
+    _entries: np.ndarray
+    _slots: np.ndarray
+    _mask: int
+    _lock_path: str
+    _lock_file: int
+    _thread_lock: threading.Lock
+    _pid: int
+
+    def __init__(self, name: str, capacity: int, slot_bytes: int = 2 ** 20) -> None:
+        """
+        Подключается к сегменту name, создавая его при необходимости.
+
+        Args:
+            name: имя сегмента разделяемой памяти.
+            capacity: число ячеек.
+            slot_bytes: размер ячейки в байтах.
+
+        Raises:
+            ValueError, если name не годится как имя сегмента (пусто, длиннее
+                254 байт или содержит "/" либо нулевой байт), capacity или
+                slot_bytes не положительны или
+                существующий сегмент создан с другими параметрами.
+        """
+        _check_name(name)
+        if capacity <= 0:
+            raise ValueError(f"bad capacity: {capacity}")
+        if slot_bytes <= 0:
+            raise ValueError(f"bad slot_bytes: {slot_bytes}")
+        self.name = name
+        self.capacity = capacity
+        self.slot_bytes = slot_bytes
+        self._lock_path = lock_path(name)
+        self._open_lock()
+
+        table_size = 1 << (2 * capacity - 1).bit_length()
+        self._mask = table_size - 1
+        table_offset = HEADER.itemsize
+        entries_offset = table_offset + _aligned(table_size * 4)
+        slots_offset = entries_offset + capacity * ENTRY.itemsize
+        size = slots_offset + capacity * slot_bytes
+        with self._locked():
+            try:
+                self._memory = SharedMemory(name, create=True, size=size)
+            except FileExistsError:
+                self._memory = SharedMemory(name)
+            # Сегмент переживает процессы и удаляется только через unlink.
+            resource_tracker.unregister(self._memory._name, "shared_memory")
+
+            buffer = self._memory.buf
+            self._header = np.ndarray((), HEADER, buffer=buffer)
+            fresh = self._header["magic"] == b""
+            compatible = fresh or (
+                self._header["magic"] == MAGIC
+                and self._header["capacity"] == capacity
+                and self._header["slot_bytes"] == slot_bytes
+            )
+            if compatible:
+                self._table = np.ndarray((table_size,), "<i4", buffer=buffer, offset=table_offset)
+                self._entries = np.ndarray(
+                    (capacity,), ENTRY, buffer=buffer, offset=entries_offset
+                )
+                self._slots = np.ndarray(
+                    (capacity, slot_bytes), np.uint8, buffer=buffer, offset=slots_offset
+                )
+                if fresh:
+                    self._header["capacity"] = capacity
+                    self._header["slot_bytes"] = slot_bytes
+                    self._header["table_size"] = table_size
+                    self._reset()
+                    self._header["magic"] = MAGIC
+        if not compatible:
+            self.close()
+            raise ValueError(f"shared memory {name!r} has a different layout")
+
+    def _open_lock(self) -> None:
+        self._pid = os.getpid()
+        self._thread_lock = threading.Lock()
+        self._lock_file = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        if self._pid != os.getpid():
+            # После fork дескриптор общий с родителем, и flock их не разделяет.
+            self._open_lock()
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def __len__(self) -> int:
+        with self._locked():
+            return int(self._header["size"])
+
+    def get(self, digest: bytes) -> Any:
+        """
+        Читает значение по дайджесту и отмечает его использование.
+
+        Args:
+            digest: 16-байтовый дайджест ключа.
+
+        Returns:
+            Копия значения или MISSING, если записи нет.
+        """
+        with self._locked():
+            slot = self._find(digest)[1]
+            if slot == NIL:
+                return MISSING
+            self._unlink(slot)
+            self._push_front(slot)
+            entry = self._entries[slot]
+            data = self._slots[slot, :entry["length"]]
+            if entry["kind"] == ARRAY:
+                shape = tuple(entry["shape"][:entry["ndim"]])
+                return data.view(np.dtype(entry["dtype"].decode())).reshape(shape).copy()
+            data = data.tobytes()
+        return pickle.loads(data)
+
+    def put(self, digest: bytes, value: Any) -> int:
+        """
+        Записывает значение, вытесняя при необходимости давно использованное.
+
+        Args:
+            digest: 16-байтовый дайджест ключа.
+            value: значение.
+
+        Returns:
+            Число вытесненных записей.
+        """
+        array = _as_plain_array(value)
+        if array is not None:
+            data = array.reshape(-1).view(np.uint8)
+        else:
+            try:
+                data = np.frombuffer(
+                    pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), dtype=np.uint8
+                )
+            except (pickle.PicklingError, TypeError, AttributeError):
+                return 0
+        if len(data) > self.slot_bytes:
+            return 0
+
+        with self._locked():
+            slot, evicted = self._find(digest)[1], 0
+            if slot == NIL:
+                slot, evicted = self._allocate()
+                self._entries["digest"][slot] = np.frombuffer(digest, dtype="<u8")
+                self._insert(slot)
+            else:
+                self._unlink(slot)
+            self._push_front(slot)
+            self._write(slot, data, array)
+        return evicted
+
+    def discard(self, digest: bytes) -> None:
+        """Удаляет запись по дайджесту, если она есть."""
+        with self._locked():
+            position, slot = self._find(digest)
+            if slot != NIL:
+                self._release(position, slot)
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        with self._locked():
+            self._reset()
+
+    def close(self) -> None:
+        """Отключается от сегмента в этом процессе."""
+        self._header = self._table = self._entries = self._slots = None
+        self._memory.close()
+        os.close(self._lock_file)
+
+    def unlink(self) -> None:
+        """Удаляет сегмент и файл блокировки. Подключенные процессы сохраняют доступ."""
+        # unlink снимает сегмент с учета resource_tracker, поэтому его нужно вернуть на учет.
+        resource_tracker.register(self._memory._name, "shared_memory")
+        self._memory.unlink()
+        os.unlink(self._lock_path)
+
+    def _reset(self) -> None:
+        """Очищает таблицу и собирает все записи в список свободных."""
+        entries = self._entries
+        self._table[:] = NIL
+        entries["kind"] = FREE
+        entries["next"] = np.arange(1, self.capacity + 1)
+        entries["next"][-1] = NIL
+        entries["prev"] = NIL
+        header = self._header
+        header["size"] = 0
+        header["head"] = header["tail"] = NIL
+        header["free"] = 0
+
+    def _home(self, high: int) -> int:
+        return high & self._mask
+
+    def _find(self, digest: bytes) -> tuple[int, int]:
+        """Возвращает позицию дайджеста в таблице и номер его записи или NIL."""
+        high, low = (int(part) for part in np.frombuffer(digest, dtype="<u8"))
+        table, digests = self._table, self._entries["digest"]
+        position = self._home(high)
+        while True:
+            slot = int(table[position])
+            if slot == NIL or digests[slot, 0] == high and digests[slot, 1] == low:
+                return position, slot
+            position = (position + 1) & self._mask
+
+    def _insert(self, slot: int) -> None:
+        table = self._table
+        position = self._home(int(self._entries["digest"][slot, 0]))
+        while table[position] != NIL:
+            position = (position + 1) & self._mask
+        table[position] = slot
+
+    def _remove(self, position: int) -> None:
+        """Удаляет позицию из таблицы, сдвигая назад следующие за ней в цепочке пробирования."""
+        table, digests, mask = self._table, self._entries["digest"], self._mask
+        table[position] = NIL
+        current = position
+        while True:
+            current = (current + 1) & mask
+            slot = int(table[current])
+            if slot == NIL:
+                return
+            home = self._home(int(digests[slot, 0]))
+            # Запись остается на месте, если ее исходная позиция лежит в (position, current].
+            if (current - home) & mask < (current - position) & mask:
+                continue
+            table[position], table[current] = slot, NIL
+            position = current
+
+    def _allocate(self) -> tuple[int, int]:
+        """Берет свободную запись или вытесняет самую давно использованную."""
+        header = self._header
+        slot = int(header["free"])
+        if slot != NIL:
+            header["free"] = self._entries["next"][slot]
+            header["size"] += 1
+            return slot, 0
+        slot = int(header["tail"])
+        self._remove(self._find(self._entries["digest"][slot].tobytes())[0])
+        self._unlink(slot)
+        return slot, 1
+
+    def _release(self, position: int, slot: int) -> None:
+        self._remove(position)
+        self._unlink(slot)
+        entries, header = self._entries, self._header
+        entries["kind"][slot] = FREE
+        entries["next"][slot] = header["free"]
+        header["free"] = slot
+        header["size"] -= 1
+
+    def _unlink(self, slot: int) -> None:
+        entries, header = self._entries, self._header
+        prev, next_ = int(entries["prev"][slot]), int(entries["next"][slot])
+        if prev == NIL:
+            header["head"] = next_
+        else:
+            entries["next"][prev] = next_
+        if next_ == NIL:
+            header["tail"] = prev
+        else:
+            entries["prev"][next_] = prev
+
+    def _push_front(self, slot: int) -> None:
+        entries, header = self._entries, self._header
+        head = int(header["head"])
+        entries["prev"][slot] = NIL
+        entries["next"][slot] = head
+        if head == NIL:
+            header["tail"] = slot
+        else:
+            entries["prev"][head] = slot
+        header["head"] = slot
+
+    def _write(self, slot: int, data: np.ndarray, array: Optional[np.ndarray]) -> None:
+        entries = self._entries
+        self._slots[slot, :len(data)] = data
+        entries["length"][slot] = len(data)
+        if array is None:
+            entries["kind"][slot] = PICKLED
+        else:
+            entries["kind"][slot] = ARRAY
+            entries["dtype"][slot] = array.dtype.str.encode()
+            entries["ndim"][slot] = array.ndim
+            entries["shape"][slot, :array.ndim] = array.shape
+
+
+def _aligned(size: int) -> int:
+    return -(-size // 8) * 8
+
+
+def _as_plain_array(value: Any) -> Optional[np.ndarray]:
+    """Возвращает C-непрерывный массив для массива NumPy без объектов, иначе None."""
+    if not isinstance(value, np.ndarray) or value.dtype.hasobject or value.ndim > MAX_NDIM:
+        return None
+    if value.dtype.fields is not None or len(value.dtype.str) > ENTRY["dtype"].itemsize:
+        return None
+    return np.ascontiguousarray(value)
+
+
+class SharedStore:
+    """
+    Хранилище кеша функции поверх SharedCache.
+
+    Реализует интерфейс хранилищ cache_stores: ключи кеша в памяти
+    переводятся в стабильные дайджесты с пространством имен функции.
+    Ключи, не сериализуемые pickle, не кешируются. Длина и очистка
+    относятся ко всему сегменту, который могут делить несколько функций.
+    """
+
+    cache: SharedCache
+    namespace: str
+
+    def __init__(self, cache: SharedCache, namespace: str) -> None:
+        """
+        Инициализирует хранилище.
+
+        Args:
+            cache: разделяемый кеш.
+            namespace: пространство имен ключей, например полное имя функции.
+        """
+        self.cache = cache
+        self.namespace = namespace
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def get(self, key: Hashable) -> Any:
+        digest = stable_digest(self.namespace, key)
+        return MISSING if digest is None else self.cache.get(digest)
+
+    def put(self, key: Hashable, value: Any) -> int:
+        digest = stable_digest(self.namespace, key)
+        return 0 if digest is None else self.cache.put(digest, value)
+
+    def discard(self, key: Hashable, value: Any) -> None:
+        digest = stable_digest(self.namespace, key)
+        if digest is not None:
+            self.cache.discard(digest)
+
+    def resize(self, key: Hashable, value: Any) -> int:
+        return 0
+
+    def clear(self) -> None:
+        self.cache.clear()
@@ -0,0 +1,155 @@
+import os
+import struct
+from typing import Optional, Union
+from uuid import UUID
+
+import numpy as np
+
+
+PathType = Union[str, os.PathLike]
+
+MAGIC = b"PAUS"
+FORMAT_VERSION = 1
+
+# Заголовок: сигнатура, версия формата, размер записи, период, текущий день
+# и число записей. Записи упорядочены по идентификатору.
+HEADER = struct.Struct("<4sHHIqQ4x")
+RECORD = np.dtype([("id", ">u8", (2,)), ("last_seen", "<i8")])
+
+
+def save_snapshot(
+    path: PathType,
+    accumulation_period: int,
+    current_day: int,
+    ids: np.ndarray,
+    last_seen: np.ndarray,
+) -> None:
+    """
+    Записывает состояние счетчика в файл снимка.
+
+    Файл сначала пишется во временный файл рядом с path и затем атомарно
+    подменяет path, поэтому прерванная запись не портит предыдущий снимок.
+
+    Args:
+        path: путь к файлу снимка.
+        accumulation_period: период расчета метрики.
+        current_day: номер следующего обрабатываемого дня.
+        ids: массив формы (n, 2) типа uint64 с идентификаторами пользователей окна.
+        last_seen: массив длины n с днями последних визитов пользователей.
+    """
+    records = np.empty(len(ids), dtype=RECORD)
+    records["id"] = ids
+    records["last_seen"] = last_seen
+    records = records[np.lexsort((ids[:, 1], ids[:, 0]))]
+
+    temporary_path = f"{os.fspath(path)}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(
+            HEADER.pack(
+                MAGIC,
+                FORMAT_VERSION,
+                RECORD.itemsize,
+                accumulation_period,
+                current_day,
+                len(records),
+            )
+        )
+        file.write(records.tobytes())
+    os.replace(temporary_path, path)
+
+
+class SnapshotReader:
+    """
+    Чтение снимка состояния счетчика без десериализации записей.
+
+    Заголовок читается сразу, а записи отображаются в память (np.memmap),
+    поэтому число уникальных пользователей доступно за O(1), а день последнего
+    визита отдельного пользователя ищется бинарным поиском за O(log n) обращений
+    к файлу.
+    """
+
+    _accumulation_period: int
+    _current_day: int
+    _records: np.ndarray
+
+    def __init__(self, path: PathType) -> None:
+        """
+        Открывает снимок.
+
+        Args:
+            path: путь к файлу снимка.
+
+        Raises:
+            FileNotFoundError, если файла не существует.
+            ValueError, если файл не является снимком или имеет неподдерживаемую
+                версию формата.
+        """
+        with open(path, "rb") as file:
+            header = file.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise ValueError(f"{path} is not a snapshot: truncated header")
+
+        magic, version, record_size, period, current_day, amount = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a snapshot: bad magic {magic!r}")
+        if version != FORMAT_VERSION or record_size != RECORD.itemsize:
+            raise ValueError(f"unsupported snapshot version {version}")
+
+        self._accumulation_period = period
+        self._current_day = current_day
+        if amount:
+            self._records = np.memmap(
+                path, dtype=RECORD, mode="r", offset=HEADER.size, shape=(amount,)
+            )
+        else:
+            self._records = np.empty(0, dtype=RECORD)
+
+    @property
+    def unique_users_amount(self) -> int:
+        """Число уникальных пользователей в окне на момент снимка."""
+        return len(self._records)
+
+    @property
+    def accumulation_period(self) -> int:
+        """Период расчета метрики."""
+        return self._accumulation_period
+
+    @property
+    def current_day(self) -> int:
+        """Номер следующего обрабатываемого дня."""
+        return self._current_day
+
+    @property
+    def records(self) -> np.ndarray:
+        """Отображенные в память записи с полями id и last_seen."""
+        return self._records
+
+    def last_seen(self, user: UUID) -> Optional[int]:
+        """
+        Ищет день последнего визита пользователя.
+
+        Args:
+            user: UUID пользователя.
+
+        Returns:
+            День последнего визита или None, если пользователя нет в окне.
+        """
+        key = divmod(user.int, 1 << 64)
+        low, high = 0, len(self._records)
+        while low < high:
+            middle = (low + high) // 2
+            if tuple(self._records[middle]["id"].tolist()) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self._records) and tuple(self._records[low]["id"].tolist()) == key:
+            return int(self._records[low]["last_seen"])
+        return None
+
+    def ids(self) -> np.ndarray:
+        """Идентификаторы пользователей окна в виде массива формы (n, 2) типа uint64."""
+        return self._records["id"].astype(np.uint64)
+
+    def last_seen_days(self) -> np.ndarray:
+        """Дни последних визитов пользователей окна в порядке ids()."""
+        return np.asarray(self._records["last_seen"], dtype=np.int64)
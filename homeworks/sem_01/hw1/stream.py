@@ -0,0 +1,208 @@
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Protocol
+
+import numpy as np
+
+from ids import IdBatch, as_id_array, unique_ids
+from snapshot import PathType
+
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class BatchCounter(Protocol):
+    """Счетчик, принимающий пакеты идентификаторов по одному на день."""
+
+    def add_active_users_batch(self, ids: IdBatch) -> None:
+        ...
+
+
+def parse_events(lines: Iterable[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Разбирает строки журнала событий.
+
+    Каждая непустая строка содержит UUID пользователя и время события в секундах
+    Unix, разделенные пробельными символами или запятой.
+
+    Args:
+        lines: строки журнала.
+
+    Returns:
+        Пару массивов: идентификаторы формы (n, 2) типа uint64 и время событий
+        формы (n,) типа float64.
+
+    Raises:
+        ValueError, если строка не соответствует формату.
+    """
+    hexes = []
+    timestamps = []
+    for line in lines:
+        fields = line.replace(",", " ").split()
+        if not fields:
+            continue
+        if len(fields) != 2:
+            raise ValueError(f"bad event line: {line!r}")
+        user, timestamp = fields
+        user = user.replace("-", "")
+        if len(user) != 32:
+            raise ValueError(f"bad user id in line: {line!r}")
+        hexes.append(user)
+        timestamps.append(timestamp)
+
+    ids = as_id_array(bytes.fromhex("".join(hexes)))
+    return ids, np.array(timestamps, dtype=np.float64)
+
+
+def read_events(
+    path: PathType, chunk_size: int = 100_000
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Лениво читает журнал событий порциями.
+
+    Args:
+        path: путь к журналу в формате parse_events.
+        chunk_size: число строк в порции.
+
+    Yields:
+        Результаты parse_events для очередных chunk_size строк.
+    """
+    with open(path, "r") as file:
+        while True:
+            lines = list(islice(file, chunk_size))
+            if not lines:
+                return
+            yield parse_events(lines)
+
+
+class EventStreamIngestor:
+    """
+    Потоковая загрузка событий с временными метками в дневной счетчик.
+
+    События раскладываются по дням по их времени. День передается счетчику,
+    когда в потоке встречается событие дня, более позднего больше чем на
+    max_delay_days дней, поэтому события могут приходить не по порядку
+    в пределах этой задержки. События, пришедшие позже, отбрасываются и учитываются в late_events.
+    Дни без событий передаются счетчику пустыми пакетами, так что окно
+    сдвигается само. В памяти хранятся только пользователи еще не переданных
+    дней.
+    """
+
+    _counter: BatchCounter
+    _day_length: float
+    _max_delay_days: int
+    _origin: Optional[float]
+    _pending: dict[int, np.ndarray]
+    _next_day: int
+    _last_day: int
+    _late_events: int
+
+    def __init__(
+        self,
+        counter: BatchCounter,
+        day_length: float = SECONDS_PER_DAY,
+        max_delay_days: int = 1,
+        origin: Optional[float] = None,
+    ) -> None:
+        """
+        Инициализирует загрузчик.
+
+        Args:
+            counter: счетчик, в который передаются пакеты дней, например
+                BatchPeriodActiveUsers.
+            day_length: длительность дня в секундах.
+            max_delay_days: на сколько дней событие может опоздать относительно
+                самого позднего из уже прочитанных.
+            origin: время начала нулевого дня счетчика в секундах Unix. По
+                умолчанию - начало дня самого раннего события первой порции.
+
+        Raises:
+            ValueError, если day_length не положительна или max_delay_days
+                отрицательна.
+        """
+        if day_length <= 0:
+            raise ValueError(f"bad day_length: {day_length}")
+        if max_delay_days < 0:
+            raise ValueError(f"bad max_delay_days: {max_delay_days}")
+        self._counter = counter
+        self._day_length = day_length
+        self._max_delay_days = max_delay_days
+        self._origin = origin
+        self._pending = {}
+        self._next_day = 0
+        self._last_day = -1
+        self._late_events = 0
+
+    @property
+    def late_events(self) -> int:
+        """Число отброшенных опоздавших событий."""
+        return self._late_events
+
+    @property
+    def current_day(self) -> int:
+        """Номер следующего дня, который будет передан счетчику."""
+        return self._next_day
+
+    def feed(self, ids: IdBatch, timestamps: np.ndarray) -> None:
+        """
+        Обрабатывает порцию событий.
+
+        Args:
+            ids: идентификаторы пользователей событий.
+            timestamps: время событий в секундах Unix.
+        """
+        ids = as_id_array(ids)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if not len(timestamps):
+            return
+        if self._origin is None:
+            self._origin = np.floor(timestamps.min() / self._day_length) * self._day_length
+
+        days = np.floor((timestamps - self._origin) / self._day_length).astype(np.int64)
+        on_time = days >= self._next_day
+        self._late_events += len(days) - int(np.count_nonzero(on_time))
+        ids, days = ids[on_time], days[on_time]
+
+        order = np.argsort(days, kind="stable")
+        days, ids = days[order], ids[order]
+        chunk_days, starts = np.unique(days, return_index=True)
+        for day, day_ids in zip(chunk_days.tolist(), np.split(ids, starts[1:])):
+            pending = self._pending.get(day)
+            if pending is not None:
+                day_ids = np.concatenate([pending, day_ids])
+            self._pending[day] = unique_ids(day_ids)
+
+        if len(chunk_days):
+            self._last_day = max(self._last_day, int(chunk_days[-1]))
+        self._flush_until(self._last_day - self._max_delay_days - 1)
+
+    def ingest(self, chunks: Iterable[tuple[np.ndarray, np.ndarray]]) -> None:
+        """
+        Обрабатывает поток порций событий и передает счетчику все оставшиеся дни.
+
+        Args:
+            chunks: порции событий, например результат read_events.
+        """
+        for ids, timestamps in chunks:
+            self.feed(ids, timestamps)
+        self.flush()
+
+    def ingest_file(self, path: PathType, chunk_size: int = 100_000) -> None:
+        """
+        Обрабатывает журнал событий, читая его порциями.
+
+        Args:
+            path: путь к журналу в формате parse_events.
+            chunk_size: число строк в порции.
+        """
+        self.ingest(read_events(path, chunk_size))
+
+    def flush(self) -> None:
+        """Передает счетчику все дни, для которых есть события."""
+        self._flush_until(self._last_day)
+
+    def _flush_until(self, last_day: int) -> None:
+        """Передает счетчику дни до last_day включительно."""
+        empty = np.empty((0, 2), dtype=np.uint64)
+        while self._next_day <= last_day:
+            self._counter.add_active_users_batch(self._pending.pop(self._next_day, empty))
+            self._next_day += 1
@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+from typing import Callable
+
+import pytest
+
+# Сдаваемые модули импортируются так же, как в description.md
+# (from metrics import ..., from cache import ...): корень импорта - каталог hw1.
+HW1_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if HW1_DIR not in sys.path:
+    sys.path.insert(0, HW1_DIR)
+
+
+@pytest.fixture
+def import_standalone() -> Callable[[str], subprocess.CompletedProcess]:
+    """Выполняет импорт в отдельном процессе, где корень импорта - каталог hw1."""
+    def run(statement: str) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            [sys.executable, "-c", statement],
+            cwd=HW1_DIR,
+            env={**os.environ, "PYTHONPATH": ""},
+            capture_output=True,
+            text=True,
+        )
+
+    return run
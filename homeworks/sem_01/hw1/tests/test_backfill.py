@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from backfill import active_users_history, active_users_history_from_batches
+from metrics import BatchPeriodActiveUsers
+
+
+class TestActiveUsersHistory:
+    def test_matches_replay(self) -> None:
+        periods = [1, 7, 30]
+        rng = np.random.default_rng(0)
+        population = rng.integers(0, 2 ** 64, size=(500, 2), dtype=np.uint64)
+        batches = [
+            population[rng.integers(0, len(population), rng.integers(0, 100))]
+            for _ in range(90)
+        ]
+        counters = {period: BatchPeriodActiveUsers(period) for period in periods}
+        expected = {period: [] for period in periods}
+        for batch in batches:
+            for period, counter in counters.items():
+                counter.add_active_users_batch(batch)
+                expected[period].append(counter.unique_users_amount)
+
+        history = active_users_history_from_batches(batches, periods)
+
+        assert sorted(history) == periods
+        for period in periods:
+            assert history[period].tolist() == expected[period]
+
+    def test_days_amount(self) -> None:
+        ids = np.array([[0, 1], [0, 1], [0, 2]], dtype=np.uint64)
+
+        history = active_users_history(ids, [0, 2, 2], [2], days_amount=5)
+
+        assert history[2].tolist() == [1, 1, 2, 2, 0]
+
+    def test_empty(self) -> None:
+        history = active_users_history(np.empty((0, 2), dtype=np.uint64), [], [3])
+
+        assert history[3].tolist() == []
+
+    @pytest.mark.parametrize(
+        "days,periods",
+        [([0], [1]), ([-1, 0], [1]), ([0, 1], [0])],
+        ids=["length-mismatch", "negative-day", "bad-period"],
+    )
+    def test_fail(self, days: list[int], periods: list[int]) -> None:
+        ids = np.zeros((2, 2), dtype=np.uint64)
+
+        with pytest.raises(ValueError):
+            _ = active_users_history(ids, days, periods)
@@ -0,0 +1,436 @@
+import asyncio
+import gc
+import inspect
+import threading
+import time
+import weakref
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pytest
+
+from cache import lru_cache
+
+
+class SameHash:
+    def __init__(self, value: int) -> None:
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, SameHash) and self.value == other.value
+
+    def __hash__(self) -> int:
+        return 42
+
+
+def test_imports_without_package(import_standalone: Callable) -> None:
+    result = import_standalone("from cache import lru_cache")
+
+    assert result.returncode == 0, result.stderr
+
+
+class TestLruCache:
+    def test_description_example(self) -> None:
+        calls = []
+
+        @lru_cache(capacity=2)
+        def get_greeting(name: str) -> str:
+            calls.append(name)
+            return f"Hello, {name}!"
+
+        names = ["Mr.White", "Mike", "Mr.White", "Saul Goodman", "Mr.White", "Mike"]
+        greetings = [get_greeting(name) for name in names]
+
+        assert greetings == [f"Hello, {name}!" for name in names]
+        assert calls == ["Mr.White", "Mike", "Saul Goodman", "Mike"]
+
+    @pytest.mark.parametrize(
+        "capacity,error",
+        [(0, ValueError), (0.4, ValueError), ("big", TypeError)],
+        ids=["zero", "rounded-to-zero", "not-a-number"],
+    )
+    def test_bad_capacity(self, capacity: object, error: type[Exception]) -> None:
+        with pytest.raises(error):
+            _ = lru_cache(capacity)
+
+    def test_equal_hashes_do_not_collide(self) -> None:
+        @lru_cache(capacity=10)
+        def identity(*args: object, **kwargs: object) -> tuple:
+            return args, kwargs
+
+        assert identity(SameHash(1)) == ((SameHash(1),), {})
+        assert identity(SameHash(2)) == ((SameHash(2),), {})
+        assert identity(1, 2) == ((1, 2), {})
+        assert identity(2, 1) == ((2, 1), {})
+        assert identity(a=1, b=2) == ((), {"a": 1, "b": 2})
+        assert identity(a=2, b=1) == ((), {"a": 2, "b": 1})
+        assert identity(("a", 1)) == ((("a", 1),), {})
+        assert identity(a=1) == ((), {"a": 1})
+
+    @pytest.mark.parametrize("typed,calls_expected", [(False, 1), (True, 2)])
+    def test_typed(self, typed: bool, calls_expected: int) -> None:
+        calls = []
+
+        @lru_cache(capacity=10, typed=typed)
+        def square(value: float) -> float:
+            calls.append(value)
+            return value ** 2
+
+        square(3)
+        square(3.0)
+
+        assert len(calls) == calls_expected
+
+    def test_unhashable_arguments(self) -> None:
+        @lru_cache(capacity=10)
+        def total(values: list) -> int:
+            return sum(values)
+
+        with pytest.raises(TypeError):
+            _ = total([1, 2])
+
+    def test_decorated_functions_do_not_share_cache(self) -> None:
+        cache = lru_cache(capacity=1)
+
+        @cache
+        def double(value: int) -> int:
+            return 2 * value
+
+        @cache
+        def triple(value: int) -> int:
+            return 3 * value
+
+        assert double(1) == 2
+        assert triple(1) == 3
+        assert double.__name__ == "double"
+
+    def test_method_cache_per_instance(self) -> None:
+        class Counter:
+            def __init__(self, step: int) -> None:
+                self.step = step
+                self.calls = 0
+
+            def __eq__(self, other: object) -> bool:
+                return True
+
+            __hash__ = None
+
+            @lru_cache(capacity=1, method=True)
+            def advance(self, value: int) -> int:
+                self.calls += 1
+                return value + self.step
+
+        first, second = Counter(1), Counter(2)
+        assert [first.advance(1), second.advance(1), first.advance(1)] == [2, 3, 2]
+        assert first.calls == second.calls == 1
+
+        alive = weakref.ref(first)
+        del first
+        gc.collect()
+        assert alive() is None
+
+    def test_cache_info_and_clear(self) -> None:
+        latencies = []
+
+        @lru_cache(capacity=2, stats=True, on_miss=latencies.append)
+        def square(value: int) -> int:
+            return value ** 2
+
+        for value in [1, 2, 1, 3, 2]:
+            square(value)
+
+        info = square.cache_info()
+        assert (info.hits, info.misses, info.evictions, info.size, info.capacity) == (1, 4, 2, 2, 2)
+        assert len(latencies) == 4
+        assert info.miss_seconds == pytest.approx(sum(latencies))
+        assert info.as_dict()["hits"] == 1
+
+        square.cache_clear()
+        assert square.cache_info().as_dict() == {
+            "hits": 0, "misses": 0, "evictions": 0, "size": 0, "capacity": 2, "miss_seconds": 0.0,
+            "disk_hits": 0,
+        }
+
+    def test_cache_info_without_stats(self) -> None:
+        @lru_cache(capacity=2)
+        def square(value: int) -> int:
+            return value ** 2
+
+        for value in [1, 2, 1, 3]:
+            square(value)
+
+        info = square.cache_info()
+        assert (info.hits, info.misses, info.evictions, info.disk_hits) == (None,) * 4
+        assert (info.size, info.capacity) == (2, 2)
+
+    def test_thread_safe_single_flight(self) -> None:
+        calls = Counter()
+        calls_lock = threading.Lock()
+
+        @lru_cache(capacity=8, thread_safe=True, stats=True)
+        def slow_square(value: int) -> int:
+            with calls_lock:
+                calls[value] += 1
+            time.sleep(0.01)
+            return value ** 2
+
+        start = threading.Barrier(32)
+
+        def worker(seed: int) -> list[int]:
+            start.wait()
+            values = [(seed + step) % 8 for step in range(200)]
+            return [slow_square(value) - value ** 2 for value in values]
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            errors = [error for errors in executor.map(worker, range(32)) for error in errors]
+
+        assert not any(errors)
+        assert calls == {value: 1 for value in range(8)}
+        info = slow_square.cache_info()
+        assert (info.misses, info.evictions, info.size) == (8, 0, 8)
+
+    def test_thread_safe_failure_is_shared_and_not_cached(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        started = threading.Event()
+        waiting = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        class WatchedFuture(Future):
+            def result(self, timeout: float = None) -> object:
+                waiting.set()
+                return super().result(timeout)
+
+        monkeypatch.setattr("cache.Future", WatchedFuture)
+
+        @lru_cache(capacity=8, thread_safe=True)
+        def fail(value: int) -> int:
+            calls.append(value)
+            started.set()
+            release.wait()
+            raise RuntimeError(value)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(fail, 1)
+            started.wait()
+            follower = executor.submit(fail, 1)
+            waiting.wait()
+            release.set()
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError):
+                    future.result()
+
+        assert calls == [1]
+        with pytest.raises(RuntimeError):
+            fail(1)
+        assert calls == [1, 1]
+
+    def test_coroutine_results_are_cached(self) -> None:
+        calls = []
+
+        @lru_cache(capacity=2, stats=True)
+        async def fetch(value: int) -> int:
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value ** 2
+
+        async def main() -> list[int]:
+            first = await asyncio.gather(fetch(1), fetch(1), fetch(2))
+            return first + [await fetch(1), await fetch(3), await fetch(1)]
+
+        assert inspect.iscoroutinefunction(fetch)
+        assert asyncio.run(main()) == [1, 1, 4, 1, 9, 1]
+        assert calls == [1, 2, 3]
+        info = fetch.cache_info()
+        assert (info.misses, info.evictions, info.size) == (3, 1, 2)
+
+    def test_coroutine_failures_are_not_cached(self) -> None:
+        calls = []
+
+        @lru_cache(capacity=2)
+        async def fail(value: int) -> int:
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            raise RuntimeError(value)
+
+        async def main() -> list:
+            return await asyncio.gather(fail(1), fail(1), return_exceptions=True)
+
+        assert [type(error) for error in asyncio.run(main())] == [RuntimeError, RuntimeError]
+        assert calls == [1]
+        with pytest.raises(RuntimeError):
+            asyncio.run(fail(1))
+        assert calls == [1, 1]
+        assert fail.cache_info().size == 0
+
+    def test_ttl(self) -> None:
+        calls = []
+
+        @lru_cache(capacity=10, ttl=0.05)
+        def square(value: int) -> int:
+            calls.append(value)
+            return value ** 2
+
+        square(2)
+        square(2)
+        time.sleep(0.06)
+        square(2)
+
+        assert calls == [2, 2]
+
+    def test_max_bytes(self) -> None:
+        @lru_cache(capacity=10, max_bytes=20_000, stats=True)
+        def zeros(length: int) -> np.ndarray:
+            return np.zeros(length)
+
+        for length in [1000, 500, 1000, 1500, 500, 5000]:
+            zeros(length)
+
+        info = zeros.cache_info()
+        assert (info.hits, info.misses, info.evictions, info.size) == (1, 5, 2, 2)
+
+    @pytest.mark.parametrize("option", ["ttl", "max_bytes"])
+    def test_bad_budget(self, option: str) -> None:
+        with pytest.raises(ValueError):
+            _ = lru_cache(10, **{option: 0})
+
+    @pytest.mark.parametrize("policy,hot_hits", [("lru", 0), ("slru", 10), ("tinylfu", 10)])
+    def test_scan_resistant_policy(self, policy: str, hot_hits: int) -> None:
+        @lru_cache(capacity=20, policy=policy, stats=True)
+        def identity(value: int) -> int:
+            return value
+
+        hot = list(range(10))
+        for value in hot * 2:
+            identity(value)
+        for scan in range(50):
+            for value in hot + list(range(1000 * (scan + 1), 1000 * (scan + 1) + 30)):
+                identity(value)
+        hits = identity.cache_info().hits
+        for value in hot:
+            identity(value)
+
+        assert identity.cache_info().hits - hits == hot_hits
+
+    @pytest.mark.parametrize(
+        "options", [{"policy": "fifo"}, {"policy": "slru", "ttl": 1}], ids=["unknown", "with-ttl"]
+    )
+    def test_bad_policy(self, options: dict) -> None:
+        with pytest.raises(ValueError):
+            _ = lru_cache(10, **options)
+
+    def test_disk_tier_survives_restart(self, tmp_path: Path) -> None:
+        calls = []
+
+        def decorate() -> Callable[[int], int]:
+            @lru_cache(capacity=10, stats=True, disk_path=tmp_path / "cache.sqlite")
+            def square(value: int) -> int:
+                calls.append(value)
+                return value ** 2
+            return square
+
+        square = decorate()
+        assert [square(2), square(3)] == [4, 9]
+        square.disk_cache.close()
+
+        square = decorate()
+        assert [square(2), square(3), square(4)] == [4, 9, 16]
+        assert calls == [2, 3, 4]
+        info = square.cache_info()
+        assert (info.misses, info.disk_hits) == (1, 2)
+        square.disk_cache.close()
+
+    def test_disk_tier_rejects_methods(self, tmp_path: Path) -> None:
+        with pytest.raises(ValueError):
+            @lru_cache(capacity=10, method=True, disk_path=tmp_path / "cache.sqlite")
+            def method(self, value: int) -> int:
+                return value
+
+    def test_hash_arrays(self) -> None:
+        calls = []
+
+        @lru_cache(capacity=10, hash_arrays=True)
+        def scaled(array: np.ndarray, factor: float = 1.0) -> np.ndarray:
+            calls.append(factor)
+            return array * factor
+
+        array = np.arange(6.0).reshape(2, 3)
+        first = scaled(array, factor=2.0)
+        second = scaled(array.copy(), factor=2.0)
+        scaled(array.T.copy().T, factor=2.0)
+        scaled(array.astype(np.float32), factor=2.0)
+        scaled(array.reshape(3, 2), factor=2.0)
+
+        assert calls == [2.0, 2.0, 2.0]
+        np.testing.assert_array_equal(second, array * 2)
+        assert not first.flags.writeable and not second.flags.writeable
+        with pytest.raises(ValueError):
+            second[0, 0] = 100
+
+    def test_hash_arrays_results_are_isolated(self) -> None:
+        @lru_cache(capacity=10, hash_arrays=True)
+        def identity(array: np.ndarray) -> np.ndarray:
+            return array
+
+        array = np.arange(3)
+        result = identity(array)
+        array[0] = 99
+        with pytest.raises(ValueError):
+            result[1] = -1
+        with pytest.raises(ValueError):
+            result.flags.writeable = True
+
+        np.testing.assert_array_equal(identity(np.arange(3)), [0, 1, 2])
+        assert identity(np.arange(3)) is result
+
+    def test_hash_arrays_coroutine_results_are_isolated(self) -> None:
+        @lru_cache(capacity=4, hash_arrays=True)
+        async def double(array: np.ndarray) -> np.ndarray:
+            return array * 2
+
+        async def main() -> tuple[np.ndarray, np.ndarray]:
+            first = await double(np.arange(3))
+            with pytest.raises(ValueError):
+                first[0] = 100
+            with pytest.raises(ValueError):
+                first.flags.writeable = True
+            return first, await double(np.arange(3))
+
+        first, second = asyncio.run(main())
+
+        assert second is first
+        np.testing.assert_array_equal(second, [0, 2, 4])
+        assert double.cache_info().size == 1
+
+    def test_hash_arrays_rejects_object_arrays(self) -> None:
+        @lru_cache(capacity=10, hash_arrays=True)
+        def length(array: np.ndarray) -> int:
+            return len(array)
+
+        with pytest.raises(TypeError):
+            _ = length(np.array([1, "a"], dtype=object))
+
+    @pytest.mark.parametrize(
+        "first,second",
+        [
+            (np.zeros((0, 3)), np.zeros((3, 0))),
+            (np.array([1, 2], dtype="M8[s]"), np.array([1, 2], dtype="M8[ms]")),
+            (np.array([1, 2], dtype="m8[s]"), np.array([1, 2], dtype="i8")),
+            (np.zeros(2, dtype=[("a", "i4")]), np.zeros(2, dtype=[("b", "f4")])),
+        ],
+        ids=["empty-nd", "datetime", "timedelta", "structured"],
+    )
+    def test_hash_arrays_distinguishes_dtypes(
+        self, first: np.ndarray, second: np.ndarray
+    ) -> None:
+        @lru_cache(capacity=10, hash_arrays=True)
+        def describe(array: np.ndarray) -> tuple:
+            return array.dtype, array.shape
+
+        assert describe(first) == (first.dtype, first.shape)
+        assert describe(second) == (second.dtype, second.shape)
+        assert describe(first.copy()) == (first.dtype, first.shape)
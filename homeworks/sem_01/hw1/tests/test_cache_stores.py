@@ -0,0 +1,167 @@
+import numpy as np
+import pytest
+
+from cache_stores import (
+    MISSING,
+    BudgetedLruStore,
+    CountMinSketch,
+    LruStore,
+    SlruStore,
+    TinyLfuStore,
+    estimate_size,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestEstimateSize:
+    def test_array_uses_nbytes(self) -> None:
+        assert estimate_size(np.zeros(1000, dtype=np.float64)) == 8000
+
+    def test_fallback_to_getsizeof(self) -> None:
+        assert estimate_size("abc") > 0
+
+
+class TestLruStore:
+    def test_evicts_least_recently_used(self) -> None:
+        store = LruStore(capacity=2)
+        assert store.put("a", 1) == 0
+        assert store.put("b", 2) == 0
+        assert store.get("a") == 1
+        assert store.put("c", 3) == 1
+
+        assert store.get("b") is MISSING
+        assert (store.get("a"), store.get("c"), len(store)) == (1, 3, 2)
+
+
+class TestBudgetedLruStore:
+    def test_ttl(self) -> None:
+        clock = FakeClock()
+        store = BudgetedLruStore(capacity=10, ttl=5, clock=clock)
+        store.put("a", 1)
+        clock.now = 3
+        store.put("b", 2)
+
+        clock.now = 5
+        assert store.get("a") is MISSING
+        assert store.get("b") == 2
+
+        clock.now = 9
+        store.put("c", 3)
+        assert list(store.data) == ["c"]
+
+    def test_reads_sweep_expired_entries(self) -> None:
+        clock = FakeClock()
+        store = BudgetedLruStore(capacity=10, ttl=5, max_bytes=100, sizeof=len, clock=clock)
+        store.put("a", "x" * 40)
+        clock.now = 3
+        store.put("b", "x" * 40)
+
+        clock.now = 6
+        assert store.get("missing") is MISSING
+        assert (list(store.data), store.total_bytes) == (["b"], 40)
+
+        clock.now = 8
+        assert store.get("b") is MISSING
+        assert (len(store), store.total_bytes) == (0, 0)
+
+    def test_max_bytes(self) -> None:
+        store = BudgetedLruStore(capacity=10, max_bytes=100, sizeof=len)
+        store.put("a", "x" * 40)
+        store.put("b", "x" * 40)
+        store.get("a")
+
+        assert store.put("c", "x" * 40) == 1
+        assert list(store.data) == ["a", "c"]
+        assert store.total_bytes == 80
+
+        assert store.put("d", "x" * 101) == 0
+        assert store.get("d") is MISSING
+
+        store.put("a", "x")
+        assert store.total_bytes == 41
+
+    @pytest.mark.parametrize("ttl,max_bytes", [(None, 100), (5, None), (5, 100)])
+    def test_clear(self, ttl: float, max_bytes: int) -> None:
+        store = BudgetedLruStore(capacity=10, ttl=ttl, max_bytes=max_bytes, sizeof=len)
+        store.put("a", "abc")
+        store.clear()
+
+        assert (len(store), store.total_bytes, store.get("a")) == (0, 0, MISSING)
+
+
+def replay(store: LruStore, keys: list[int]) -> int:
+    hits = 0
+    for key in keys:
+        if store.get(key) is MISSING:
+            store.put(key, key)
+        else:
+            hits += 1
+    return hits
+
+
+class TestSlruStore:
+    def test_scan_keeps_protected_entries(self) -> None:
+        store = SlruStore(capacity=10)
+        replay(store, list(range(5)) * 2)
+        replay(store, list(range(100, 200)))
+
+        assert replay(store, list(range(5))) == 5
+        assert len(store) == 10
+
+    def test_discard_and_clear(self) -> None:
+        store = SlruStore(capacity=4)
+        store.put("a", 1)
+        store.get("a")
+        store.put("b", 2)
+
+        store.discard("a", 1)
+        assert (store.get("a"), len(store)) == (MISSING, 1)
+        store.clear()
+        assert len(store) == 0
+
+
+class TestCountMinSketch:
+    def test_estimate_and_aging(self) -> None:
+        sketch = CountMinSketch(capacity=64)
+        for _ in range(5):
+            sketch.add("hot")
+        sketch.add("cold")
+
+        assert sketch.estimate("hot") >= 5
+        assert sketch.estimate("cold") >= 1
+        assert sketch.estimate("hot") > sketch.estimate("cold")
+
+        for key in range(sketch.sample_size):
+            sketch.add(("filler", key % 3))
+        assert sketch.estimate("hot") < 5
+
+    def test_saturates(self) -> None:
+        sketch = CountMinSketch(capacity=64)
+        for _ in range(100):
+            sketch.add("hot")
+
+        assert sketch.estimate("hot") == CountMinSketch.MAX_COUNT
+
+
+class TestTinyLfuStore:
+    def test_rare_keys_are_not_admitted(self) -> None:
+        store = TinyLfuStore(capacity=100)
+        hot = list(range(50))
+        replay(store, hot * 5)
+        replay(store, list(range(1000, 2000)))
+
+        assert replay(store, hot) == 50
+        assert len(store) <= 100
+
+    def test_capacity_one(self) -> None:
+        store = TinyLfuStore(capacity=1)
+        replay(store, [1, 2, 1, 3])
+
+        assert len(store) == 1
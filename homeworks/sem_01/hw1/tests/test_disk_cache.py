@@ -0,0 +1,77 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from cache_stores import MISSING
+from disk_cache import DiskCache
+
+
+def stored_rows(path: Path) -> int:
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+
+class TestDiskCache:
+    def test_persists_across_reopen(self, tmp_path: Path) -> None:
+        path = tmp_path / "cache.sqlite"
+        cache = DiskCache(path, "square")
+        cache.put(cache.digest((2,)), 4)
+        assert cache.get(cache.digest((2,))) == 4
+        cache.close()
+
+        cache = DiskCache(path, "square")
+        assert cache.get(cache.digest((2,))) == 4
+        assert cache.get(cache.digest((3,))) is MISSING
+        cache.close()
+
+    def test_writes_are_batched(self, tmp_path: Path) -> None:
+        path = tmp_path / "cache.sqlite"
+        cache = DiskCache(path, "square", batch_size=3)
+        cache.put(cache.digest(1), 1)
+        cache.put(cache.digest(2), 4)
+        assert stored_rows(path) == 0
+
+        cache.put(cache.digest(3), 9)
+        assert stored_rows(path) == 3
+        cache.close()
+
+    def test_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        cache = DiskCache(tmp_path / "cache.sqlite", "blob", max_bytes=3000, batch_size=1)
+        for key in range(3):
+            cache.put(cache.digest(key), bytes(900))
+        assert cache.get(cache.digest(0)) == bytes(900)
+        cache.put(cache.digest(3), bytes(900))
+
+        assert cache.get(cache.digest(1)) is MISSING
+        assert [cache.get(cache.digest(key)) is MISSING for key in (0, 2, 3)] == [False] * 3
+        assert cache.total_bytes <= 3000
+        cache.close()
+
+    def test_namespaces_share_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "cache.sqlite"
+        first, second = DiskCache(path, "first"), DiskCache(path, "second")
+        first.put(first.digest(1), "first")
+        second.put(second.digest(1), "second")
+        first.flush()
+        second.flush()
+
+        assert first.digest(1) != second.digest(1)
+        first.clear()
+        assert first.get(first.digest(1)) is MISSING
+        assert second.get(second.digest(1)) == "second"
+        first.close()
+        second.close()
+
+    def test_unpicklable_values_are_skipped(self, tmp_path: Path) -> None:
+        cache = DiskCache(tmp_path / "cache.sqlite", "lambda")
+        assert cache.digest(lambda: None) is None
+        cache.put(cache.digest(1), lambda: None)
+        cache.close()
+
+        assert stored_rows(tmp_path / "cache.sqlite") == 0
+
+    @pytest.mark.parametrize("option", ["max_bytes", "batch_size"])
+    def test_bad_limits(self, tmp_path: Path, option: str) -> None:
+        with pytest.raises(ValueError):
+            _ = DiskCache(tmp_path / "cache.sqlite", "bad", **{option: 0})
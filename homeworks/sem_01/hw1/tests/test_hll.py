@@ -0,0 +1,75 @@
+import random
+from uuid import UUID
+
+import pytest
+
+from hll import HyperLogLog
+from metrics import ApproximatePeriodActiveUsers, PeriodActiveUsers
+
+
+def random_users(rng: random.Random, amount: int) -> list[UUID]:
+    return [UUID(int=rng.getrandbits(128)) for _ in range(amount)]
+
+
+class TestHyperLogLog:
+    @pytest.mark.parametrize("precision", [3, 17])
+    def test_initialization_fail(self, precision: int) -> None:
+        with pytest.raises(ValueError):
+            _ = HyperLogLog(precision)
+
+    def test_empty(self) -> None:
+        assert HyperLogLog().cardinality() == 0
+
+    @pytest.mark.parametrize("amount", [10, 1000, 100000])
+    def test_cardinality_error(self, amount: int) -> None:
+        sketch = HyperLogLog(precision=12)
+        users = random_users(random.Random(amount), amount)
+
+        sketch.add_uuids(users)
+        sketch.add_uuids(users[: amount // 2])
+
+        assert abs(sketch.cardinality() - amount) <= 3 * sketch.relative_error * amount
+
+    def test_union(self) -> None:
+        rng = random.Random(0)
+        users = random_users(rng, 20000)
+        first, second, united = HyperLogLog(), HyperLogLog(), HyperLogLog()
+
+        first.add_uuids(users[:15000])
+        second.add_uuids(users[5000:])
+        united.add_uuids(users)
+
+        assert HyperLogLog.union([first, second]).cardinality() == united.cardinality()
+
+    def test_union_precision_mismatch(self) -> None:
+        with pytest.raises(ValueError):
+            _ = HyperLogLog.union([HyperLogLog(10), HyperLogLog(12)])
+
+
+class TestApproximatePeriodActiveUsers:
+    @pytest.mark.parametrize("precision", [10, 12, 14])
+    def test_error_bounds_against_exact(self, precision: int) -> None:
+        period = 7
+        rng = random.Random(precision)
+        population = random_users(rng, 30000)
+        exact = PeriodActiveUsers(period)
+        approximate = ApproximatePeriodActiveUsers(period, precision=precision)
+
+        for _ in range(3 * period):
+            users = rng.sample(population, rng.randint(1000, 5000))
+            exact.add_active_users_for_curr_day(users)
+            approximate.add_active_users_for_curr_day(users)
+
+            expected = exact.unique_users_amount
+            error = abs(approximate.unique_users_amount - expected)
+            assert error <= 3 * approximate.relative_error * expected
+
+    def test_expired_days_are_dropped(self) -> None:
+        approximate = ApproximatePeriodActiveUsers(accumulation_period=2)
+        users = random_users(random.Random(1), 100)
+
+        approximate.add_active_users_for_curr_day(users)
+        approximate.add_active_users_for_curr_day([])
+        approximate.add_active_users_for_curr_day([])
+
+        assert approximate.unique_users_amount == 0
@@ -0,0 +1,232 @@
+import random
+from typing import Callable
+from uuid import UUID, uuid4
+
+import numpy as np
+import pytest
+
+from ids import as_id_array, uuids_to_ids
+from metrics import (
+    BatchPeriodActiveUsers,
+    MultiPeriodActiveUsers,
+    PeriodActiveUsers,
+)
+from snapshot import SnapshotReader
+
+
+def test_imports_without_package(import_standalone: Callable) -> None:
+    result = import_standalone("from metrics import PeriodActiveUsers")
+
+    assert result.returncode == 0, result.stderr
+
+
+class TestPeriodActiveUsers:
+    def test_single_day(self) -> None:
+        pau = PeriodActiveUsers(accumulation_period=1)
+
+        pau.add_active_users_for_curr_day(
+            [
+                UUID("2509a9eb-2422-4b83-8911-f780eea815bb"),
+                UUID("f52fc9b2-2ff2-4419-9f07-22267946b46e"),
+            ],
+        )
+
+        assert pau.unique_users_amount == 2
+
+    def test_duplicates_in_day(self) -> None:
+        pau = PeriodActiveUsers(accumulation_period=3)
+
+        pau.add_active_users_for_curr_day(
+            [
+                UUID("52d6f353-4dd3-421b-b1c4-c35d2ae9ad66"),
+                UUID("3f06aef7-bf3a-41f8-b571-3453a3b27aa9"),
+                UUID("b6595baa-a23a-4e22-8656-079f84c7c3a4"),
+                UUID("52d6f353-4dd3-421b-b1c4-c35d2ae9ad66"),
+                UUID("52d6f353-4dd3-421b-b1c4-c35d2ae9ad66"),
+                UUID("b6595baa-a23a-4e22-8656-079f84c7c3a4"),
+            ],
+        )
+
+        assert pau.unique_users_amount == 3
+
+    @pytest.mark.parametrize(
+        "accumulation_period,error",
+        [
+            (-2, ValueError),
+            (0.4, ValueError),
+            ("vehicle", TypeError),
+        ],
+        ids=["negative", "rounded-to-zero", "not-a-number"],
+    )
+    def test_initialization_fail(
+        self, accumulation_period: object, error: type[Exception]
+    ) -> None:
+        with pytest.raises(error):
+            _ = PeriodActiveUsers(accumulation_period)
+
+    @pytest.mark.parametrize("accumulation_period", [1.3, 1.6])
+    def test_accumulation_period_rounding(self, accumulation_period: float) -> None:
+        pau = PeriodActiveUsers(accumulation_period)
+
+        assert pau.accumulation_period == round(accumulation_period)
+
+    def test_sliding_window(self) -> None:
+        period = 3
+        pau = PeriodActiveUsers(period)
+        users = list("qwerty1367")
+
+        for day in range(len(users) + period):
+            pau.add_active_users_for_curr_day(users[day:])
+            if day >= period:
+                assert pau.unique_users_amount == len(users) - 1 + period - day
+
+    def test_returning_user_is_not_expired(self) -> None:
+        pau = PeriodActiveUsers(accumulation_period=2)
+        user = uuid4()
+
+        pau.add_active_users_for_curr_day([user])
+        pau.add_active_users_for_curr_day([user])
+        pau.add_active_users_for_curr_day([])
+
+        assert pau.unique_users_amount == 1
+
+        pau.add_active_users_for_curr_day([])
+
+        assert pau.unique_users_amount == 0
+
+
+class TestBatchPeriodActiveUsers:
+    def test_matches_exact(self) -> None:
+        period = 5
+        rng = random.Random(0)
+        population = [UUID(int=rng.getrandbits(128)) for _ in range(3000)]
+        exact = PeriodActiveUsers(period)
+        batched = BatchPeriodActiveUsers(period)
+
+        for _ in range(4 * period):
+            users = rng.choices(population, k=rng.randint(0, 1500))
+            exact.add_active_users_for_curr_day(users)
+            batched.add_active_users_batch(uuids_to_ids(users))
+
+            assert batched.unique_users_amount == exact.unique_users_amount
+
+    def test_shared_high_bits(self) -> None:
+        batched = BatchPeriodActiveUsers(accumulation_period=3)
+        ids = np.array([[1, 1], [1, 2], [1, 3], [2, 1]], dtype=np.uint64)
+
+        batched.add_active_users_batch(ids[:3])
+        batched.add_active_users_batch(ids[1:])
+
+        assert batched.unique_users_amount == 4
+
+        batched.add_active_users_batch(ids[:0])
+        batched.add_active_users_batch(ids[:0])
+
+        assert batched.unique_users_amount == 3
+
+    def test_bytes_batch(self) -> None:
+        users = [uuid4() for _ in range(10)]
+        batched = BatchPeriodActiveUsers(accumulation_period=1)
+
+        batched.add_active_users_batch(b"".join(user.bytes for user in users * 2))
+
+        assert batched.unique_users_amount == len(users)
+
+
+class TestMultiPeriodActiveUsers:
+    def test_matches_separate_counters(self) -> None:
+        periods = [1, 7, 30]
+        rng = random.Random(1)
+        population = [UUID(int=rng.getrandbits(128)) for _ in range(2000)]
+        multi = MultiPeriodActiveUsers(periods)
+        separate = {period: PeriodActiveUsers(period) for period in periods}
+
+        for _ in range(80):
+            users = rng.sample(population, rng.randint(0, 300))
+            multi.add_active_users_for_curr_day(users)
+            for counter in separate.values():
+                counter.add_active_users_for_curr_day(users)
+
+            assert multi.unique_users_amount == {
+                period: counter.unique_users_amount
+                for period, counter in separate.items()
+            }
+
+    def test_accumulation_periods(self) -> None:
+        multi = MultiPeriodActiveUsers([30, 7.2, 1, 7])
+
+        assert multi.accumulation_periods == (1, 7, 30)
+
+    @pytest.mark.parametrize("accumulation_periods", [[], [7, 0]])
+    def test_initialization_fail(self, accumulation_periods: list[int]) -> None:
+        with pytest.raises(ValueError):
+            _ = MultiPeriodActiveUsers(accumulation_periods)
+
+
+class TestAsIdArray:
+    def test_bytes_layout(self) -> None:
+        users = [uuid4() for _ in range(3)]
+        buffer = b"".join(user.bytes for user in users)
+
+        assert np.array_equal(as_id_array(buffer), uuids_to_ids(users))
+        assert np.array_equal(
+            as_id_array(np.frombuffer(buffer, dtype="S16")), uuids_to_ids(users)
+        )
+
+    @pytest.mark.parametrize(
+        "ids,error",
+        [
+            (np.zeros((3, 3), dtype=np.uint64), ValueError),
+            (np.zeros((3, 2), dtype=np.int64), TypeError),
+            (b"\x00" * 15, ValueError),
+            ([1, 2], TypeError),
+        ],
+        ids=["bad-shape", "bad-dtype", "bad-buffer-size", "bad-type"],
+    )
+    def test_fail(self, ids: object, error: type[Exception]) -> None:
+        with pytest.raises(error):
+            _ = as_id_array(ids)
+
+
+class TestSnapshot:
+    def test_round_trip(self, tmp_path) -> None:
+        rng = random.Random(2)
+        population = [UUID(int=rng.getrandbits(128)) for _ in range(500)]
+        exact = PeriodActiveUsers(accumulation_period=4)
+        for _ in range(6):
+            exact.add_active_users_for_curr_day(rng.sample(population, 100))
+
+        exact.save(tmp_path / "state.bin")
+        restored = PeriodActiveUsers.load(tmp_path / "state.bin")
+        batched = BatchPeriodActiveUsers.load(tmp_path / "state.bin")
+
+        assert restored.unique_users_amount == exact.unique_users_amount
+        assert batched.unique_users_amount == exact.unique_users_amount
+        for _ in range(6):
+            users = rng.sample(population, 100)
+            for counter in (exact, restored, batched):
+                counter.add_active_users_for_curr_day(users)
+            assert restored.unique_users_amount == exact.unique_users_amount
+            assert batched.unique_users_amount == exact.unique_users_amount
+
+    def test_reader(self, tmp_path) -> None:
+        users = [uuid4() for _ in range(3)]
+        batched = BatchPeriodActiveUsers(accumulation_period=3)
+        batched.add_active_users_for_curr_day(users[:2])
+        batched.add_active_users_for_curr_day(users[1:])
+
+        batched.save(tmp_path / "state.bin")
+        reader = SnapshotReader(tmp_path / "state.bin")
+
+        assert reader.unique_users_amount == 3
+        assert reader.accumulation_period == 3
+        assert reader.current_day == 2
+        assert [reader.last_seen(user) for user in users] == [0, 1, 1]
+        assert reader.last_seen(uuid4()) is None
+
+    def test_bad_file(self, tmp_path) -> None:
+        path = tmp_path / "state.bin"
+        path.write_bytes(b"\x00" * 64)
+
+        with pytest.raises(ValueError):
+            _ = PeriodActiveUsers.load(path)
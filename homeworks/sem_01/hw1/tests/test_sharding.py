@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from ids import unique_ids
+from metrics import BatchPeriodActiveUsers
+from sharding import ShardedPeriodActiveUsers, partition_ids
+
+
+def random_days(days_amount: int, seed: int = 0) -> list[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    population = rng.integers(0, 2 ** 64, size=(5000, 2), dtype=np.uint64)
+    return [
+        population[rng.integers(0, len(population), rng.integers(0, 2000))]
+        for _ in range(days_amount)
+    ]
+
+
+class TestPartitionIds:
+    def test_partition_is_disjoint_and_complete(self) -> None:
+        ids = unique_ids(random_days(1)[0])
+
+        parts = partition_ids(ids, 4)
+
+        assert len(parts) == 4
+        assert sum(len(part) for part in parts) == len(ids)
+        assert len(unique_ids(np.concatenate(parts))) == len(ids)
+
+    def test_partition_is_stable(self) -> None:
+        ids = random_days(1)[0]
+
+        for part in partition_ids(ids, 3):
+            for repeated_part in partition_ids(part, 3):
+                assert len(repeated_part) in (0, len(part))
+
+
+class TestShardedPeriodActiveUsers:
+    def test_matches_single_state(self) -> None:
+        period = 4
+        single = BatchPeriodActiveUsers(period)
+
+        with ShardedPeriodActiveUsers(period, shards_amount=3) as sharded:
+            for ids in random_days(10):
+                single.add_active_users_batch(ids)
+                sharded.add_active_users_batch(ids)
+
+                assert sharded.unique_users_amount == single.unique_users_amount
+
+            merged = sharded.merged_state()
+
+        assert merged.unique_users_amount == single.unique_users_amount
+
+    def test_bad_shards_amount(self) -> None:
+        with pytest.raises(ValueError):
+            _ = ShardedPeriodActiveUsers(7, shards_amount=0)
+
+
+class TestMerge:
+    def test_overlapping_states(self) -> None:
+        period = 3
+        days = random_days(6, seed=1)
+        single = BatchPeriodActiveUsers(period)
+        halves = [BatchPeriodActiveUsers(period), BatchPeriodActiveUsers(period)]
+
+        for ids in days:
+            single.add_active_users_batch(ids)
+            halves[0].add_active_users_batch(ids[: len(ids) * 2 // 3])
+            halves[1].add_active_users_batch(ids[len(ids) // 3:])
+
+        merged = BatchPeriodActiveUsers.merge(halves)
+
+        assert merged.unique_users_amount == single.unique_users_amount
+
+    def test_incompatible_states(self) -> None:
+        with pytest.raises(ValueError):
+            _ = BatchPeriodActiveUsers.merge(
+                [BatchPeriodActiveUsers(3), BatchPeriodActiveUsers(4)]
+            )
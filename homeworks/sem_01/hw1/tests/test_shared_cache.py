@@ -0,0 +1,156 @@
+import multiprocessing
+import os
+import random
+from collections import OrderedDict
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterator
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from cache import lru_cache
+from cache_stores import MISSING
+from shared_cache import SharedCache, lock_path
+
+
+def digest(value: int) -> bytes:
+    return value.to_bytes(16, "little")
+
+
+@pytest.fixture
+def name() -> Iterator[str]:
+    name = f"hw1_test_{uuid4().hex[:12]}"
+    yield name
+    try:
+        memory = SharedMemory(name)
+    except FileNotFoundError:
+        pass
+    else:
+        memory.close()
+        memory.unlink()
+    if os.path.exists(lock_path(name)):
+        os.unlink(lock_path(name))
+
+
+class TestSharedCache:
+    def test_values_round_trip(self, name: str) -> None:
+        cache = SharedCache(name, capacity=4, slot_bytes=4096)
+        array = np.arange(12, dtype=">i4").reshape(3, 4)[:, ::2]
+        cache.put(digest(1), array)
+        cache.put(digest(2), {"answer": 42})
+
+        restored = cache.get(digest(1))
+        assert restored.dtype == array.dtype
+        np.testing.assert_array_equal(restored, array)
+        assert cache.get(digest(2)) == {"answer": 42}
+        assert cache.get(digest(3)) is MISSING
+        assert len(cache) == 2
+        cache.close()
+
+    def test_evicts_least_recently_used(self, name: str) -> None:
+        cache = SharedCache(name, capacity=2, slot_bytes=256)
+        assert cache.put(digest(1), "a") == 0
+        assert cache.put(digest(2), "b") == 0
+        cache.get(digest(1))
+
+        assert cache.put(digest(3), "c") == 1
+        assert [cache.get(digest(key)) for key in (1, 2, 3)] == ["a", MISSING, "c"]
+        cache.close()
+
+    def test_matches_reference_lru(self, name: str) -> None:
+        cache = SharedCache(name, capacity=8, slot_bytes=64)
+        reference = OrderedDict()
+        rng = random.Random(0)
+        for step in range(5_000):
+            key = rng.randrange(24)
+            operation = rng.random()
+            if operation < 0.5:
+                expected = reference.get(key, MISSING)
+                if expected is not MISSING:
+                    reference.move_to_end(key)
+                assert cache.get(digest(key)) == expected
+            elif operation < 0.9:
+                reference[key] = step
+                reference.move_to_end(key)
+                evicted = 0
+                if len(reference) > 8:
+                    reference.popitem(last=False)
+                    evicted = 1
+                assert cache.put(digest(key), step) == evicted
+            else:
+                reference.pop(key, None)
+                cache.discard(digest(key))
+            assert len(cache) == len(reference)
+        cache.clear()
+        assert len(cache) == 0 and cache.get(digest(1)) is MISSING
+        cache.close()
+
+    def test_oversized_values_are_skipped(self, name: str) -> None:
+        cache = SharedCache(name, capacity=2, slot_bytes=64)
+        cache.put(digest(1), np.zeros(100))
+
+        assert cache.get(digest(1)) is MISSING
+        cache.close()
+
+    def test_layout_mismatch(self, name: str) -> None:
+        cache = SharedCache(name, capacity=2, slot_bytes=64)
+        with pytest.raises(ValueError):
+            _ = SharedCache(name, capacity=3, slot_bytes=64)
+        cache.close()
+
+    @pytest.mark.parametrize(
+        "bad_name", ["", "/etc/passwd", "a/b", "a\0b", "x" * 255], ids=repr
+    )
+    def test_rejects_bad_names(self, bad_name: str) -> None:
+        with pytest.raises(ValueError):
+            _ = SharedCache(bad_name, capacity=2, slot_bytes=64)
+
+    def test_lock_file_stays_in_temp_directory(self, name: str) -> None:
+        path = lock_path(name)
+        assert os.path.dirname(path) == os.path.dirname(lock_path("other"))
+        assert path != lock_path("other")
+
+    def test_visible_to_other_process(self, name: str) -> None:
+        cache = SharedCache(name, capacity=2, slot_bytes=4096)
+
+        def write() -> None:
+            child = SharedCache(name, capacity=2, slot_bytes=4096)
+            child.put(digest(1), np.ones(10))
+            child.close()
+
+        process = multiprocessing.get_context("fork").Process(target=write)
+        process.start()
+        process.join()
+
+        np.testing.assert_array_equal(cache.get(digest(1)), np.ones(10))
+        cache.close()
+
+
+class TestSharedLruCache:
+    def test_workers_share_results(self, name: str) -> None:
+        calls = multiprocessing.get_context("fork").Value("i", 0)
+
+        @lru_cache(capacity=16, shared_name=name, shared_slot_bytes=4096)
+        def square(value: int) -> np.ndarray:
+            with calls.get_lock():
+                calls.value += 1
+            return np.full(4, value ** 2)
+
+        def work() -> None:
+            for value in range(8):
+                square(value)
+
+        processes = [multiprocessing.get_context("fork").Process(target=work) for _ in range(4)]
+        for process in processes:
+            process.start()
+            process.join()
+
+        assert calls.value == 8
+        np.testing.assert_array_equal(square(3), np.full(4, 9))
+        assert calls.value == 8
+        square.shared_cache.close()
+
+    def test_rejects_unsupported_options(self, name: str) -> None:
+        with pytest.raises(ValueError):
+            _ = lru_cache(capacity=16, shared_name=name, ttl=1)
@@ -0,0 +1,80 @@
+import random
+from uuid import UUID
+
+import numpy as np
+import pytest
+
+from ids import uuids_to_ids
+from metrics import BatchPeriodActiveUsers, PeriodActiveUsers
+from stream import SECONDS_PER_DAY, EventStreamIngestor, parse_events
+
+
+ORIGIN = 1_700_000_000 // SECONDS_PER_DAY * SECONDS_PER_DAY
+
+
+def random_events(
+    days_amount: int, delay_days: float
+) -> tuple[list[tuple[UUID, float]], list[list[UUID]]]:
+    rng = random.Random(0)
+    population = [UUID(int=rng.getrandbits(128)) for _ in range(300)]
+    users_by_day = [rng.sample(population, 50) for _ in range(days_amount)]
+    events = [
+        (user, ORIGIN + (day + rng.random()) * SECONDS_PER_DAY)
+        for day, users in enumerate(users_by_day)
+        for user in users
+    ]
+    events.sort(key=lambda event: event[1] + rng.random() * delay_days * SECONDS_PER_DAY)
+    return events, users_by_day
+
+
+class TestParseEvents:
+    def test_formats(self) -> None:
+        user = UUID("2509a9eb-2422-4b83-8911-f780eea815bb")
+
+        ids, timestamps = parse_events(
+            [f"{user} 10\n", "\n", f"{user.hex},20.5\n"]
+        )
+
+        assert np.array_equal(ids, uuids_to_ids([user, user]))
+        assert timestamps.tolist() == [10, 20.5]
+
+    @pytest.mark.parametrize("line", ["2509a9eb 10", "only-one-field", "a b c"])
+    def test_bad_line(self, line: str) -> None:
+        with pytest.raises(ValueError):
+            _ = parse_events([line])
+
+
+class TestEventStreamIngestor:
+    def test_out_of_order_file(self, tmp_path) -> None:
+        period = 3
+        events, users_by_day = random_events(days_amount=10, delay_days=1)
+        path = tmp_path / "events.log"
+        path.write_text("".join(f"{user} {timestamp}\n" for user, timestamp in events))
+        expected = PeriodActiveUsers(period)
+        for users in users_by_day:
+            expected.add_active_users_for_curr_day(users)
+
+        counter = BatchPeriodActiveUsers(period)
+        ingestor = EventStreamIngestor(counter, max_delay_days=1, origin=ORIGIN)
+        ingestor.ingest_file(path, chunk_size=37)
+
+        assert ingestor.late_events == 0
+        assert ingestor.current_day == len(users_by_day)
+        assert counter.unique_users_amount == expected.unique_users_amount
+
+    def test_late_events_are_dropped(self) -> None:
+        counter = BatchPeriodActiveUsers(accumulation_period=1)
+        ingestor = EventStreamIngestor(counter, max_delay_days=0)
+        ids = np.arange(6, dtype=np.uint64).reshape(3, 2)
+
+        ingestor.feed(ids[:1], [ORIGIN])
+        ingestor.feed(ids[1:2], [ORIGIN + 2 * SECONDS_PER_DAY])
+        ingestor.feed(ids[2:], [ORIGIN + SECONDS_PER_DAY])
+
+        assert ingestor.late_events == 1
+        assert ingestor.current_day == 2
+        assert counter.unique_users_amount == 0
+
+        ingestor.flush()
+
+        assert counter.unique_users_amount == 1
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from ids import unique_ids
+from metrics import PeriodActiveUsers
+from user_table import ArrayUserTable
+
+
+def random_days(days_amount: int, population_size: int, seed: int = 0) -> list[np.ndarray]:
+    rng = np.random.default_rng(seed)
+    population = rng.integers(0, 2 ** 64, size=(population_size, 2), dtype=np.uint64)
+    return [
+        population[rng.integers(0, population_size, rng.integers(0, population_size // 4))]
+        for _ in range(days_amount)
+    ]
+
+
+class TestArrayBackend:
+    @pytest.mark.parametrize("period", [1, 3, 10])
+    def test_matches_dict_backend(self, period: int) -> None:
+        expected = PeriodActiveUsers(period, backend="dict")
+        counter = PeriodActiveUsers(period, backend="array")
+
+        for ids in random_days(days_amount=40, population_size=20000, seed=period):
+            expected.add_active_users_batch(ids)
+            counter.add_active_users_batch(ids)
+
+            assert counter.unique_users_amount == expected.unique_users_amount
+
+    def test_collisions_in_small_table(self) -> None:
+        table = ArrayUserTable(accumulation_period=2, capacity=4)
+        ids = np.array([[0, i] for i in range(3000)], dtype=np.uint64)
+
+        table.add_day_batch(ids)
+        table.add_day_batch(ids[::2])
+
+        assert table.users_amount == len(ids)
+        assert table.capacity >= len(ids) / ArrayUserTable.MAX_LOAD
+
+        table.add_day_batch(ids[:0])
+
+        assert table.users_amount == len(ids) // 2
+
+    def test_export(self) -> None:
+        table = ArrayUserTable(accumulation_period=3)
+        days = random_days(days_amount=5, population_size=1000)
+        for ids in days:
+            table.add_day_batch(ids)
+
+        ids, last_seen = table.export()
+
+        assert len(ids) == table.users_amount
+        assert np.array_equal(unique_ids(ids), unique_ids(np.concatenate(days[2:])))
+        assert set(last_seen.tolist()) <= {2, 3, 4}
+
+    @pytest.mark.parametrize("users_amount", [3000, 100_000, 700_000])
+    def test_compact_memory(self, users_amount: int) -> None:
+        table = ArrayUserTable(accumulation_period=30)
+        ids = np.random.default_rng(0).integers(0, 2 ** 64, (users_amount, 2), dtype=np.uint64)
+
+        table.add_day_batch(ids)
+
+        assert table.users_amount == users_amount
+        assert 25 <= table.nbytes / table.users_amount <= 51
+
+    def test_shrinks_with_population(self) -> None:
+        table = ArrayUserTable(accumulation_period=3)
+        days = random_days(days_amount=1, population_size=400_000)
+        days += random_days(days_amount=10, population_size=20_000, seed=1)
+
+        for ids in days:
+            table.add_day_batch(ids)
+            assert table.nbytes / table.users_amount <= 102
+
+        assert table.capacity <= 1 << 15
+
+    def test_snapshot_round_trip(self, tmp_path) -> None:
+        counter = PeriodActiveUsers(4, backend="array")
+        days = random_days(days_amount=10, population_size=4000)
+        for ids in days[:6]:
+            counter.add_active_users_batch(ids)
+
+        counter.save(tmp_path / "state.bin")
+        restored = PeriodActiveUsers.load(tmp_path / "state.bin", backend="array")
+
+        for ids in days[6:]:
+            counter.add_active_users_batch(ids)
+            restored.add_active_users_batch(ids)
+            assert restored.unique_users_amount == counter.unique_users_amount
+
+    def test_unknown_backend(self) -> None:
+        with pytest.raises(ValueError):
+            _ = PeriodActiveUsers(7, backend="btree")
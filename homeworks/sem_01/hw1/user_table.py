@@ -0,0 +1,418 @@
+from typing import Protocol, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from hll import hash_ids
+from ids import unique_ids, uuids_to_ids
+
+
+class UserTable(Protocol):
+    """Хранилище дней последних визитов пользователей скользящего окна."""
+
+    @property
+    def users_amount(self) -> int:
+        """Число пользователей в окне."""
+
+    @property
+    def current_day(self) -> int:
+        """Номер следующего обрабатываемого дня."""
+
+    def add_day(self, users: Sequence[UUID]) -> None:
+        """Добавляет пользователей, посетивших ресурс в текущий день, и сдвигает окно."""
+
+    def add_day_batch(self, ids: np.ndarray) -> None:
+        """То же, что add_day, для массива идентификаторов формы (n, 2) типа uint64."""
+
+    def export(self) -> tuple[np.ndarray, np.ndarray]:
+        """Идентификаторы пользователей окна и дни их последних визитов."""
+
+
+class DictUserTable:
+    """
+    Хранилище на словаре UUID -> день последнего визита.
+
+    Пользователи дополнительно разложены по кольцевому буферу из
+    accumulation_period корзин: в корзине дня лежат пользователи, последний
+    визит которых пришелся на этот день. Каждый пользователь находится ровно
+    в одной корзине, поэтому при смене дня достаточно удалить содержимое самой
+    старой корзины, а число пользователей в окне поддерживается счетчиком.
+    """
+
+    _last_seen: dict[UUID, int]
+    _day_buckets: list[set[UUID]]
+    _users_amount: int
+    _accumulation_period: int
+    _current_day: int
+
+    def __init__(self, accumulation_period: int) -> None:
+        """
+        Инициализирует пустое хранилище.
+
+        Args:
+            accumulation_period: длина окна в днях, целое число не меньше 1.
+        """
+        self._accumulation_period = accumulation_period
+        self._last_seen = {}
+        self._day_buckets = [set() for _ in range(accumulation_period)]
+        self._users_amount = 0
+        self._current_day = 0
+
+    @property
+    def users_amount(self) -> int:
+        """Число пользователей в окне."""
+        return self._users_amount
+
+    @property
+    def current_day(self) -> int:
+        """Номер следующего обрабатываемого дня."""
+        return self._current_day
+
+    def add_day(self, users: Sequence[UUID]) -> None:
+        """
+        Добавляет пользователей, посетивших ресурс в текущий день, и сдвигает окно.
+
+        Сначала из окна вытесняются пользователи, последний визит которых был
+        accumulation_period дней назад, затем посетившие ресурс пользователи
+        переносятся в корзину текущего дня.
+
+        Args:
+            users: последовательность UUID (или других хешируемых объектов).
+        """
+        day = self._current_day
+        current_bucket = self._expire_bucket(day)
+
+        last_seen = self._last_seen
+        buckets = self._day_buckets
+        period = self._accumulation_period
+        for uuid in users:
+            previous_day = last_seen.get(uuid)
+            if previous_day is None:
+                self._users_amount += 1
+            elif previous_day != day:
+                buckets[previous_day % period].discard(uuid)
+            last_seen[uuid] = day
+            current_bucket.add(uuid)
+
+        self._current_day += 1
+
+    def add_day_batch(self, ids: np.ndarray) -> None:
+        """
+        То же, что add_day, для массива идентификаторов формы (n, 2) типа uint64.
+
+        Идентификаторы преобразуются в UUID, поэтому для больших пакетов следует
+        использовать ArrayUserTable.
+        """
+        self.add_day([UUID(int=high << 64 | low) for high, low in ids.tolist()])
+
+    def _expire_bucket(self, day: int) -> set[UUID]:
+        """
+        Освобождает корзину кольцевого буфера, в которую попадет день day.
+
+        Args:
+            day: номер дня, для которого освобождается корзина.
+
+        Returns:
+            Пустая корзина дня day.
+        """
+        bucket = self._day_buckets[day % self._accumulation_period]
+        for uuid in bucket:
+            del self._last_seen[uuid]
+        self._users_amount -= len(bucket)
+        bucket.clear()
+        return bucket
+
+    def export(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Идентификаторы пользователей окна и дни их последних визитов.
+
+        Raises:
+            AttributeError, если среди пользователей есть объекты, не являющиеся UUID.
+        """
+        return (
+            uuids_to_ids(list(self._last_seen)),
+            np.fromiter(self._last_seen.values(), np.int64, len(self._last_seen)),
+        )
+
+    @classmethod
+    def restore(
+        cls,
+        accumulation_period: int,
+        current_day: int,
+        ids: np.ndarray,
+        last_seen: np.ndarray,
+    ) -> "DictUserTable":
+        """
+        Восстанавливает хранилище по результату export.
+
+        Args:
+            accumulation_period: длина окна в днях.
+            current_day: номер следующего обрабатываемого дня.
+            ids: идентификаторы пользователей окна.
+            last_seen: дни последних визитов пользователей окна.
+
+        Returns:
+            Восстановленное хранилище.
+        """
+        table = cls(accumulation_period)
+        table._current_day = current_day
+        for (high, low), day in zip(ids.tolist(), last_seen.tolist()):
+            uuid = UUID(int=high << 64 | low)
+            table._last_seen[uuid] = day
+            table._day_buckets[day % accumulation_period].add(uuid)
+        table._users_amount = len(table._last_seen)
+        return table
+
+
+class ArrayUserTable:
+    """
+    Компактное хранилище: хеш-таблица с открытой адресацией на массивах NumPy.
+
+    Идентификатор хранится в двух столбцах uint64, день последнего визита - в
+    столбце uint16 (по модулю 2 ** 16), занятость ячейки - в столбце bool, то есть
+    19 байт на ячейку. Коллизии разрешаются линейным пробированием, поиск и
+    вставка пакета векторизованы: на каждом шаге пробирования все еще не
+    размещенные идентификаторы сдвигаются на следующую ячейку одновременно.
+
+    Для каждого дня окна хранится число пользователей, последний визит которых
+    пришелся на этот день, поэтому выбывание дня стоит O(1). Выбывшие пользователи
+    физически удаляются при перестроении таблицы: когда их становится больше, чем
+    пользователей окна, или когда таблица переполняется новым пакетом. Емкость
+    при перестроении - наименьшая степень двойки, при которой заполнение не
+    больше MAX_LOAD, поэтому таблица растет удвоением и сжимается, когда
+    пользователей становится меньше.
+
+    Заполнение после перестроения лежит между MAX_LOAD / 2 и MAX_LOAD, то есть
+    от 25 до 51 байта на пользователя окна (около 50 при 100-400 тысячах
+    пользователей, 28 при 700 тысячах). Пока выбывшие пользователи ждут
+    перестроения, они занимают ячейки, и на пользователя окна приходится до
+    вдвое больше памяти. Словарь UUID -> int тратит около 200 байт.
+    """
+
+    MAX_LOAD = 0.75
+    MIN_CAPACITY = 1024
+
+    _high: np.ndarray
+    _low: np.ndarray
+    _last_seen: np.ndarray
+    _used: np.ndarray
+    _size: int
+    _day_counts: np.ndarray
+    _users_amount: int
+    _accumulation_period: int
+    _current_day: int
+    _rebuild_day: int
+
+    def __init__(self, accumulation_period: int, capacity: int = MIN_CAPACITY) -> None:
+        """
+        Инициализирует пустое хранилище.
+
+        Args:
+            accumulation_period: длина окна в днях, целое число от 1 до 2 ** 15.
+            capacity: начальное число ячеек, округляется вверх до степени двойки.
+
+        Raises:
+            ValueError, если accumulation_period не помещается в день uint16.
+        """
+        if not 1 <= accumulation_period <= 1 << 15:
+            raise ValueError(f"bad accumulation_period: {accumulation_period}")
+        self._accumulation_period = accumulation_period
+        self._day_counts = np.zeros(accumulation_period, dtype=np.int64)
+        self._users_amount = 0
+        self._current_day = 0
+        self._rebuild_day = 0
+        self._allocate(capacity)
+
+    @property
+    def users_amount(self) -> int:
+        """Число пользователей в окне."""
+        return self._users_amount
+
+    @property
+    def current_day(self) -> int:
+        """Номер следующего обрабатываемого дня."""
+        return self._current_day
+
+    @property
+    def capacity(self) -> int:
+        """Число ячеек таблицы."""
+        return len(self._used)
+
+    @property
+    def nbytes(self) -> int:
+        """Объем памяти, занимаемой массивами таблицы."""
+        return (
+            self._high.nbytes + self._low.nbytes + self._last_seen.nbytes
+            + self._used.nbytes + self._day_counts.nbytes
+        )
+
+    def add_day(self, users: Sequence[UUID]) -> None:
+        """Добавляет UUID пользователей, посетивших ресурс в текущий день."""
+        self.add_day_batch(uuids_to_ids(users))
+
+    def add_day_batch(self, ids: np.ndarray) -> None:
+        """
+        Добавляет пользователей, посетивших ресурс в текущий день, и сдвигает окно.
+
+        Args:
+            ids: массив формы (n, 2) типа uint64.
+        """
+        period = self._accumulation_period
+        day = self._current_day
+        slot = day % period
+        self._users_amount -= int(self._day_counts[slot])
+        self._day_counts[slot] = 0
+
+        batch = unique_ids(ids)
+        stale = self._size - self._users_amount
+        if (
+            self._size + len(batch) > self.MAX_LOAD * self.capacity
+            or stale > max(self._users_amount, self.MIN_CAPACITY)
+            or day - self._rebuild_day >= (1 << 16) - period
+        ):
+            self._rebuild(len(batch))
+
+        hashes = hash_ids(batch)
+        slots, found = self._find(batch, hashes)
+
+        found_slots = slots[found]
+        ages = self._ages(found_slots, day)
+        returning = ages < period
+        self._day_counts -= np.bincount(
+            (day - ages[returning]) % period, minlength=period
+        )
+        self._users_amount += len(batch) - int(np.count_nonzero(returning))
+        self._last_seen[found_slots] = day % (1 << 16)
+
+        new = ~found
+        self._insert(batch[new], slots[new], np.full(np.count_nonzero(new), day))
+        self._day_counts[slot] = len(batch)
+        self._current_day += 1
+
+    def export(self) -> tuple[np.ndarray, np.ndarray]:
+        """Идентификаторы пользователей окна и дни их последних визитов."""
+        slots = np.flatnonzero(self._used)
+        ages = self._ages(slots, self._current_day)
+        live = (ages >= 1) & (ages <= self._accumulation_period)
+        slots = slots[live]
+        ids = np.stack([self._high[slots], self._low[slots]], axis=1)
+        return ids, self._current_day - ages[live]
+
+    @classmethod
+    def restore(
+        cls,
+        accumulation_period: int,
+        current_day: int,
+        ids: np.ndarray,
+        last_seen: np.ndarray,
+    ) -> "ArrayUserTable":
+        """
+        Восстанавливает хранилище по результату export.
+
+        Args:
+            accumulation_period: длина окна в днях.
+            current_day: номер следующего обрабатываемого дня.
+            ids: идентификаторы пользователей окна без повторов.
+            last_seen: дни последних визитов пользователей окна.
+
+        Returns:
+            Восстановленное хранилище.
+        """
+        table = cls(accumulation_period, capacity=int(len(ids) / cls.MAX_LOAD) + 1)
+        table._current_day = current_day
+        table._rebuild_day = current_day
+        table._insert(ids, hash_ids(ids) & (table.capacity - 1), last_seen)
+        table._day_counts = np.bincount(
+            last_seen % accumulation_period, minlength=accumulation_period
+        ).astype(np.int64)
+        table._users_amount = len(ids)
+        return table
+
+    def _allocate(self, capacity: int) -> None:
+        """Создает пустые массивы на capacity ячеек (с округлением до степени двойки)."""
+        capacity = 1 << max(int(capacity) - 1, self.MIN_CAPACITY - 1).bit_length()
+        self._high = np.zeros(capacity, dtype=np.uint64)
+        self._low = np.zeros(capacity, dtype=np.uint64)
+        self._last_seen = np.zeros(capacity, dtype=np.uint16)
+        self._used = np.zeros(capacity, dtype=bool)
+        self._size = 0
+
+    def _ages(self, slots: np.ndarray, day: int) -> np.ndarray:
+        """Число дней от последнего визита до дня day для ячеек slots."""
+        ages = np.uint16(day % (1 << 16)) - self._last_seen[slots]
+        return ages.astype(np.int64)
+
+    def _rebuild(self, incoming: int) -> None:
+        """
+        Перестраивает таблицу, удаляя выбывших пользователей.
+
+        Емкость выбирается заново: наименьшая степень двойки (не меньше
+        MIN_CAPACITY), при которой пользователи окна и incoming новых
+        пользователей занимают не больше MAX_LOAD ячеек.
+        """
+        slots = np.flatnonzero(self._used)
+        ages = self._ages(slots, self._current_day)
+        slots = slots[(ages >= 1) & (ages < self._accumulation_period)]
+        ids = np.stack([self._high[slots], self._low[slots]], axis=1)
+        last_seen = self._current_day - self._ages(slots, self._current_day)
+
+        capacity = self.MIN_CAPACITY
+        while len(slots) + incoming > self.MAX_LOAD * capacity:
+            capacity *= 2
+        self._allocate(capacity)
+        self._insert(ids, hash_ids(ids) & (capacity - 1), last_seen)
+        self._rebuild_day = self._current_day
+
+    def _find(self, ids: np.ndarray, hashes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Ищет идентификаторы в таблице.
+
+        Returns:
+            Пару массивов: ячейки найденных идентификаторов (для ненайденных -
+            первая пустая ячейка на пути пробирования) и маску найденных.
+        """
+        mask = self.capacity - 1
+        slots = (hashes & np.uint64(mask)).astype(np.intp)
+        found = np.zeros(len(ids), dtype=bool)
+        pending = np.arange(len(ids))
+        while len(pending):
+            probe = slots[pending]
+            used = self._used[probe]
+            match = (
+                used
+                & (self._high[probe] == ids[pending, 0])
+                & (self._low[probe] == ids[pending, 1])
+            )
+            found[pending[match]] = True
+            pending = pending[used & ~match]
+            slots[pending] = (slots[pending] + 1) & mask
+        return slots, found
+
+    def _insert(self, ids: np.ndarray, slots: np.ndarray, last_seen: np.ndarray) -> None:
+        """
+        Вставляет отсутствующие в таблице идентификаторы.
+
+        Args:
+            ids: массив формы (n, 2) типа uint64 без повторов.
+            slots: начальные ячейки пробирования.
+            last_seen: дни последних визитов.
+        """
+        mask = self.capacity - 1
+        slots = np.asarray(slots, dtype=np.intp).copy()
+        pending = np.arange(len(ids))
+        while len(pending):
+            probe = slots[pending]
+            free = ~self._used[probe]
+            free_slots, first = np.unique(probe[free], return_index=True)
+            winners = pending[free][first]
+
+            self._high[free_slots] = ids[winners, 0]
+            self._low[free_slots] = ids[winners, 1]
+            self._last_seen[free_slots] = np.asarray(last_seen)[winners] % (1 << 16)
+            self._used[free_slots] = True
+            self._size += len(winners)
+
+            placed = np.zeros(len(ids), dtype=bool)
+            placed[winners] = True
+            pending = pending[~placed[pending]]
+            slots[pending] = (slots[pending] + 1) & mask
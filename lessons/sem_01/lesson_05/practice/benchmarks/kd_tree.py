@@ -0,0 +1,108 @@
+"""
+Сравнение поиска ближайших соседей по KD-дереву с полным перебором.
+
+Запуск из каталога lessons/sem_01/lesson_05/practice:
+
+    python -m benchmarks.kd_tree --output results.json
+
+Для каждой размерности dimensions и каждого размера выборки sizes строится
+KDTree по нормально распределенным точкам и измеряется среднее время поиска
+k ближайших соседей для queries случайных точек: по дереву и полным
+перебором (расстояния до всех точек и np.argpartition). Время запроса по
+дереву при малой размерности растет с n сублинейно, у перебора - линейно.
+"""
+import argparse
+import json
+import platform
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import numpy as np
+
+from regressors.kd_tree import KDTree
+
+
+@dataclass
+class Result:
+    """Время поиска соседей для выборки одного размера и размерности."""
+    dimension: int
+    points: int
+    k: int
+    build_seconds: float
+    tree_us_per_query: float
+    brute_us_per_query: float
+
+
+def brute_force(points: np.ndarray, point: np.ndarray, k: int) -> np.ndarray:
+    """Ищет индексы k ближайших соседей точки полным перебором."""
+    distances = ((points - point) ** 2).sum(axis=1)
+    return np.argpartition(distances, k - 1)[:k]
+
+
+def measure(dimension: int, size: int, k: int, queries: int) -> Result:
+    """Измеряет построение дерева и поиск соседей для одной выборки."""
+    rng = np.random.default_rng(0)
+    points = rng.standard_normal((size, dimension))
+    targets = rng.standard_normal((queries, dimension))
+
+    start = time.perf_counter()
+    tree = KDTree(points)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree.query_many(targets, k)
+    tree_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for target in targets:
+        brute_force(points, target, k)
+    brute_seconds = time.perf_counter() - start
+
+    return Result(
+        dimension=dimension,
+        points=size,
+        k=k,
+        build_seconds=build_seconds,
+        tree_us_per_query=tree_seconds / queries * 1e6,
+        brute_us_per_query=brute_seconds / queries * 1e6,
+    )
+
+
+def main(arguments: Optional[list[str]] = None) -> None:
+    """Разбирает аргументы командной строки и запускает бенчмарк."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dimensions", nargs="+", type=int, default=[2, 5, 10])
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--k", type=int, default=101)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--output", default="kd_tree_benchmark.json")
+    args = parser.parse_args(arguments)
+
+    results = []
+    for dimension in args.dimensions:
+        for size in args.sizes:
+            result = measure(dimension, size, args.k, args.queries)
+            print(
+                f"d={dimension:>2}, n={size:>9,}: build {result.build_seconds:.2f} s, "
+                f"tree {result.tree_us_per_query:,.0f} us/query, "
+                f"brute force {result.brute_us_per_query:,.0f} us/query"
+            )
+            results.append(result)
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "timestamp": time.time(),
+                "results": [asdict(result) for result in results],
+            },
+            file,
+            indent=2,
+        )
+
+
+if __name__ == "__main__":
+    main()
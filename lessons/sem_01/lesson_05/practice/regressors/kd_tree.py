@@ -0,0 +1,143 @@
+import numpy as np
+
+
+class KDTree:
+    """
+    KD-дерево для поиска ближайших соседей в евклидовом пространстве.
+
+    Узел делит свои точки медианой по координате с наибольшим разбросом.
+    Точки листа (не больше leaf_size) лежат в points подряд, поэтому
+    расстояния до них считаются одной векторной операцией. Поиск обходит
+    сначала ближнее поддерево и отсекает узлы, расстояние до ячейки которых
+    не меньше текущего k-го расстояния. Расстояние до ячейки обновляется
+    инкрементально: при переходе в дальнее поддерево меняется только
+    смещение по координате разбиения. При малой размерности запрос стоит
+    O(log n + k) вместо O(n) у полного перебора, с ростом размерности
+    отсечение слабеет.
+    """
+
+    points: np.ndarray
+    indices: np.ndarray
+    leaf_size: int
+    _starts: list
+    _ends: list
+    _dims: list
+    _values: list
+    _children: list
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 128):
+        """
+        Строит дерево.
+
+        Args:
+            points: массив точек формы (n, d).
+            leaf_size: наибольшее число точек в листе.
+
+        Raises:
+            ValueError, если points не двумерный массив или leaf_size не положителен.
+        """
+        points = np.asarray(points, dtype=float)
+        if points.ndim != 2:
+            raise ValueError(f"points must have shape (n, d), got {points.shape}")
+        if leaf_size <= 0:
+            raise ValueError(f"bad leaf_size: {leaf_size}")
+        self.points = points.copy()
+        self.indices = np.arange(len(points))
+        self.leaf_size = leaf_size
+        self._starts, self._ends, self._dims, self._values, self._children = [], [], [], [], []
+        if len(points):
+            self._build(0, len(points))
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    @property
+    def dimension(self) -> int:
+        return self.points.shape[1]
+
+    def _build(self, start: int, end: int) -> int:
+        node = len(self._starts)
+        self._starts.append(start)
+        self._ends.append(end)
+        self._dims.append(0)
+        self._values.append(0.0)
+        self._children.append(None)
+        if end - start <= self.leaf_size:
+            return node
+
+        points = self.points[start:end]
+        spread = points.max(axis=0) - points.min(axis=0)
+        dim = int(np.argmax(spread))
+        if spread[dim] == 0:
+            return node
+        middle = (start + end) // 2
+        order = np.argpartition(points[:, dim], middle - start)
+        self.points[start:end] = points[order]
+        self.indices[start:end] = self.indices[start:end][order]
+
+        self._dims[node] = dim
+        self._values[node] = float(self.points[middle, dim])
+        self._children[node] = (self._build(start, middle), self._build(middle, end))
+        return node
+
+    def query(self, point: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Ищет k ближайших соседей точки.
+
+        Args:
+            point: точка формы (d,).
+            k: число соседей.
+
+        Returns:
+            Расстояния до соседей по возрастанию и их индексы в исходном массиве.
+
+        Raises:
+            IndexError, если в дереве меньше k точек.
+        """
+        if k > len(self):
+            raise IndexError("k must not exceed the number of points")
+        coordinates = point.tolist()
+        best_distances, best_positions = np.empty(0), np.empty(0, dtype=int)
+        worst = np.inf
+        stack = [(0, 0.0, [0.0] * len(coordinates))]
+        while stack:
+            node, bound, offsets = stack.pop()
+            if bound >= worst:
+                continue
+            children = self._children[node]
+            if children is None:
+                start, end = self._starts[node], self._ends[node]
+                distances = np.concatenate(
+                    (best_distances, ((self.points[start:end] - point) ** 2).sum(axis=1))
+                )
+                positions = np.concatenate((best_positions, np.arange(start, end)))
+                if len(distances) > k:
+                    nearest = np.argpartition(distances, k - 1)[:k]
+                    distances, positions = distances[nearest], positions[nearest]
+                best_distances, best_positions = distances, positions
+                if len(distances) == k:
+                    worst = distances.max()
+                continue
+            dim = self._dims[node]
+            offset = coordinates[dim] - self._values[node]
+            near, far = children if offset < 0 else children[::-1]
+            far_offsets = offsets.copy()
+            far_offsets[dim] = offset * offset
+            stack.append((far, bound - offsets[dim] + far_offsets[dim], far_offsets))
+            stack.append((near, bound, offsets))
+
+        order = np.argsort(best_distances)
+        return np.sqrt(best_distances[order]), self.indices[best_positions[order]]
+
+    def query_many(self, points: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Ищет k ближайших соседей для каждой точки массива формы (m, d).
+
+        Returns:
+            Массивы расстояний и индексов формы (m, k).
+        """
+        distances = np.empty((len(points), k))
+        indices = np.empty((len(points), k), dtype=int)
+        for row, point in enumerate(points):
+            distances[row], indices[row] = self.query(point, k)
+        return distances, indices
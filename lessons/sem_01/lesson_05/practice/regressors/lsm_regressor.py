@@ -1,35 +1,132 @@
-from typing import Sequence, Union
+from typing import Iterable, Optional, Sequence, Union
 from numbers import Real
 
+import numpy as np
+
 from regressors.regressor_abc import RegressorABC
 
 
 class RegressorLSM(RegressorABC):
-    _train: list
-    _k: Real
-    _b: Real
+    """
+    Линейная регрессия методом наименьших квадратов.
+
+    Вместо выборки хранятся число точек, средние и центральные моменты:
+    сумма квадратов отклонений абсцисс и со-момент абсцисс и ординат.
+    Моменты части выборки считаются векторно и объединяются с накопленными
+    по формулам Чана - Уэлфорда, поэтому обучение по частям (partial_fit,
+    fit_iter) требует O(1) памяти и не теряет точность на данных с большим
+    смещением, в отличие от формулы sum(x^2) / n - mean(x)^2.
+    """
+
+    _count: int
+    _mean_x: float
+    _mean_y: float
+    _m2_x: float
+    _c_xy: float
+    _k: Optional[float]
+    _b: Optional[float]
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self) -> None:
+        self._count = 0
+        self._mean_x = self._mean_y = 0.0
+        self._m2_x = self._c_xy = 0.0
+        self._k = self._b = None
 
     def fit(self, abscissa: Sequence[Real], ordinates: Sequence[Real]) -> None:
-        self._train = list(zip(abscissa, ordinates))
-        sum_x = 0
-        sum_y = 0
-        sum_xy = 0
-        sum_x_sqr = 0
-        count_of_points = len(self._train)
-        for x,y in self._train:
-            sum_x += x
-            sum_y += y
-            sum_xy += x * y
-            sum_x_sqr += x**2
-        sum_x /= count_of_points
-        sum_y /= count_of_points
-        sum_x_sqr /= count_of_points
-        sum_xy /= count_of_points
-        self._k = (sum_xy - sum_x * sum_y) / (sum_x_sqr - sum_x**2)
-        self._b = (sum_y - self._k * sum_x)
-        pass
-
-    def predict(self, abscissa: Union[Real, Sequence[Real]]) -> list:
-        if isinstance(abscissa, list):
-            return [self._k * x + self._b for x in abscissa]
-        else: return self._k * abscissa + self._b
+        self._reset()
+        self.partial_fit(abscissa, ordinates)
+        self._check_fitted()
+
+    def fit_iter(self, chunks: Iterable[tuple[Sequence[Real], Sequence[Real]]]) -> None:
+        """
+        Обучает регрессор по потоку частей выборки.
+
+        Args:
+            chunks: итерируемый объект пар (абсциссы, ординаты), например
+                срезов np.memmap.
+
+        Raises:
+            ZeroDivisionError, если все абсциссы совпадают или выборка пуста.
+        """
+        self._reset()
+        for abscissa, ordinates in chunks:
+            self.partial_fit(abscissa, ordinates)
+        self._check_fitted()
+
+    def partial_fit(self, abscissa: Sequence[Real], ordinates: Sequence[Real]) -> None:
+        """
+        Дообучает регрессор на очередной части выборки.
+
+        Коэффициенты обновляются, как только среди накопленных абсцисс есть
+        различные.
+
+        Args:
+            abscissa: абсциссы точек части.
+            ordinates: ординаты точек части.
+
+        Raises:
+            ValueError, если абсциссы и ординаты - не одномерные
+                последовательности одной длины.
+        """
+        abscissa = np.asarray(abscissa, dtype=float)
+        ordinates = np.asarray(ordinates, dtype=float)
+        if abscissa.ndim != 1 or ordinates.shape != abscissa.shape:
+            raise ValueError(
+                f"abscissa and ordinates must be 1-D of equal length, "
+                f"got shapes {abscissa.shape} and {ordinates.shape}"
+            )
+        count = len(abscissa)
+        if count == 0:
+            return
+        mean_x = float(abscissa.mean())
+        mean_y = float(ordinates.mean())
+        deviations_x = abscissa - mean_x
+        m2_x = float(deviations_x @ deviations_x)
+        c_xy = float(deviations_x @ (ordinates - mean_y))
+
+        total = self._count + count
+        delta_x = mean_x - self._mean_x
+        delta_y = mean_y - self._mean_y
+        weight = self._count * count / total
+        self._m2_x += m2_x + delta_x * delta_x * weight
+        self._c_xy += c_xy + delta_x * delta_y * weight
+        self._mean_x += delta_x * count / total
+        self._mean_y += delta_y * count / total
+        self._count = total
+
+        if self._m2_x:
+            self._k = self._c_xy / self._m2_x
+            self._b = self._mean_y - self._k * self._mean_x
+
+    def _check_fitted(self) -> None:
+        if not self._m2_x:
+            raise ZeroDivisionError("all abscissas are equal or no points were given")
+
+    def predict(
+        self, abscissa: Union[Real, Sequence[Real], np.ndarray]
+    ) -> Union[float, list, np.ndarray]:
+        """
+        Аппроксимирует значение функции в переданных точках.
+
+        Args:
+            abscissa: точка или точки, см. RegressorABC.predict.
+
+        Returns:
+            Число для одной точки, массив NumPy для массива точек и список
+            для остальных последовательностей.
+
+        Raises:
+            RuntimeError, если коэффициенты ещё не определены: fit не вызывался
+                или среди переданных абсцисс нет различных.
+        """
+        if self._k is None:
+            raise RuntimeError("regressor is not fitted")
+        if isinstance(abscissa, Real):
+            return self._k * abscissa + self._b
+        predictions = self._k * np.asarray(abscissa, dtype=float) + self._b
+        if isinstance(abscissa, np.ndarray):
+            return predictions
+        return predictions.tolist()
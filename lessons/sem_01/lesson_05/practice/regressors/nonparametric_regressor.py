@@ -1,32 +1,397 @@
-from typing import Sequence, Union
+import copy
+import os
+import threading
+import weakref
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Union
 from numbers import Real
 
+import numpy as np
+
+from regressors.kd_tree import KDTree
 from regressors.regressor_abc import RegressorABC
+from regressors.shared_arrays import SharedArrays
+
+
+# Состояние процесса-работника параллельного предсказания: регрессор,
+# подключенные к нему обучающие массивы и массивы точек и результатов
+# последнего вызова (сегменты вызова отключаются при следующем вызове).
+_worker_regressor: Optional["NonparametricRegressor"] = None
+_worker_training: Optional[SharedArrays] = None
+_worker_call: Optional[SharedArrays] = None
+
+
+def _init_worker(regressor: "NonparametricRegressor", spec: dict) -> None:
+    global _worker_regressor, _worker_training
+    _worker_training = SharedArrays.attach(spec)
+    regressor._attach(_worker_training)
+    _worker_regressor = regressor
+
+
+def _predict_chunk(spec: dict, start: int, stop: int) -> None:
+    global _worker_call
+    if _worker_call is None or _worker_call.spec != spec:
+        if _worker_call is not None:
+            _worker_call.close()
+        _worker_call = SharedArrays.attach(spec)
+    queries = _worker_call["queries"][start:stop]
+    _worker_call["output"][start:stop] = _worker_regressor.predict(queries)
+
+
+class _ParallelPool:
+    """
+    Пул процессов с обучающими массивами регрессора в разделяемой памяти.
+
+    Создается при первом параллельном предсказании и живет до повторного
+    обучения, смены n_jobs или закрытия регрессора. Вызовы предсказания
+    через один пул выполняются по очереди.
+    """
+
+    n_jobs: int
+    training: SharedArrays
+    executor: ProcessPoolExecutor
+    lock: threading.Lock
+
+    def __init__(self, regressor: "NonparametricRegressor", n_jobs: int):
+        light, arrays = regressor._share()
+        self.n_jobs = n_jobs
+        self.training = SharedArrays(arrays)
+        self.executor = ProcessPoolExecutor(
+            n_jobs, initializer=_init_worker, initargs=(light, self.training.spec)
+        )
+        self.lock = threading.Lock()
+
+    def map(self, queries: np.ndarray, chunk: int) -> np.ndarray:
+        """Вычисляет предсказания для queries частями по chunk точек."""
+        with self.lock, SharedArrays(
+            {"queries": queries, "output": np.empty(len(queries))}
+        ) as call:
+            starts = range(0, len(queries), chunk)
+            stops = [min(start + chunk, len(queries)) for start in starts]
+            list(self.executor.map(_predict_chunk, [call.spec] * len(stops), starts, stops))
+            return call["output"].copy()
+
+    def close(self) -> None:
+        """Останавливает процессы и удаляет сегменты обучающих массивов."""
+        self.executor.shutdown()
+        self.training.close()
+        self.training.unlink()
 
 
 class NonparametricRegressor(RegressorABC):
+    """
+    Непараметрическая регрессия Надарая - Ватсона с ядром Епанечникова.
+
+    Ширина окна в точке x - расстояние до (k + 1)-го ближайшего соседа, поэтому
+    ненулевой вклад дают только k ближайших точек. Обучающая выборка хранится
+    упорядоченной по абсциссе: соседи одной точки находятся бинарным поиском
+    и расширением двумя указателями за O(log n + k), а для упорядоченной
+    последовательности точек окно соседей сдвигается монотонно, и вся
+    последовательность обрабатывается за O(n + m * k).
+
+    Массив NumPy точек обрабатывается векторно блоками по block_size точек,
+    и результат возвращается массивом той же формы.
+
+    Если при обучении передан массив признаков формы (n, d), расстояние
+    евклидово, а соседи ищутся по KD-дереву; предсказание для массива формы
+    (m, d) - массив формы (m,), для одной точки формы (d,) - число.
+
+    С параметром n_jobs массив не меньше чем из parallel_threshold точек
+    делится на части, которые обрабатывают n_jobs процессов. Обучающие
+    массивы, точки и результаты лежат в разделяемой памяти, поэтому задача
+    работнику - только границы своей части. Пул процессов и сегменты
+    обучающих массивов создаются при первом таком вызове и переиспользуются
+    последующими; они освобождаются методом close, при повторном fit, при
+    смене n_jobs, при удалении регрессора сборщиком мусора и при завершении
+    интерпретатора. Регрессор можно использовать как контекстный менеджер,
+    закрывающий их при выходе.
+    """
+
     _k: int
+    _block_size: int
     train: list
-    def __init__(self, k: int):
+    _abscissa: list
+    _ordinates: list
+    _abscissa_array: np.ndarray
+    _ordinates_array: np.ndarray
+    _tree: Optional[KDTree]
+    _parallel_threshold: int
+    _pool: Optional[_ParallelPool]
+    _pool_finalizer: Optional[weakref.finalize]
+
+    def __init__(self, k: int, block_size: int = 4096, parallel_threshold: int = 100_000):
+        """
+        Инициализирует регрессор.
+
+        Args:
+            k: число соседей, по которым строится оценка.
+            block_size: число точек массива, обрабатываемых за один шаг
+                векторного предсказания; память шага - O(block_size * k).
+            parallel_threshold: наименьшее число точек, которые predict с
+                n_jobs > 1 обрабатывает в процессах; меньшие массивы
+                обрабатываются в текущем процессе.
+        """
+        if block_size <= 0:
+            raise ValueError(f"bad block_size: {block_size}")
         self._k = k
+        self._block_size = block_size
+        self._parallel_threshold = parallel_threshold
+        self._pool = None
+        self._pool_finalizer = None
         self.train = []
-    def fit(self, abscissa: Sequence[Real], ordinates: Sequence[Real]) -> None:
-        self.train = list(zip(abscissa, ordinates))
+        self._abscissa = []
+        self._ordinates = []
+        self._abscissa_array = np.empty(0)
+        self._ordinates_array = np.empty(0)
+        self._tree = None
+
+    def fit(
+        self, abscissa: Union[Sequence[Real], np.ndarray], ordinates: Sequence[Real]
+    ) -> None:
+        """
+        Обучает регрессор, см. RegressorABC.fit.
+
+        Raises:
+            ValueError, если abscissa не последовательность чисел и не массив
+                формы (n, d) или число ординат не равно числу точек.
+        """
+        abscissa = np.asarray(abscissa, dtype=float)
+        ordinates = np.asarray(ordinates, dtype=float)
+        if abscissa.ndim not in (1, 2) or ordinates.shape != abscissa.shape[:1]:
+            raise ValueError(
+                f"expected one ordinate per point of abscissa with shape {abscissa.shape}, "
+                f"got ordinates with shape {ordinates.shape}"
+            )
+        self.close()
+        if abscissa.ndim == 2:
+            self._tree = KDTree(abscissa)
+            self._ordinates_array = ordinates
+            self._abscissa_array = np.empty(0)
+            self.train, self._abscissa, self._ordinates = [], [], []
+            return
+        self._tree = None
+        order = np.argsort(abscissa, kind="stable")
+        self._abscissa_array = abscissa[order]
+        self._ordinates_array = ordinates[order]
+        self._abscissa = self._abscissa_array.tolist()
+        self._ordinates = self._ordinates_array.tolist()
+        self.train = list(zip(self._abscissa, self._ordinates))
 
-    def predict(self, abscissa: Union[Real, Sequence[Real]]) -> list:
+    def predict(
+        self,
+        abscissa: Union[Real, Sequence[Real], np.ndarray],
+        n_jobs: Optional[int] = None,
+    ) -> Union[list, np.ndarray]:
+        """
+        Аппроксимирует значение функции в переданных точках.
+
+        Args:
+            abscissa: точка или точки, см. RegressorABC.predict.
+            n_jobs: число процессов (-1 - по числу процессоров); если задано,
+                последовательность точек обрабатывается как массив NumPy.
+
+        Returns:
+            Аппроксимации: число, список или массив NumPy.
+
+        Raises:
+            ValueError, если n_jobs равно 0 или меньше -1.
+        """
+        if n_jobs is not None and not isinstance(abscissa, Real):
+            return self._predict_parallel(np.asarray(abscissa, dtype=float), n_jobs)
+        if self._tree is not None:
+            return self._predict_features(np.asarray(abscissa, dtype=float))
+        if isinstance(abscissa, np.ndarray):
+            return self._predict_array(abscissa)
         if isinstance(abscissa, Real):
             return self._predict(abscissa)
+        if all(a <= b for a, b in zip(abscissa, abscissa[1:])):
+            return self._predict_sorted(abscissa)
         return [self._predict(x) for x in abscissa]
 
     def _predict(self, x: Real):
+        xs = self._abscissa
+        left = bisect_left(xs, x)
+        right = left
+        for _ in range(self._k + 1):
+            if right < len(xs) and (left == 0 or xs[right] - x < x - xs[left - 1]):
+                right += 1
+            else:
+                left -= 1
+        if left < 0:
+            raise IndexError("k must be less than the number of training points")
+        return self._estimate(x, left, right)
+
+    def _predict_sorted(self, abscissa: Sequence[Real]) -> list:
+        """
+        Аппроксимирует значения в неубывающей последовательности точек.
+
+        Окно из k + 1 ближайших соседей [left, left + k] при движении точки
+        вправо только сдвигается вправо, поэтому суммарно сдвигов не больше n.
+        """
+        xs = self._abscissa
+        width = self._k + 1
+        if width > len(xs):
+            raise IndexError("k must be less than the number of training points")
+        left = 0
+        predictions = []
+        for x in abscissa:
+            while left + width < len(xs) and xs[left + width] - x < x - xs[left]:
+                left += 1
+            predictions.append(self._estimate(x, left, left + width))
+        return predictions
+
+    def _predict_array(self, abscissa: np.ndarray) -> np.ndarray:
+        """
+        Аппроксимирует значения в массиве точек векторно.
+
+        k + 1 ближайших соседей точки лежат среди 2k + 2 точек обучающей
+        выборки вокруг места ее вставки, найденного np.searchsorted. Ширина
+        окна - (k + 1)-е наименьшее расстояние до кандидатов (np.partition),
+        веса кандидатов за пределами окна ядро обнуляет.
+        """
+        xs, ys = self._abscissa_array, self._ordinates_array
+        if self._k >= len(xs):
+            raise IndexError("k must be less than the number of training points")
+        width = min(len(xs), 2 * (self._k + 1))
+        offsets = np.arange(width)
+
+        queries = np.asarray(abscissa, dtype=float).reshape(-1)
+        predictions = np.empty(len(queries))
+        for start in range(0, len(queries), self._block_size):
+            block = queries[start:start + self._block_size]
+            first = np.clip(np.searchsorted(xs, block) - self._k - 1, 0, len(xs) - width)
+            neighbours = first[:, np.newaxis] + offsets
+            distances = np.abs(block[:, np.newaxis] - xs[neighbours])
+            h = np.partition(distances, self._k, axis=1)[:, self._k]
+            predictions[start:start + len(block)] = self._weighted_mean(
+                distances, h, ys[neighbours]
+            )
+        return predictions.reshape(np.shape(abscissa))
+
+    def _predict_features(self, features: np.ndarray) -> Union[float, np.ndarray]:
+        """Аппроксимирует значения в точках формы (m, d) или (d,) по KD-дереву."""
+        tree = self._tree
+        if features.ndim not in (1, 2) or features.shape[-1] != tree.dimension:
+            raise ValueError(
+                f"expected features of dimension {tree.dimension}, got shape {features.shape}"
+            )
+        if self._k >= len(tree):
+            raise IndexError("k must be less than the number of training points")
+
+        queries = features.reshape(-1, tree.dimension)
+        predictions = np.empty(len(queries))
+        for start in range(0, len(queries), self._block_size):
+            distances, neighbours = tree.query_many(
+                queries[start:start + self._block_size], self._k + 1
+            )
+            predictions[start:start + len(distances)] = self._weighted_mean(
+                distances, distances[:, self._k], self._ordinates_array[neighbours]
+            )
+        if features.ndim == 1:
+            return float(predictions[0])
+        return predictions
+
+    def _predict_parallel(
+        self, abscissa: np.ndarray, n_jobs: int
+    ) -> Union[float, np.ndarray]:
+        """Делит массив точек на части и обрабатывает их в n_jobs процессах."""
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        if n_jobs <= 0:
+            raise ValueError(f"bad n_jobs: {n_jobs}")
+        if self._tree is not None and abscissa.ndim != 2:
+            return self.predict(abscissa)
+        queries = abscissa if self._tree is not None else abscissa.reshape(-1)
+        chunk = max(self._block_size, -(-len(queries) // (4 * n_jobs)))
+        if n_jobs == 1 or len(queries) <= chunk or len(queries) < self._parallel_threshold:
+            return self.predict(abscissa)
+
+        if self._pool is not None and self._pool.n_jobs != n_jobs:
+            self.close()
+        if self._pool is None:
+            self._pool = _ParallelPool(self, n_jobs)
+            self._pool_finalizer = weakref.finalize(self, self._pool.close)
+        predictions = self._pool.map(queries, chunk)
+        if self._tree is not None:
+            return predictions
+        return predictions.reshape(abscissa.shape)
 
-        ro = [(abs(x - xi), yi) for xi, yi in self.train]
-        ro.sort()
+    def _share(self) -> tuple["NonparametricRegressor", dict]:
+        """
+        Отделяет обучающие массивы для передачи работникам.
 
-        h = ro[self._k][0]
-        K = [self._K(roi / h) for roi, _ in ro]
+        Returns:
+            Копию регрессора без обучающих данных и словарь массивов, которые
+            работник подключает методом _attach.
+        """
+        regressor = copy.copy(self)
+        regressor._pool = regressor._pool_finalizer = None
+        regressor.train, regressor._abscissa, regressor._ordinates = [], [], []
+        regressor._abscissa_array = regressor._ordinates_array = None
+        arrays = {"ordinates": self._ordinates_array}
+        if self._tree is None:
+            arrays["abscissa"] = self._abscissa_array
+        else:
+            regressor._tree = copy.copy(self._tree)
+            regressor._tree.points = regressor._tree.indices = None
+            arrays["points"] = self._tree.points
+            arrays["indices"] = self._tree.indices
+        return regressor, arrays
 
-        y = sum(ro[i][1] * K[i] for i in range(len(ro)))
+    def close(self) -> None:
+        """Останавливает процессы параллельного предсказания и освобождает их память."""
+        if self._pool_finalizer is not None:
+            self._pool_finalizer()
+        self._pool = self._pool_finalizer = None
+
+    def __enter__(self) -> "NonparametricRegressor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _attach(self, shared: SharedArrays) -> None:
+        """Подключает обучающие массивы, отделенные методом _share."""
+        self._ordinates_array = shared["ordinates"]
+        if self._tree is None:
+            self._abscissa_array = shared["abscissa"]
+        else:
+            self._tree.points = shared["points"]
+            self._tree.indices = shared["indices"]
+
+    @classmethod
+    def _weighted_mean(
+        cls, distances: np.ndarray, h: np.ndarray, ordinates: np.ndarray
+    ) -> np.ndarray:
+        """
+        Вычисляет оценки для блока точек по расстояниям до кандидатов в соседи.
+
+        Args:
+            distances: расстояния от точек до кандидатов, форма (b, w).
+            h: ширина окна для каждой точки, форма (b,).
+            ordinates: ординаты кандидатов, форма (b, w).
+
+        Returns:
+            Оценки формы (b,).
+
+        Raises:
+            ZeroDivisionError, если сумма весов какой-либо точки равна нулю.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            K = cls._K_array(distances / h[:, np.newaxis])
+        total = K.sum(axis=1)
+        if not total.all():
+            raise ZeroDivisionError("float division by zero")
+        return (K * ordinates).sum(axis=1) / total
+
+    def _estimate(self, x: Real, left: int, right: int):
+        """Вычисляет оценку в точке x по k + 1 ближайшим соседям xs[left:right]."""
+        xs, ys = self._abscissa, self._ordinates
+        h = max(x - xs[left], xs[right - 1] - x)
+        K = [self._K((x - xs[i]) / h) for i in range(left, right)]
+
+        y = sum(ys[i] * K[i - left] for i in range(left, right))
         y /= sum(K)
         return y
 
@@ -34,4 +399,8 @@ class NonparametricRegressor(RegressorABC):
     def _K(x):
         if abs(x) <= 1:
             return 3/4 * (1 - x ** 2)
-        return 0
\ No newline at end of file
+        return 0
+
+    @staticmethod
+    def _K_array(x: np.ndarray) -> np.ndarray:
+        return np.where(np.abs(x) <= 1, 3/4 * (1 - x ** 2), 0.0)
@@ -15,7 +15,8 @@ class RegressorABC(abc.ABC):
         Обучает регрессор, используя данные обучающей выборки.
 
         Args:
-            abscissa: последовательность абсцисс точек.
+            abscissa: последовательность абсцисс точек или, если регрессор
+                поддерживает многомерные признаки, массив признаков формы (n, d).
             ordinates: последовательность ординат точек.
         """
         
@@ -30,9 +31,11 @@ class RegressorABC(abc.ABC):
         Args:
             abscissa: число - одна точка, или последовательность точек,
                 в которых необходимо аппроксимировать значение функции.
+                Для регрессора, обученного на признаках формы (n, d), - точка
+                формы (d,) или массив точек формы (m, d).
 
         Returns:
-            Список аппроксимаций.
+            Список аппроксимаций (массив, если передан массив точек).
 
         Raises:
             RuntimeError, если predict вызван до вызова fit.
@@ -0,0 +1,88 @@
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Optional
+
+import numpy as np
+
+
+class SharedArrays:
+    """
+    Именованные массивы NumPy в разделяемой памяти multiprocessing.shared_memory.
+
+    Владелец создает по сегменту на массив и копирует в него данные один раз.
+    Другие процессы подключаются к сегментам по описанию spec (имя сегмента,
+    форма и dtype каждого массива), поэтому содержимое массивов не
+    сериализуется pickle при передаче задач. Сегменты удаляются владельцем
+    при выходе из контекста.
+    """
+
+    spec: dict
+    arrays: dict
+    _memories: list
+    _owner: bool
+
+    def __init__(self, arrays: Optional[dict] = None):
+        """
+        Копирует массивы в новые сегменты разделяемой памяти.
+
+        Args:
+            arrays: словарь имя -> массив.
+        """
+        self.spec, self.arrays, self._memories = {}, {}, []
+        self._owner = True
+        for name, array in (arrays or {}).items():
+            array = np.ascontiguousarray(array)
+            memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+            self._add(name, memory, array.shape, array.dtype.str)
+            self.arrays[name][...] = array
+
+    @classmethod
+    def attach(cls, spec: dict) -> "SharedArrays":
+        """
+        Подключается к массивам, созданным в другом процессе.
+
+        Args:
+            spec: описание массивов из атрибута spec владельца.
+
+        Returns:
+            Массивы, отображенные на те же сегменты без копирования.
+        """
+        shared = cls()
+        shared._owner = False
+        for name, (segment, shape, dtype) in spec.items():
+            memory = SharedMemory(segment)
+            # Сегменты удаляет владелец, а не resource_tracker при выходе процесса.
+            resource_tracker.unregister(memory._name, "shared_memory")
+            shared._add(name, memory, shape, dtype)
+        return shared
+
+    def _add(self, name: str, memory: SharedMemory, shape: tuple, dtype: str) -> None:
+        self._memories.append(memory)
+        self.spec[name] = (memory.name, shape, dtype)
+        self.arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=memory.buf)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def close(self) -> None:
+        """Отключается от сегментов в этом процессе."""
+        self.arrays = {}
+        for memory in self._memories:
+            memory.close()
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def unlink(self) -> None:
+        """Удаляет сегменты; у процесса, не владеющего ими, ничего не делает."""
+        if not self._owner:
+            return
+        for memory in self._memories:
+            # Подключение работника снимает сегмент с учета, unlink ожидает его там.
+            resource_tracker.register(memory._name, "shared_memory")
+            memory.unlink()
+        self._memories = []
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+        self.unlink()
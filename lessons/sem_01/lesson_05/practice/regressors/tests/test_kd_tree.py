@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from regressors.kd_tree import KDTree
+
+
+class TestKDTree:
+    @pytest.mark.parametrize("leaf_size", [1, 8, 128])
+    @pytest.mark.parametrize("dimension", [1, 2, 5, 10])
+    def test_matches_brute_force(self, dimension: int, leaf_size: int) -> None:
+        rng = np.random.default_rng(dimension)
+        points = rng.standard_normal((500, dimension))
+        tree = KDTree(points, leaf_size=leaf_size)
+
+        for point in rng.standard_normal((20, dimension)):
+            distances = np.sqrt(((points - point) ** 2).sum(axis=1))
+            for k in (1, 7, 500):
+                found, indices = tree.query(point, k)
+                np.testing.assert_allclose(found, np.sort(distances)[:k])
+                np.testing.assert_allclose(distances[indices], found)
+                assert len(set(indices.tolist())) == k
+
+    def test_duplicate_points(self) -> None:
+        tree = KDTree(np.zeros((100, 3)), leaf_size=4)
+
+        distances, indices = tree.query(np.ones(3), 5)
+
+        np.testing.assert_allclose(distances, np.sqrt(3))
+        assert len(set(indices.tolist())) == 5
+
+    def test_query_many(self) -> None:
+        rng = np.random.default_rng(0)
+        tree = KDTree(rng.standard_normal((200, 2)), leaf_size=16)
+        targets = rng.standard_normal((10, 2))
+
+        distances, indices = tree.query_many(targets, 3)
+
+        assert distances.shape == indices.shape == (10, 3)
+        for row, target in enumerate(targets):
+            np.testing.assert_array_equal(tree.query(target, 3)[1], indices[row])
+
+    @pytest.mark.parametrize(
+        "points,leaf_size", [(np.zeros(3), 8), (np.zeros((3, 2)), 0)], ids=["1d", "leaf"]
+    )
+    def test_bad_arguments(self, points: np.ndarray, leaf_size: int) -> None:
+        with pytest.raises(ValueError):
+            _ = KDTree(points, leaf_size=leaf_size)
+
+    def test_too_many_neighbours(self) -> None:
+        with pytest.raises(IndexError):
+            _ = KDTree(np.zeros((3, 2))).query(np.zeros(2), 4)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from regressors.lsm_regressor import RegressorLSM
+
+
+def sample(seed: int, size: int, offset: float = 0.0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    abscissa = offset + rng.uniform(-10, 10, size)
+    return abscissa, 2.5 * (abscissa - offset) - 1 + rng.standard_normal(size)
+
+
+def exact_coefficients(abscissa: np.ndarray, ordinates: np.ndarray) -> tuple[float, float]:
+    """Коэффициенты МНК по центрированным данным: полный проход без накопления."""
+    mean_x, mean_y = abscissa.mean(), ordinates.mean()
+    k = ((abscissa - mean_x) * (ordinates - mean_y)).sum() / ((abscissa - mean_x) ** 2).sum()
+    return k, mean_y - k * mean_x
+
+
+def chunks(abscissa: np.ndarray, ordinates: np.ndarray, size: int):
+    for start in range(0, len(abscissa), size):
+        yield abscissa[start:start + size], ordinates[start:start + size]
+
+
+class TestRegressorLSM:
+    # При смещении 1e9 сами абсциссы в float64 известны с точностью ~1e-7,
+    # формула sum(x^2) / n - mean(x)^2 на таких данных теряет все знаки.
+    @pytest.mark.parametrize("offset,rel,atol", [(0.0, 1e-12, 1e-12), (1e9, 1e-7, 1e-5)])
+    def test_fit_iter_and_partial_fit_match_fit(
+        self, offset: float, rel: float, atol: float
+    ) -> None:
+        abscissa, ordinates = sample(0, 500, offset)
+        points = abscissa[:10]
+        k, b = exact_coefficients(abscissa, ordinates)
+        expected = k * points + b
+
+        whole = RegressorLSM()
+        whole.fit(abscissa, ordinates)
+        streamed = RegressorLSM()
+        streamed.fit_iter(chunks(abscissa, ordinates, 37))
+        by_point = RegressorLSM()
+        for x, y in chunks(abscissa, ordinates, 1):
+            by_point.partial_fit(x, y)
+
+        for regressor in (whole, streamed, by_point):
+            assert regressor._k == pytest.approx(k, rel=rel)
+            np.testing.assert_allclose(regressor.predict(points), expected, atol=atol)
+
+    def test_predict_types(self) -> None:
+        regressor = RegressorLSM()
+        regressor.fit([0, 1, 2], [1, 3, 5])
+
+        assert regressor.predict(3) == pytest.approx(7)
+        assert regressor.predict((0, 1)) == pytest.approx([1, 3])
+        assert isinstance(regressor.predict([0, 1]), list)
+        predictions = regressor.predict(np.array([[0.0], [1.0]]))
+        assert isinstance(predictions, np.ndarray)
+        np.testing.assert_allclose(predictions, [[1.0], [3.0]])
+
+    @pytest.mark.parametrize("abscissa,ordinates", [([], []), ([1, 1, 1], [1, 2, 3])])
+    def test_degenerate_sample(self, abscissa: list, ordinates: list) -> None:
+        regressor = RegressorLSM()
+
+        with pytest.raises(ZeroDivisionError):
+            regressor.fit(abscissa, ordinates)
+        with pytest.raises(ZeroDivisionError):
+            regressor.fit_iter([(abscissa, ordinates)])
+        with pytest.raises(RuntimeError):
+            _ = regressor.predict(1)
+
+    def test_predict_before_fit(self) -> None:
+        regressor = RegressorLSM()
+
+        with pytest.raises(RuntimeError):
+            _ = regressor.predict([1.0])
+        regressor.partial_fit([2.0], [1.0])
+        with pytest.raises(RuntimeError):
+            _ = regressor.predict([1.0])
+        regressor.partial_fit([3.0], [2.0])
+        assert regressor.predict([4.0]) == pytest.approx([3.0])
+
+    @pytest.mark.parametrize(
+        "abscissa,ordinates", [([1, 2, 3], [1, 2]), ([], [1]), ([[1, 2]], [[1, 2]])]
+    )
+    def test_length_mismatch(self, abscissa: list, ordinates: list) -> None:
+        regressor = RegressorLSM()
+
+        with pytest.raises(ValueError):
+            regressor.partial_fit(abscissa, ordinates)
+        with pytest.raises(ValueError):
+            regressor.fit(abscissa, ordinates)
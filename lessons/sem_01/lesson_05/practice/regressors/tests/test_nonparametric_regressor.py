@@ -0,0 +1,212 @@
+import pickle
+import random
+from typing import Sequence
+
+import numpy as np
+import pytest
+
+from regressors.nonparametric_regressor import NonparametricRegressor
+
+
+def kernel(x: float) -> float:
+    return 3/4 * (1 - x ** 2) if abs(x) <= 1 else 0
+
+
+def naive_predict(
+    abscissa: Sequence[float], ordinates: Sequence[float], k: int, x: float
+) -> float:
+    """Оценка Надарая - Ватсона полным перебором: сортировка всех расстояний до x."""
+    distances = sorted((abs(x - xi), yi) for xi, yi in zip(abscissa, ordinates))
+    h = distances[k][0]
+    weights = [kernel(distance / h) for distance, _ in distances]
+    return sum(y * weight for (_, y), weight in zip(distances, weights)) / sum(weights)
+
+
+def naive_predict_features(
+    features: np.ndarray, ordinates: np.ndarray, k: int, point: np.ndarray
+) -> float:
+    """Оценка по признакам полным перебором евклидовых расстояний."""
+    distances = np.sqrt(((features - point) ** 2).sum(axis=1))
+    h = np.sort(distances)[k]
+    weights = np.array([kernel(distance / h) for distance in distances])
+    return float((weights * ordinates).sum() / weights.sum())
+
+
+def sample(seed: int, size: int, ties: bool = False) -> tuple[list, list]:
+    rng = random.Random(seed)
+    abscissa = [rng.uniform(-10, 10) for _ in range(size)]
+    if ties:
+        abscissa = [float(round(x)) for x in abscissa]
+    return abscissa, [rng.uniform(-5, 5) for _ in range(size)]
+
+
+def queries(seed: int, amount: int) -> list[float]:
+    rng = random.Random(seed)
+    return [rng.uniform(-12, 12) + 0.001 for _ in range(amount)]
+
+
+CASES = [
+    (seed, size, k) for seed, (size, k) in enumerate([(5, 1), (50, 7), (300, 100), (300, 299)])
+]
+
+
+class TestNonparametricRegressor:
+    @pytest.mark.parametrize("ties", [False, True], ids=["distinct", "ties"])
+    @pytest.mark.parametrize("seed,size,k", CASES)
+    def test_single_points_match_naive(self, seed: int, size: int, k: int, ties: bool) -> None:
+        abscissa, ordinates = sample(seed, size, ties)
+        regressor = NonparametricRegressor(k)
+        regressor.fit(abscissa, ordinates)
+
+        for x in queries(seed, 30):
+            assert regressor.predict(x) == pytest.approx(
+                naive_predict(abscissa, ordinates, k, x), abs=1e-9
+            )
+
+    @pytest.mark.parametrize("seed,size,k", CASES)
+    def test_sequences_match_naive(self, seed: int, size: int, k: int) -> None:
+        abscissa, ordinates = sample(seed, size)
+        regressor = NonparametricRegressor(k)
+        regressor.fit(abscissa, ordinates)
+        points = queries(seed, 100)
+
+        for sequence in (points, sorted(points)):
+            expected = [naive_predict(abscissa, ordinates, k, x) for x in sequence]
+            predictions = regressor.predict(sequence)
+            assert isinstance(predictions, list)
+            assert predictions == pytest.approx(expected, abs=1e-9)
+
+    @pytest.mark.parametrize("block_size", [1, 7, 4096])
+    @pytest.mark.parametrize("seed,size,k", CASES)
+    def test_arrays_match_naive(self, seed: int, size: int, k: int, block_size: int) -> None:
+        abscissa, ordinates = sample(seed, size, ties=seed % 2 == 1)
+        regressor = NonparametricRegressor(k, block_size=block_size)
+        regressor.fit(np.array(abscissa), np.array(ordinates))
+        points = np.array(queries(seed, 60)).reshape(3, 20)
+
+        predictions = regressor.predict(points)
+
+        expected = [[naive_predict(abscissa, ordinates, k, x) for x in row] for row in points]
+        assert isinstance(predictions, np.ndarray) and predictions.shape == (3, 20)
+        np.testing.assert_allclose(predictions, expected, atol=1e-9)
+
+    def test_bad_block_size(self) -> None:
+        with pytest.raises(ValueError):
+            _ = NonparametricRegressor(2, block_size=0)
+
+    @pytest.mark.parametrize(
+        "points",
+        [0.0, [0.0], [-1.0, 0.0], np.array([0.5, 0.0])],
+        ids=["point", "one", "sorted", "array"],
+    )
+    def test_zero_bandwidth(self, points: object) -> None:
+        regressor = NonparametricRegressor(2)
+        regressor.fit([0.0, 0.0, 0.0, 1.0], [1.0, 2.0, 3.0, 4.0])
+
+        with pytest.raises(ZeroDivisionError):
+            _ = regressor.predict(points)
+
+    @pytest.mark.parametrize("points", [0.0, [0.0, 1.0], [1.0, 0.0], np.array([0.0])])
+    def test_too_few_training_points(self, points: object) -> None:
+        regressor = NonparametricRegressor(3)
+        regressor.fit([0.0, 1.0, 2.0], [0.0, 1.0, 2.0])
+
+        with pytest.raises(IndexError):
+            _ = regressor.predict(points)
+
+    @pytest.mark.parametrize("abscissa", [[1.0, 2.0, 3.0], np.zeros((3, 2))], ids=["1d", "2d"])
+    def test_fit_rejects_length_mismatch(self, abscissa: object) -> None:
+        with pytest.raises(ValueError):
+            NonparametricRegressor(1).fit(abscissa, [1.0, 2.0])
+
+
+class TestNonparametricRegressorFeatures:
+    @pytest.mark.parametrize("block_size", [3, 4096])
+    @pytest.mark.parametrize("dimension,k", [(1, 5), (2, 10), (5, 30)])
+    def test_matches_naive(self, dimension: int, k: int, block_size: int) -> None:
+        rng = np.random.default_rng(dimension)
+        features = rng.uniform(-3, 3, (400, dimension))
+        ordinates = np.sin(features).sum(axis=1) + 0.1 * rng.standard_normal(400)
+        regressor = NonparametricRegressor(k, block_size=block_size)
+        regressor.fit(features, ordinates)
+        points = rng.uniform(-3, 3, (25, dimension))
+
+        predictions = regressor.predict(points)
+
+        expected = [naive_predict_features(features, ordinates, k, point) for point in points]
+        assert predictions.shape == (25,)
+        np.testing.assert_allclose(predictions, expected, atol=1e-9)
+        assert regressor.predict(points[0]) == pytest.approx(expected[0], abs=1e-9)
+        assert regressor.predict(points[:2].tolist()) == pytest.approx(expected[:2], abs=1e-9)
+
+    def test_refit_drops_scalar_training_data(self) -> None:
+        rng = np.random.default_rng(0)
+        regressor = NonparametricRegressor(5)
+        regressor.fit(rng.standard_normal(100_000), rng.standard_normal(100_000))
+        regressor.fit(rng.standard_normal((100, 2)), rng.standard_normal(100))
+
+        light, arrays = regressor._share()
+
+        assert regressor._abscissa_array.size == 0
+        assert regressor.train == regressor._abscissa == regressor._ordinates == []
+        assert set(arrays) == {"ordinates", "points", "indices"}
+        assert len(pickle.dumps(light)) < 10_000
+
+    def test_dimension_mismatch(self) -> None:
+        regressor = NonparametricRegressor(1)
+        regressor.fit(np.zeros((3, 2)), [1.0, 2.0, 3.0])
+
+        with pytest.raises(ValueError):
+            _ = regressor.predict(np.zeros((4, 3)))
+
+    def test_zero_bandwidth(self) -> None:
+        regressor = NonparametricRegressor(2)
+        regressor.fit(np.array([[0.0, 0.0]] * 3 + [[1.0, 1.0]]), [1.0, 2.0, 3.0, 4.0])
+
+        with pytest.raises(ZeroDivisionError):
+            _ = regressor.predict(np.zeros((1, 2)))
+
+
+class TestNonparametricRegressorParallel:
+    @pytest.mark.parametrize("dimension", [None, 2], ids=["scalar", "features"])
+    def test_matches_serial_and_reuses_pool(self, dimension: object) -> None:
+        rng = np.random.default_rng(0)
+        shape = (300,) if dimension is None else (300, dimension)
+        points_shape = (40, 30) if dimension is None else (1200, dimension)
+        abscissa = rng.uniform(-3, 3, shape)
+        ordinates = rng.standard_normal(300)
+        points = rng.uniform(-3, 3, points_shape)
+
+        with NonparametricRegressor(10, block_size=50, parallel_threshold=100) as regressor:
+            regressor.fit(abscissa, ordinates)
+            expected = regressor.predict(points)
+
+            np.testing.assert_array_equal(regressor.predict(points, n_jobs=2), expected)
+            pool = regressor._pool
+            assert pool is not None
+            np.testing.assert_array_equal(regressor.predict(points, n_jobs=2), expected)
+            assert regressor._pool is pool
+
+            regressor.fit(abscissa, 2 * ordinates)
+            assert regressor._pool is None
+            np.testing.assert_allclose(regressor.predict(points, n_jobs=2), 2 * expected)
+        assert regressor._pool is None
+
+    def test_small_inputs_stay_serial(self) -> None:
+        abscissa, ordinates = sample(0, 50)
+        regressor = NonparametricRegressor(5, block_size=10, parallel_threshold=1000)
+        regressor.fit(abscissa, ordinates)
+        points = queries(0, 200)
+
+        predictions = regressor.predict(points, n_jobs=2)
+
+        assert regressor._pool is None
+        np.testing.assert_allclose(predictions, regressor.predict(np.array(points)))
+
+    @pytest.mark.parametrize("n_jobs", [0, -2])
+    def test_bad_n_jobs(self, n_jobs: int) -> None:
+        regressor = NonparametricRegressor(1)
+        regressor.fit([0.0, 1.0, 2.0], [1.0, 2.0, 3.0])
+
+        with pytest.raises(ValueError):
+            _ = regressor.predict([0.5], n_jobs=n_jobs)
@@ -16,9 +16,9 @@ FIGSIZE = (16, 8)
 
 def visualize_results(
     axis: plt.Axes,
-    abscissa: list,
-    ordinates: list,
-    predictions: list,
+    abscissa: np.ndarray,
+    ordinates: np.ndarray,
+    predictions: np.ndarray,
 ) -> None:
     """
     Визуализирует облако точек и полученную аппроксимацию.
@@ -48,8 +48,7 @@ def demonstrate(
         regressors: сравниваемые алгоритмы регрессии.
     """
     abscissa = np.linspace(*BOUNDS, POINTS_AMOUNT)
-    ordinates = function(abscissa).tolist()
-    abscissa = abscissa.tolist()
+    ordinates = function(abscissa)
 
     for regressor in regressors:
         regressor.fit(abscissa, ordinates)